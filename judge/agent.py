@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import os
 from functools import partial
 
 from google.adk.agents import LlmAgent, SequentialAgent
+from google.adk.sessions.base_session_service import BaseSessionService
 from google.adk.sessions.session import Session
 
 from judge.tools.session_service import session_service
@@ -23,15 +25,35 @@ from judge.agents.social.noise.agent import social_noise_agent
 from judge.agents.llm.agent import llm_agent
 from judge.agents.classifier.agent import classifier_agent
 from judge.agents.weight.agent import weight_agent
+from judge.agents.prescreen.agent import create_prescreen_agent, prescreen_enabled
+
+from judge.tools import (
+    _before_init_session,
+    append_event,
+    make_record_callback,
+    open_batcher,
+    open_journal,
+)
+from judge.tools.llm_backend import install_llm_backend
+from judge.tools.llm_cache import install_llm_cache
+from judge.tools.llm_scheduler import install_llm_scheduler
+from judge.tools.model_tiers import install_model_tiers
+from judge.tools.evicting_session_service import finish_session_callback
+from judge.tools.near_duplicate import verdict_callbacks
+from judge.tools.pipeline_dag import DagAgent, defer_in_stage
 
-from judge.tools import _before_init_session, append_event, make_record_callback
 
+def create_session(
+    state: dict | None = None, service: BaseSessionService = session_service
+) -> Session:
+    """建立新的 Session（同步呼叫版）
 
-def create_session(state: dict | None = None) -> Session:
-    """建立新的 Session（同步呼叫版）"""
+    預設使用依設定（``JUDGE_SESSION_BACKEND``）建立的 ``session_service``，
+    亦可傳入其他 SessionService（如 ``SqliteSessionService``）。
+    """
 
     # 使用 google.adk 提供的同步 API，避免在此處建立事件迴圈
-    return session_service.create_session_sync(
+    return service.create_session_sync(
         app_name="agent_judge",
         user_id="user",
         state=state
@@ -42,10 +64,30 @@ def create_session(state: dict | None = None) -> Session:
     )
 
 
-def bind_session(session: Session) -> None:
-    """將 append_event 函式注入各代理，避免全域依賴"""
+def bind_session(
+    session: Session,
+    journal_dir: str | None = None,
+    service: BaseSessionService = session_service,
+    batch_window: float | None = None,
+) -> None:
+    """將 append_event 函式注入各代理，避免全域依賴
+
+    Args:
+        session:     要寫入事件的 Session
+        journal_dir: 若提供，為此 Session 開啟 NDJSON 事件日誌並寫入該目錄
+        service:     寫入事件所用的 SessionService，需與建立 Session 時相同
+        batch_window: 若提供，事件經 EventBatcher 排隊，於此秒數內合併同作者的
+                      state_delta 後批次寫入；session.state 仍即時更新
+    """
+
+    if journal_dir is not None:
+        open_journal(session, journal_dir)
 
-    append_event_fn = partial(append_event, session, service=session_service)
+    append_event_fn = partial(append_event, session, service=service)
+    if batch_window is not None:
+        append_event_fn = open_batcher(session, append_event_fn, window=batch_window).submit
+    # JUDGE_PIPELINE=dag 時，階段內的寫入延後到該階段依宣告順序輸出時
+    append_event_fn = defer_in_stage(append_event_fn)
 
     # 統一列出需要寫入事件的代理與對應鍵值
     agent_event_map = [
@@ -53,7 +95,7 @@ def bind_session(session: Session) -> None:
         (historian_agent, "historian", "history", False),
         (social_summary_agent, "social", "social_log", False),
         (evidence_agent, "evidence", "evidence", False),
-        # 在 Web/CLI 中同時顯示美化後的 JSON
+        # 標記後 export_session 會為事件附上 pretty JSON（由 pretty_message 延遲產生）
         (jury_agent, "jury", "jury_result", True),
         (synthesizer_agent, "synthesizer", "final_report_json", True),
         (advocate_agent, "advocate", "advocacy", False),
@@ -85,20 +127,85 @@ init_session = LlmAgent(
     output_key="_init_session",
 )
 
-root_agent = SequentialAgent(
-    name="root_pipeline",
-    sub_agents=[
-        init_session,
-        curator_agent,
-        historian_agent,
-        referee_loop,
-        social_summary_agent,
-        adjudication_agent,
-        llm_agent,
-        classifier_agent,
-        weight_agent
-    ],
-)
+root_stages = [
+    init_session,
+    curator_agent,
+    historian_agent,
+    referee_loop,
+    social_summary_agent,
+    adjudication_agent,
+    llm_agent,
+    classifier_agent,
+    weight_agent
+]
+
+
+def _pipeline(name: str, stages: list, **kwargs):
+    """依 JUDGE_PIPELINE 建立固定順序或相依感知（dag）的管線"""
+    if os.getenv("JUDGE_PIPELINE") == "dag":
+        # 依 instruction 佔位符與 output_key 推斷相依，互不相依的階段（如 Historian、
+        # Fact-check 與辯論）同時執行；回呼中讀寫的 state 於此補充
+        return DagAgent(
+            name=name,
+            sub_agents=stages,
+            extra_reads={
+                adjudication_agent.name: ["debate_messages"],
+                weight_agent.name: ["fact_check_result_json", "classification_json"],
+            },
+            extra_writes={
+                referee_loop.name: ["debate_messages"],
+                classifier_agent.name: ["classification_json"],
+            },
+            **kwargs,
+        )
+    return SequentialAgent(name=name, sub_agents=stages, **kwargs)
+
+
+def _finish_on_shortcut(before):
+    # 沿用歸檔判定時略過整條流程，after_agent_callback 不會執行，於此標記完成
+    def _callback(callback_context=None, **kwargs):
+        result = before(callback_context=callback_context, **kwargs)
+        if result is not None:
+            finish_session_callback(callback_context=callback_context)
+        return result
+
+    return _callback
+
+
+def _root_callbacks() -> dict:
+    """root_agent 的回呼：近似重複判定，以及呼叫結束時標記 Session 完成（供淘汰）"""
+    callbacks = verdict_callbacks()
+    before = callbacks.get("before_agent_callback")
+    if before is not None:
+        callbacks["before_agent_callback"] = _finish_on_shortcut(before)
+    after = callbacks.get("after_agent_callback")
+    callbacks["after_agent_callback"] = [*([after] if after else []), finish_session_callback]
+    return callbacks
+
+
+if prescreen_enabled():
+    # 先跑 Fact-check 與 SLM 分類，兩者高信心一致時略過辯論與社群層
+    root_agent = create_prescreen_agent(
+        "root_pipeline",
+        screen=_pipeline("prescreen", [init_session, llm_agent, classifier_agent, weight_agent]),
+        full=_pipeline(
+            "full_pipeline",
+            [curator_agent, historian_agent, referee_loop, social_summary_agent, adjudication_agent],
+        ),
+        **_root_callbacks(),
+    )
+else:
+    # 近似重複的新聞沿用（或參考）已歸檔的判定，完成後歸檔本次判定
+    root_agent = _pipeline("root_pipeline", root_stages, **_root_callbacks())
+
+# 純整理/驗證的 *_schema_validator 改用 lite 級模型，輸出不合 schema 時才升級回原模型
+install_model_tiers(root_agent)
+# 所有模型呼叫（含 Weight 階段的 gemini-2.0-flash）經行程層級排程器限速與退避重試
+install_llm_scheduler(root_agent)
+# JUDGE_LLM_MODE=record/replay 時改用錄製或回放的模型後端（可完全離線執行）
+install_llm_backend(root_agent)
+# temperature 為 0 的代理（或 JUDGE_LLM_CACHE_AGENTS 指定者）啟用內容定址回應快取
+install_llm_cache(root_agent)
 
 
 if __name__ == "__main__":
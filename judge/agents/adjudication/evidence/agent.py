@@ -1,11 +1,13 @@
 from typing import List
 from pydantic import BaseModel, Field
 
-from google.adk.agents import LlmAgent, SequentialAgent
-from google.adk.tools.google_search_tool import GoogleSearchTool
+from google.adk.agents import LlmAgent
+from judge.tools.search_cache import search_callbacks, search_tool_name, search_tools
 from google.genai import types
 
+from judge.tools.debate_history import history_view_callback
 from judge.tools.evidence import Evidence
+from judge.tools.structured_output import structured_stage
 
 
 class CheckedClaim(BaseModel):
@@ -21,10 +23,13 @@ _evidence_tool_agent = LlmAgent(
     name="evidence_tool_runner",
     model="gemini-2.5-flash",
     instruction=(
-        "根據辯論紀錄 state['debate_messages'] 或辯論檔案，"
-        "使用 GoogleSearchTool 逐條查證並將搜尋結果寫入 state['evidence_raw']。"
+        "根據下方辯論紀錄（最近回合原文與主張/證據摘要）或辯論檔案，"
+        f"使用 {search_tool_name()} 逐條查證並將搜尋結果寫入 state['evidence_raw']。\n"
+        "DEBATE:\n{temp:debate_view_evidence?}"
     ),
-    tools=[GoogleSearchTool()],
+    before_agent_callback=history_view_callback("evidence"),
+    tools=search_tools(),
+    **search_callbacks(),
     output_key="evidence_raw",
 )
 
@@ -47,9 +52,10 @@ def _before_evidence(agent_context=None, **_):
     return None
 
 
-evidence_agent = SequentialAgent(
-    name="evidence_agent",
-    sub_agents=[_evidence_tool_agent, _evidence_schema_agent],
+evidence_agent = structured_stage(
+    "evidence_agent",
+    _evidence_tool_agent,
+    _evidence_schema_agent,
     before_agent_callback=_before_evidence,
     after_agent_callback=None,
 )
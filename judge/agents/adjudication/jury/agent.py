@@ -1,11 +1,9 @@
 from typing import List
 from pydantic import BaseModel, Field
 from google.adk.agents import LlmAgent
-from google.adk.events.event import Event
-from google.adk.events.event_actions import EventActions
-import json
 from google.genai import types
-from judge.tools import flatten_fallacies
+from judge.tools import collect_evidence_digest, flatten_fallacies
+from judge.tools.debate_history import update_history_view
 
 
 class ScoreDetail(BaseModel):
@@ -38,32 +36,13 @@ def _ensure_and_flatten_fallacies(callback_context=None, **_):
     msgs = state.get("debate_messages") or []
     state["debate_messages"] = msgs
     state["fallacy_list"] = flatten_fallacies(msgs)
+    # 各方引用的證據常重複，去重後再交給提示使用
+    state["evidence_digest"] = collect_evidence_digest(state)
+    # 依 token 預算壓縮辯論紀錄，避免提示隨回合數線性成長
+    update_history_view(state, "jury")
     return None
 
 
-jury_pretty_after = None
-
-def _build_jury_after():
-    def _after(agent_context=None, **_):
-        if agent_context is None:
-            return None
-        st = agent_context.state
-        out = st.get("jury_result")
-        if out is None:
-            return None
-        try:
-            if hasattr(out, "model_dump"):
-                data = out.model_dump()
-            else:
-                data = out
-            msg = json.dumps(data, ensure_ascii=False, indent=2)
-        except Exception:
-            msg = str(out)
-        return Event(author="jury", actions=EventActions(message=msg))
-    return _after
-
-jury_pretty_after = _build_jury_after()
-
 jury_agent = LlmAgent(
     name="jury",
     model="gemini-2.5-flash",
@@ -73,7 +52,8 @@ jury_agent = LlmAgent(
         "CURATION(JSON): {curation}\n"
         "ADVOCACY(JSON): (the current advocacy JSON in state['advocacy'], if any)\n"
         "SKEPTICISM(JSON): (the current skepticism JSON in state['skepticism'], if any)\n"
-        "DEBATE(LOG): (the current debate messages stored in state['debate_messages'])\n"
+        "DEBATE(LOG):\n{temp:debate_view_jury?}\n"
+        "EVIDENCE(JSON, 已去重): {evidence_digest?}\n"
         "SOCIAL_LOG(JSON): {social_log}\n\n"
         "【評分規則】\n"
         "- evidence_quality: 來源權威性/時效性/相關性（0~30）\n"
@@ -90,5 +70,4 @@ jury_agent = LlmAgent(
     output_key="jury_result",
     generate_content_config=types.GenerateContentConfig(temperature=0.0),
     before_agent_callback=_ensure_and_flatten_fallacies,
-    after_agent_callback=jury_pretty_after,
 )
@@ -1,11 +1,9 @@
 from typing import List, Optional
 from pydantic import BaseModel, Field
 from google.adk.agents import LlmAgent
-from google.adk.events.event import Event
-from google.adk.events.event_actions import EventActions
-import json
 from google.genai import types
-from judge.tools import flatten_fallacies
+from judge.tools import collect_evidence_digest, flatten_fallacies
+from judge.tools.debate_history import update_history_view
 
 
 class StakeSummary(BaseModel):
@@ -49,27 +47,13 @@ def _ensure_and_flatten_fallacies(callback_context=None, **_):
     msgs = state.get("debate_messages") or []
     state["debate_messages"] = msgs
     state["fallacy_list"] = flatten_fallacies(msgs)
+    # 各方引用的證據常重複，去重後再交給提示使用
+    state["evidence_digest"] = collect_evidence_digest(state)
+    # 依 token 預算壓縮辯論紀錄，避免提示隨回合數線性成長
+    update_history_view(state, "synthesizer")
     return None
 
 
-def _pretty_after(agent_context=None, **_):
-    if agent_context is None:
-        return None
-    st = agent_context.state
-    out = st.get("final_report_json")
-    if out is None:
-        return None
-    try:
-        if hasattr(out, "model_dump"):
-            data = out.model_dump()
-        else:
-            data = out
-        msg = json.dumps(data, ensure_ascii=False, indent=2)
-    except Exception:
-        msg = str(out)
-    return Event(author="synthesizer", actions=EventActions(message=msg))
-
-
 synthesizer_agent = LlmAgent(
     name="synthesizer",
     model="gemini-2.5-flash",
@@ -81,14 +65,17 @@ synthesizer_agent = LlmAgent(
         "- SKEPTICISM(JSON): (the current skepticism JSON in state['skepticism'], if any)\n"
         "- (可選) DEVIL(JSON): (the optional devil turn stored in state['devil_turn'], if any)\n"
         "- JURY(JSON): (the current jury result in state['jury_result'], if any)\n"
-        "- DEBATE LOG (messages array): (the current debate messages stored in state['debate_messages'])\n"
-        "- SOCIAL LOG(JSON): (the current social diffusion log stored in state['social_log'], if any)\n\n"
+        "- DEBATE LOG:\n{temp:debate_view_synthesizer?}\n"
+        "- EVIDENCE(JSON, 已去重): {evidence_digest?}\n"
+        "- SOCIAL LOG(JSON): (the current social diffusion log stored in state['social_log'], if any)\n"
+        "- (可選) ARCHIVED VERDICT(JSON): (the archived verdict of a near-duplicate news item stored in state['archived_verdict'], if any)\n\n"
         "【要求】\n"
         "1) 僅輸出符合 FinalReport schema 的 JSON；不得有多餘文字。\n"
         "2) overall_assessment 要清楚可執行；evidence_digest 列出最關鍵來源（含短說明、可附 URL）。\n"
         "3) key_contentions 需能對照正反雙方觀點；若 devil_turn 存在，整合在 what_devil_pushed。\n"
         "4) 若有 jury_result，填入 jury_score 與簡短 jury_brief（30 字內）。\n"
-        "5) appendix_links 可放『辯論日誌』或外部來源列表連結（若有）。"
+        "5) appendix_links 可放『辯論日誌』或外部來源列表連結（若有）。\n"
+        "6) 若有 archived_verdict，可沿用其結論，但須以本次辯論與證據檢查是否有新變化。"
     ),
     output_schema=FinalReport,
     disallow_transfer_to_parent=True,
@@ -96,5 +83,4 @@ synthesizer_agent = LlmAgent(
     output_key="final_report_json",
     generate_content_config=types.GenerateContentConfig(temperature=0.0),
     before_agent_callback=_ensure_and_flatten_fallacies,
-    after_agent_callback=_pretty_after,
 )
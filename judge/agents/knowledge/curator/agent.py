@@ -1,10 +1,13 @@
+import re
 from typing import List, Optional
 from pydantic import BaseModel, Field
 
-from google.adk.agents import LlmAgent, SequentialAgent
+from google.adk.agents import LlmAgent
 from google.genai import types
-from google.adk.tools.google_search_tool import GoogleSearchTool
+from judge.tools.search_cache import search_callbacks, search_tool_name, search_tools
 from judge.tools.evidence import Evidence
+from judge.tools.knowledge_base import kb_lookup_callbacks, kb_store_callbacks
+from judge.tools.structured_output import structured_stage
 
 
 class CuratorInput(BaseModel):
@@ -48,10 +51,12 @@ curator_tool_agent = LlmAgent(
     name="curator_tool_runner",
     model="gemini-2.5-flash",
     instruction=(
-        "你是 Curator 的工具執行者：使用 GoogleSearchTool 來取得原始搜尋結果，"
+        f"你是 Curator 的工具執行者：使用 {search_tool_name()} 來取得原始搜尋結果，"
         "請把原始結果（未经 schema 驗證的 JSON）存入 state['curation_raw']。"
+        "知識庫中的相關卡片（可能為空）：{kb_related?}；已涵蓋的內容只需補查差異。"
     ),
-    tools=[GoogleSearchTool()],
+    tools=search_tools(),
+    **search_callbacks(),
     output_key="curation_raw",
 )
 
@@ -69,11 +74,44 @@ curator_schema_agent = LlmAgent(
     disallow_transfer_to_peers=True,
     output_key="curation",
     generate_content_config=types.GenerateContentConfig(temperature=0.4),
+    **kb_store_callbacks("curation", "curation"),
 )
 
 
-curator_agent = SequentialAgent(
-    name="curator",
-    sub_agents=[curator_tool_agent, curator_schema_agent],
+_MARKDOWN_LINK = re.compile(r"\[([^\]]+)\]\((https?://[^\s)]+)\)")
+_BARE_URL = re.compile(r"https?://[^\s)\]」>]+")
+_LIST_MARKER = re.compile(r"^\s*\d+[.)、]\s*")
+
+
+def parse_curation_raw(raw: str, state) -> Optional[dict]:
+    """確定性解析：從搜尋原始輸出的 Markdown 連結或網址行整理出 CuratorOutput"""
+    results = []
+    seen = set()
+    lines = [line.strip(" -*\t") for line in raw.splitlines()]
+    for i, line in enumerate(lines):
+        links = _MARKDOWN_LINK.findall(line) or [
+            (lines[i - 1] if i and not _BARE_URL.search(lines[i - 1]) else url, url)
+            for url in _BARE_URL.findall(line)
+        ]
+        for title, url in links:
+            if url in seen:
+                continue
+            seen.add(url)
+            snippet = _BARE_URL.sub("", _MARKDOWN_LINK.sub("", line))
+            snippet = _LIST_MARKER.sub("", snippet).strip(" :：-")
+            results.append({"title": title.strip() or url, "url": url, "snippet": snippet})
+    if not results:
+        return None
+    query = state.get("query") or (state.get("news_text") or "")[:100]
+    return {"query": query, "results": results}
+
+
+curator_agent = structured_stage(
+    "curator",
+    curator_tool_agent,
+    curator_schema_agent,
+    parser=parse_curation_raw,
+    # 主題相近且未過期的卡片直接沿用，略過搜尋與整理
+    **kb_lookup_callbacks("curation", "curation"),
 )
 
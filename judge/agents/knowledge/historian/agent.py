@@ -4,6 +4,8 @@ from pydantic import BaseModel, Field
 from google.adk.agents import LlmAgent, SequentialAgent
 from google.genai import types
 
+from judge.tools.knowledge_base import kb_lookup_callbacks, kb_store_callbacks
+
 
 class TimelineEvent(BaseModel):
     date: str = Field(description="事件發生日期（ISO 8601 或文字描述）")
@@ -35,11 +37,14 @@ historian_llm_agent = LlmAgent(
     disallow_transfer_to_peers=True,
     output_key="history",
     generate_content_config=types.GenerateContentConfig(temperature=0.2),
+    **kb_store_callbacks("history", "history"),
 )
 
 
 historian_agent = SequentialAgent(
     name="historian",
     sub_agents=[historian_llm_agent],
+    # 同主題的既有時間軸直接沿用
+    **kb_lookup_callbacks("history", "history"),
 )
 
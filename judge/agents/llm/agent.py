@@ -1,8 +1,10 @@
+import re
 from typing import Optional
 from pydantic import BaseModel, Field
-from google.adk.agents import LlmAgent, SequentialAgent
-from google.adk.tools.google_search_tool import GoogleSearchTool
+from google.adk.agents import LlmAgent
+from judge.tools.search_cache import search_callbacks, search_tool_name, search_tools
 from google.genai import types
+from judge.tools.structured_output import structured_stage
 
 # -------- Schema --------
 class FactCheckInput(BaseModel):
@@ -25,7 +27,7 @@ fact_check_tool_agent  = LlmAgent(
         "我會給你一篇待驗證真假的文章(news_text)，以及該篇文章的日期(news_date)。"
         "\n"
         "你的任務：\n"
-        "1. 使用 GoogleSearchTool 查詢相關資料，盡量查詢台灣網站。\n"
+        f"1. 使用 {search_tool_name()} 查詢相關資料，盡量查詢台灣網站。\n"
         "2. 若分析出來的結果對不同族群有差異，請分別分析；若無，則針對整體分析。\n"
         "3. 請以 news_date 的時間作為判斷基準；若 news_date 為空，則以今天為準。\n"
         "4. 在輸出時，在每篇網站名稱後面加上該新聞的報導日期。\n"
@@ -35,7 +37,8 @@ fact_check_tool_agent  = LlmAgent(
         "分析結果：[根據以上網站的分析與說明]\n"
         "真假分類：[「完全正確」、「部分正確」、「完全錯誤」、「完全錯誤」、「無法判斷」]"
     ),
-    tools=[GoogleSearchTool()],
+    tools=search_tools(),
+    **search_callbacks(),
     #input_schema=FactCheckInput,
     #output_schema=FactCheckOutput,
     output_key="fact_check_result",
@@ -57,8 +60,26 @@ fact_check_schema_agent = LlmAgent(
     generate_content_config=types.GenerateContentConfig(temperature=0.4),
 )
 
+# -------- 確定性解析（單次結構化輸出的退路）--------
+_LABELS = ("完全正確", "基本正確", "部分正確", "部分錯誤", "完全錯誤", "無法判斷")
+_FACT_CHECK_FORMAT = re.compile(r"分析結果[:：]\s*(.*?)\s*真假分類[:：]\s*(.+)", re.DOTALL)
+
+
+def parse_fact_check_raw(raw: str, state) -> Optional[dict]:
+    """依工具執行者指定的「分析結果：… 真假分類：…」格式解析 FactCheckOutput"""
+    match = _FACT_CHECK_FORMAT.search(raw)
+    if match is None:
+        return None
+    label = next((l for l in _LABELS if l in match.group(2)), None)
+    if label is None:
+        return None
+    return {"analysis": match.group(1).strip(), "classification": label}
+
+
 # -------- Step 3: Sequential pipeline --------
-llm_agent = SequentialAgent(
-    name="fact_check_agent",
-    sub_agents=[fact_check_tool_agent, fact_check_schema_agent],
+llm_agent = structured_stage(
+    "fact_check_agent",
+    fact_check_tool_agent,
+    fact_check_schema_agent,
+    parser=parse_fact_check_raw,
 )
\ No newline at end of file
@@ -1,10 +1,11 @@
 from typing import List
 from pydantic import BaseModel, Field
 
-from google.adk.agents import LlmAgent, SequentialAgent
+from google.adk.agents import LlmAgent
 from google.genai import types
-from google.adk.tools.google_search_tool import GoogleSearchTool
+from judge.tools.search_cache import search_callbacks, search_tool_name, search_tools
 from judge.tools.evidence import Evidence
+from judge.tools.structured_output import structured_stage
 
 
 class CuratorSearchResult(BaseModel):
@@ -29,10 +30,11 @@ advocate_tool_agent = LlmAgent(
     name="advocate_tool_runner",
     model="gemini-2.5-flash",
     instruction=(
-        "你是 Advocate 的工具執行者：在需要時使用 GoogleSearchTool 補充證據，"
+        f"你是 Advocate 的工具執行者：在需要時使用 {search_tool_name()} 補充證據，"
         "並把任何工具輸出（raw）寫入 state['advocate_search_raw']。"
     ),
-    tools=[GoogleSearchTool()],
+    tools=search_tools(),
+    **search_callbacks(),
     output_key="advocate_search_raw",
 )
 
@@ -52,8 +54,5 @@ advocate_schema_agent = LlmAgent(
 )
 
 
-advocate_agent = SequentialAgent(
-    name="advocate",
-    sub_agents=[advocate_tool_agent, advocate_schema_agent],
-)
+advocate_agent = structured_stage("advocate", advocate_tool_agent, advocate_schema_agent)
 
@@ -6,11 +6,26 @@ referee LoopAgent. Helper functions and AgentTool wrappers live in
 `judge.agents.moderator.tools`.
 """
 
-from google.adk.agents import LlmAgent, SequentialAgent, LoopAgent
+import json
+import logging
+import os
+from collections import Counter
+from typing import AsyncGenerator, Optional
+
+from google.adk.agents import LlmAgent, SequentialAgent, LoopAgent, ParallelAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.tools.tool_context import ToolContext
 from google.genai import types
 
+from judge.tools.debate_history import history_view_callback
+from judge.tools.debate_log import sync_debate_log
 from .tools import (
     exit_loop,
+    update_metrics,
+    should_stop,
     ensure_debate_messages,
     advocate_tool,
     skeptic_tool,
@@ -19,6 +34,20 @@ from .tools import (
 )
 from judge.agents.social.noise.agent import social_noise_agent
 
+logger = logging.getLogger(__name__)
+
+
+def _decision_dict(value) -> dict:
+    """next_decision may be a dict, a pydantic model or a JSON string."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return {}
+    return value if isinstance(value, dict) else {}
+
 
 # --- Step 1: decision agent (schema-only) ---
 decision_agent = LlmAgent(
@@ -27,10 +56,10 @@ decision_agent = LlmAgent(
     instruction=(
         "你是主持人的決策模組。目標：在維持秩序、避免重複論點、推進爭點澄清的前提下，"
         "輸出一個 NextTurnDecision JSON（next_speaker: 'advocate'|'skeptic'|'devil'|'end'）以及簡短 rationale。\n"
-        "輸入：\n- CURATION: {curation}\n- SOCIAL_NOISE: {social_noise}\n- MESSAGES(JSON array): (the current debate messages stored in state['debate_messages'])\n\n"
+        "輸入：\n- CURATION: {curation}\n- SOCIAL_NOISE: {social_noise}\n- MESSAGES（最近回合原文 + 較早回合摘要 + 主張/證據摘要）:\n{temp:debate_view_moderator?}\n\n"
         "僅產生 NextTurnDecision，不呼叫任何工具。"
     ),
-    before_agent_callback=ensure_debate_messages,
+    before_agent_callback=[ensure_debate_messages, history_view_callback("moderator")],
     output_schema=NextTurnDecision,
     disallow_transfer_to_parent=True,
     disallow_transfer_to_peers=True,
@@ -49,7 +78,8 @@ executor_agent = LlmAgent(
     instruction=(
         "你是主持人的執行模組：讀取 state['next_decision']，若 next_speaker 為 'end' 則回傳空字串，"
         "否則呼叫相對應的工具 (call_advocate/call_skeptic/call_devil) 取得該角色的發言。"
-        "工具已自動更新 state['debate_messages']，請將取得的字串原封不動地回傳。"
+        "工具已自動更新 state['debate_messages']，請將取得的字串原封不動地回傳。\n"
+        "NEXT_DECISION: {next_decision?}"
     ),
     before_agent_callback=ensure_debate_messages,
     tools=[advocate_tool, skeptic_tool, devil_tool],
@@ -61,13 +91,176 @@ executor_agent = LlmAgent(
     ),
 )
 
-orchestrator_agent = SequentialAgent(
-    name="moderator_orchestrator",
-    sub_agents=[decision_agent, executor_agent],
+# --- Speculative mode: decide the next turn while the current speaker runs ---
+# Speakers usually rotate advocate -> skeptic -> devil, so while the executor
+# runs speaker X, a copy of the decider pre-computes the decision that follows
+# X. It is committed next round if X's turn landed as expected and the
+# speculative decision agrees with the rotation; otherwise it is discarded and
+# the decider runs as usual. A speculation is only committed by the next
+# iteration of ``referee_loop``, so the mode needs JUDGE_REFEREE_ITERATIONS > 1.
+ROTATION = {"advocate": "skeptic", "skeptic": "devil", "devil": "advocate"}
+SPECULATION_KEY = "decision_speculation"
+SPECULATIVE_DECISION_KEY = "speculative_decision"
+# The speculative decider runs beside the real one; it renders its own view
+SPECULATIVE_VIEW_KEY = "temp:debate_view_moderator_speculative"
+
+# started / committed / discarded / skipped
+speculation_stats: Counter = Counter()
+
+
+def _start_speculation(callback_context=None, **_):
+    if callback_context is None:
+        return None
+    state = callback_context.state
+    speaker = _decision_dict(state.get("next_decision")).get("next_speaker")
+    if speaker not in ROTATION:
+        state[SPECULATION_KEY] = None
+        speculation_stats["skipped"] += 1
+        return types.Content(role="model", parts=[types.Part(text="no speculation")])
+    state[SPECULATION_KEY] = {
+        "after_speaker": speaker,
+        "predicted": ROTATION[speaker],
+        "turns": len(state.get("debate_messages") or []),
+        "status": "running",
+    }
+    state["speculating_after"] = speaker
+    speculation_stats["started"] += 1
+    return None
+
+
+speculative_decider = decision_agent.model_copy(
+    update={
+        "name": "moderator_decider_speculative",
+        "instruction": (
+            decision_agent.instruction.replace("{temp:debate_view_moderator?}", f"{{{SPECULATIVE_VIEW_KEY}?}}")
+            + "\n（預測模式）{speculating_after?} 正在發言、內容尚未加入 MESSAGES；"
+            "請假設其發言已完成，預先決定再下一位發言者。"
+        ),
+        "output_key": SPECULATIVE_DECISION_KEY,
+        "before_agent_callback": [
+            ensure_debate_messages,
+            history_view_callback("moderator", SPECULATIVE_VIEW_KEY),
+            _start_speculation,
+        ],
+        "parent_agent": None,
+    }
 )
 
 
-stop_checker = LlmAgent(
+class SpeculativeOrchestrator(BaseAgent):
+    """Decider -> (executor || speculative decider), reusing last round's speculation.
+
+    sub_agents are ``[decision_agent, turn_agent]`` where ``turn_agent`` is a
+    ParallelAgent running the executor and ``speculative_decider`` side by side.
+    """
+
+    def _committed_decision(self, state) -> Optional[dict]:
+        """The ready speculation's decision if its turn count still matches.
+
+        A stale speculation is counted as discarded once; the caller clears it.
+        """
+        spec = state.get(SPECULATION_KEY)
+        if not isinstance(spec, dict) or spec.get("status") != "ready":
+            return None
+        if spec.get("landed") != len(state.get("debate_messages") or []):
+            speculation_stats["discarded"] += 1
+            return None
+        return spec["decision"]
+
+    def _settle(self, state) -> Optional[dict]:
+        """Check the speculation against the turn that actually landed."""
+        spec = state.get(SPECULATION_KEY)
+        if not isinstance(spec, dict) or spec.get("status") != "running":
+            return None
+        messages = state.get("debate_messages") or []
+        landed = messages[spec["turns"]:]
+        decision = _decision_dict(state.get(SPECULATIVE_DECISION_KEY))
+        if (
+            len(landed) == 1
+            and isinstance(landed[0], dict)
+            and landed[0].get("speaker") == spec["after_speaker"]
+            and decision.get("next_speaker") == spec["predicted"]
+        ):
+            return {**spec, "status": "ready", "landed": len(messages), "decision": decision}
+        speculation_stats["discarded"] += 1
+        return {**spec, "status": "discarded"}
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        decider, turn = self.sub_agents
+        state = ctx.session.state
+        committed = self._committed_decision(state)
+        if committed is not None:
+            speculation_stats["committed"] += 1
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta={"next_decision": committed, SPECULATION_KEY: None}),
+            )
+        else:
+            if state.get(SPECULATION_KEY) is not None:
+                # Drop the stale or discarded speculation so it is not re-counted next round
+                yield Event(
+                    invocation_id=ctx.invocation_id,
+                    author=self.name,
+                    branch=ctx.branch,
+                    actions=EventActions(state_delta={SPECULATION_KEY: None}),
+                )
+            async for event in decider.run_async(ctx):
+                yield event
+        async for event in turn.run_async(ctx):
+            yield event
+        settled = self._settle(state)
+        if settled is not None:
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta={SPECULATION_KEY: settled}),
+            )
+
+
+# Rounds per referee_loop run (the loop still stops early via the stop checker)
+REFEREE_ITERATIONS = int(os.getenv("JUDGE_REFEREE_ITERATIONS") or 1)
+
+
+def _speculation_enabled(max_iterations: int) -> bool:
+    """JUDGE_SPECULATIVE_DECISION=1, and the loop runs a round that can commit it."""
+    if os.getenv("JUDGE_SPECULATIVE_DECISION", "0") != "1":
+        return False
+    if max_iterations <= 1:
+        logger.warning(
+            "JUDGE_SPECULATIVE_DECISION ignored: referee_loop runs %d iteration(s), "
+            "so a speculation could never be committed (set JUDGE_REFEREE_ITERATIONS > 1)",
+            max_iterations,
+        )
+        return False
+    return True
+
+
+def _create_orchestrator(max_iterations: int = REFEREE_ITERATIONS) -> BaseAgent:
+    """The speculative orchestrator when ``_speculation_enabled``, else decider -> executor."""
+    if not _speculation_enabled(max_iterations):
+        return SequentialAgent(
+            name="moderator_orchestrator",
+            sub_agents=[decision_agent, executor_agent],
+        )
+    turn_agent = ParallelAgent(
+        name="moderator_turn",
+        sub_agents=[executor_agent, speculative_decider],
+    )
+    return SpeculativeOrchestrator(
+        name="moderator_orchestrator",
+        sub_agents=[decision_agent, turn_agent],
+    )
+
+
+orchestrator_agent = _create_orchestrator()
+
+
+# --- Step 3: stop checker ---
+# The LLM checker is kept as an optional tie-breaker for the rule-based one.
+llm_stop_checker = LlmAgent(
     name="stop_checker",
     model="gemini-2.5-flash",
     tools=[exit_loop],
@@ -76,10 +269,10 @@ stop_checker = LlmAgent(
         "規則：達到 max_turns 或連續兩輪沒有新增實質證據/新觀點。\n"
         "若決策模組 next_decision.next_speaker 為 'end'，務必呼叫提供的工具 exit_loop。\n"
         "若不該結束，請回傳純文字 continue（或回傳空字串）。\n"
-        "MESSAGES:\n(the current debate messages are available in state['debate_messages'])\n"
+        "MESSAGES:\n{temp:debate_view_stop?}\n"
         "NEXT_DECISION:\n(the current moderator decision is available in state['next_decision'])"
     ),
-    before_agent_callback=ensure_debate_messages,
+    before_agent_callback=[ensure_debate_messages, history_view_callback("stop")],
     output_key="stop_signal",
     generate_content_config=types.GenerateContentConfig(
         temperature=0.0,
@@ -87,8 +280,109 @@ stop_checker = LlmAgent(
     ),
 )
 
+_METRIC_KEYS = (
+    "dispute_points",
+    "credibility",
+    "delta_dispute_points",
+    "delta_credibility",
+    "new_evidence_gain",
+    "prev_dispute_points",
+    "prev_credibility",
+    "prev_evidence_count",
+)
+
+
+class RuleStopChecker(BaseAgent):
+    """Code-only stop checker: no model call unless the signals disagree.
+
+    Each round it brings ``state['debate_log']`` up to date with the new
+    ``debate_messages`` only, then reads the incremental ``DebateMetrics``
+    accumulator for ``update_metrics`` and the lexical novelty of the turns added
+    since the previous check (no rescan of earlier turns):
+
+    - stop when the decider chose ``end``, ``max_turns`` is reached, no turn was
+      added, or ``should_stop`` and low novelty agree that the debate stalled
+    - continue when both signals show progress
+    - otherwise ask ``tie_breaker`` (the LLM checker) if configured, else continue
+
+    Stopping escalates through ``exit_loop``; the verdict is written to
+    ``state['stop_signal']`` like the LLM checker's output.
+    """
+
+    max_turns: int = 6
+    novelty_threshold: float = 0.25
+    tie_breaker: Optional[BaseAgent] = None
+
+    def _decide(self, state, messages: list, checked: int) -> str:
+        if _decision_dict(state.get("next_decision")).get("next_speaker") == "end":
+            return "end"
+        if len(messages) >= int(state.get("max_turns") or self.max_turns):
+            return "max_turns"
+        if len(messages) <= checked:
+            return "no_new_turn"
+        stalled = should_stop(state)
+        novel = state["debate_novelty"] >= self.novelty_threshold
+        if stalled and not novel:
+            return "stalled"
+        if not stalled and novel:
+            return "continue"
+        return "ambiguous"
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        tool_context = ToolContext(ctx)
+        state = tool_context.state
+        messages = state.get("debate_messages") or []
+        checked = state.get("stop_checked_turns", 0)
+        if checked > len(messages):
+            # debate_messages was reset by a new run in the same session
+            checked = 0
+
+        # The accumulator lives on the session's debate_log list, not in the delta
+        turns = sync_debate_log(ctx.session.state)
+        acc = turns.metrics
+        metrics = {k: state[k] for k in _METRIC_KEYS if k in state}
+        metrics.update(dispute_points=len(acc.claims), credibility=acc.credibility, evidence=acc.evidence)
+        update_metrics(metrics)
+        metrics.pop("evidence")
+        metrics["debate_novelty"] = acc.novelty(turns, checked)
+        for key, value in metrics.items():
+            state[key] = value
+
+        verdict = self._decide(state, messages, checked)
+        state["stop_checked_turns"] = len(messages)
+        if verdict == "ambiguous" and self.tie_breaker is not None:
+            state["stop_signal"] = verdict
+            yield Event(invocation_id=ctx.invocation_id, author=self.name, branch=ctx.branch, actions=tool_context.actions)
+            async for event in self.tie_breaker.run_async(ctx):
+                yield event
+            return
+        if verdict in ("continue", "ambiguous"):
+            state["stop_signal"] = "continue"
+        else:
+            state["stop_signal"] = f"stop:{verdict}"
+            exit_loop(tool_context)
+        yield Event(invocation_id=ctx.invocation_id, author=self.name, branch=ctx.branch, actions=tool_context.actions)
+
+
+def _create_stop_checker() -> BaseAgent:
+    """JUDGE_STOP_CHECKER: ``rule`` (default), ``hybrid`` (rule + LLM tie-breaker) or ``llm``"""
+    mode = (os.getenv("JUDGE_STOP_CHECKER") or "rule").lower()
+    if mode == "llm":
+        return llm_stop_checker
+    tie_breaker = llm_stop_checker if mode == "hybrid" else None
+    return RuleStopChecker(
+        name="rule_stop_checker",
+        max_turns=int(os.getenv("JUDGE_DEBATE_MAX_TURNS") or 6),
+        novelty_threshold=float(os.getenv("JUDGE_STOP_NOVELTY") or 0.25),
+        tie_breaker=tie_breaker,
+        sub_agents=[tie_breaker] if tie_breaker is not None else [],
+    )
+
+
+stop_checker = _create_stop_checker()
+
 referee_loop = LoopAgent(
     name="debate_referee_loop",
     sub_agents=[social_noise_agent, orchestrator_agent, stop_checker],
-    max_iterations=1,
+    max_iterations=REFEREE_ITERATIONS,
 )
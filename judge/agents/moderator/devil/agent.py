@@ -1,9 +1,10 @@
 from typing import List
 from pydantic import BaseModel, Field
-from google.adk.agents import LlmAgent, SequentialAgent
+from google.adk.agents import LlmAgent
 from google.genai import types
-from google.adk.tools.google_search_tool import GoogleSearchTool
+from judge.tools.search_cache import search_callbacks, search_tool_name, search_tools
 from judge.tools.evidence import Evidence
+from judge.tools.structured_output import structured_stage
 
 
 class DevilOutput(BaseModel):
@@ -17,10 +18,11 @@ devil_tool_agent = LlmAgent(
     name="devil_tool_runner",
     model="gemini-2.5-flash",
     instruction=(
-        "你是 Devil 的工具執行者：在需要時使用 GoogleSearchTool 補充證據，"
+        f"你是 Devil 的工具執行者：在需要時使用 {search_tool_name()} 補充證據，"
         "並把任何工具輸出（raw）寫入 state['devil_search_raw']。"
     ),
-    tools=[GoogleSearchTool()],
+    tools=search_tools(),
+    **search_callbacks(),
     output_key="devil_search_raw",
     generate_content_config=types.GenerateContentConfig(temperature=0.0),
 )
@@ -45,9 +47,10 @@ def _before_devil(agent_context=None, **_):
     return None
 
 
-devil_agent = SequentialAgent(
-    name="devils_advocate",
-    sub_agents=[devil_tool_agent, devil_schema_agent],
+devil_agent = structured_stage(
+    "devils_advocate",
+    devil_tool_agent,
+    devil_schema_agent,
     before_agent_callback=_before_devil,
     after_agent_callback=None,
 )
@@ -1,10 +1,11 @@
 from typing import List
 from pydantic import BaseModel, Field
 
-from google.adk.agents import LlmAgent, SequentialAgent
+from google.adk.agents import LlmAgent
 from google.genai import types
-from google.adk.tools.google_search_tool import GoogleSearchTool
+from judge.tools.search_cache import search_callbacks, search_tool_name, search_tools
 from judge.tools.evidence import Evidence
+from judge.tools.structured_output import structured_stage
 
 
 class CuratorSearchResult(BaseModel):
@@ -36,10 +37,11 @@ skeptic_tool_agent = LlmAgent(
     name="skeptic_tool_runner",
     model="gemini-2.5-flash",
     instruction=(
-        "你是 Skeptic 的工具執行者：在需要時使用 GoogleSearchTool 搜尋反證，"
+        f"你是 Skeptic 的工具執行者：在需要時使用 {search_tool_name()} 搜尋反證，"
         "並把工具輸出寫入 state['skeptic_search_raw']。"
     ),
-    tools=[GoogleSearchTool()],
+    tools=search_tools(),
+    **search_callbacks(),
     output_key="skeptic_search_raw",
 )
 
@@ -58,8 +60,5 @@ skeptic_schema_agent = LlmAgent(
     generate_content_config=types.GenerateContentConfig(temperature=0.0),
 )
 
-skeptic_agent = SequentialAgent(
-    name="skeptic",
-    sub_agents=[skeptic_tool_agent, skeptic_schema_agent],
-)
+skeptic_agent = structured_stage("skeptic", skeptic_tool_agent, skeptic_schema_agent)
 
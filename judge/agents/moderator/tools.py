@@ -6,6 +6,8 @@ from google.adk.tools.agent_tool import AgentTool
 
 from google.adk.events.event import Event
 from google.adk.events.event_actions import EventActions
+from judge.tools.debate_log import debate_messages_delta
+from judge.tools.local_search import tokenize
 from .advocate import advocate_agent
 from .skeptic import skeptic_agent
 from .devil import devil_agent
@@ -50,6 +52,28 @@ def should_stop(state) -> bool:
     )
 
 
+def _message_text(msg) -> str:
+    if not isinstance(msg, dict):
+        return str(msg)
+    return f"{msg.get('claim') or ''}\n{msg.get('content') or ''}"
+
+
+def lexical_novelty(new_messages, prior_messages) -> float:
+    """新發言中未曾出現在先前發言的詞彙比例（0~1）；沒有新詞彙時為 0
+
+    完整重掃先前發言（O(n)）；迴圈中改用 ``DebateMetrics.novelty``，此函式保留作為驗證路徑。
+    """
+    new_terms = set()
+    for msg in new_messages or []:
+        new_terms.update(tokenize(_message_text(msg)))
+    if not new_terms:
+        return 0.0
+    prior_terms = set()
+    for msg in prior_messages or []:
+        prior_terms.update(tokenize(_message_text(msg)))
+    return len(new_terms - prior_terms) / len(new_terms)
+
+
 def ensure_debate_messages(callback_context=None, **_):
     if callback_context is None:
         return None
@@ -114,21 +138,24 @@ async def log_tool_output(tool, args=None, tool_context=None, tool_response=None
         # Create a human-friendly summary for content
         content_text = _summarize_payload(payload, speaker)
 
-        st["debate_messages"].append({
+        message = {
             "speaker": speaker,
             "content": content_text,
             "claim": claim,
             "data": payload,
-        })
+        }
+        seq = len(st["debate_messages"])
+        st["debate_messages"].append(message)
         if append_event is not None:
             try:
+                # 事件僅攜帶本次新增的訊息與序號，避免每個事件複製完整歷史
                 await append_event(
                     Event(
                         author=speaker,
                         actions=EventActions(
                             state_delta={
                                 key: payload,
-                                "debate_messages": st.get("debate_messages"),
+                                **debate_messages_delta([message], seq),
                             }
                         ),
                     )
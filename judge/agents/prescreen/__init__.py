@@ -0,0 +1,21 @@
+"""Prescreen 模組：初篩結果明確時略過辯論與社群層"""
+
+from .agent import (
+    PrescreenAgent,
+    create_prescreen_agent,
+    prescreen_decision,
+    prescreen_enabled,
+    prescreen_stats,
+    reduced_report,
+    screened_inputs,
+)
+
+__all__ = [
+    "PrescreenAgent",
+    "create_prescreen_agent",
+    "prescreen_decision",
+    "prescreen_enabled",
+    "prescreen_stats",
+    "reduced_report",
+    "screened_inputs",
+]
@@ -0,0 +1,186 @@
+"""快速初篩：先跑 Fact-check 與 SLM 分類，兩者高信心一致時略過辯論與社群層。
+
+``PrescreenAgent`` 的 sub_agents 為 ``[screen, full]``：
+
+- ``screen``：init_session → Fact-check → SLM 分類 → 權重計算
+- ``full``：Curator → Historian → 辯論 → Social → Adjudication
+
+權重計算完成後，先確認 state 中的 ``fact_check_result_json`` 與 ``classification_json``
+皆存在、可解析且含真實分類，再以 ``calculate_weighted_score`` 的公式判斷：LLM 標籤屬於已知標籤、
+兩邊分數差距不超過 ``agreement``，且加權分數 ``>= high`` 或 ``<= low`` 時視為明確，
+直接輸出精簡版 ``final_report_json`` 並略過 ``full``；否則照常執行完整流程。
+
+設定（環境變數）：``JUDGE_PRESCREEN``（``1`` 啟用）、``JUDGE_PRESCREEN_HIGH``、
+``JUDGE_PRESCREEN_LOW``、``JUDGE_PRESCREEN_AGREEMENT``。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+from collections import Counter
+from typing import Any, AsyncGenerator, Optional
+
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from pydantic import Field
+
+from judge.agents.adjudication.synthesizer.agent import FinalReport
+from judge.agents.weight.agent import DEFAULT_LABEL_TO_SCORE, _as_dict, weight_settings_from_env
+
+logger = logging.getLogger(__name__)
+
+PRESCREEN_KEY = "prescreen"
+
+# screened：完成初篩的請求數；shortcut：略過完整流程；full：執行完整流程
+prescreen_stats: Counter[str] = Counter()
+
+_URL = re.compile(r"https?://[^\s)\]」』，。]+")
+
+
+def screened_inputs(state: Any, label_to_score: Optional[dict] = None) -> Optional[tuple[dict, dict]]:
+    """初篩兩項輸入皆存在、可解析且含真實分類時回傳 ``(fact_check, classification)``，否則回傳 None"""
+    label_to_score = label_to_score or DEFAULT_LABEL_TO_SCORE
+    if state.get("fact_check_result_json") is None or state.get("classification_json") is None:
+        return None
+    try:
+        fact_check = _as_dict(state.get("fact_check_result_json"))
+        classification = _as_dict(state.get("classification_json"))
+    except (ValueError, TypeError):
+        return None
+    if fact_check.get("classification") not in label_to_score or classification.get("score") is None:
+        return None
+    return fact_check, classification
+
+
+def prescreen_decision(
+    weight_result: Any,
+    high: float = 0.85,
+    low: float = 0.15,
+    agreement: float = 0.3,
+    label_to_score: Optional[dict] = None,
+) -> Optional[str]:
+    """依權重結果判斷是否明確：回傳 ``"true"`` / ``"false"``，不明確時回傳 None"""
+    label_to_score = label_to_score or DEFAULT_LABEL_TO_SCORE
+    try:
+        data = _as_dict(weight_result)
+    except (ValueError, TypeError):
+        return None
+    if data.get("error") or data.get("llm_label") not in label_to_score:
+        return None
+    llm_score = float(data.get("llm_score", 0.0))
+    slm_score = float(data.get("slm_score", 0.0))
+    final_score = float(data.get("final_score", 0.0))
+    if abs(llm_score - slm_score) > agreement:
+        return None
+    if final_score >= high and min(llm_score, slm_score) >= 0.5:
+        return "true"
+    if final_score <= low and max(llm_score, slm_score) <= 0.5:
+        return "false"
+    return None
+
+
+def reduced_report(state: Any, decision: str, news_text: str = "") -> dict:
+    """以 Fact-check 與權重結果組成精簡版 FinalReport
+
+    Args:
+        news_text: 使用者送出的新聞內容，首行作為 topic；空白時改用 Fact-check 分類
+    """
+    fact_check = _as_dict(state.get("fact_check_result_json"))
+    weight = _as_dict(state.get("weight_calculation_json"))
+    analysis = str(fact_check.get("analysis") or "")
+    news_text = (news_text or "").strip()
+    verdict = "高度可信" if decision == "true" else "高度可疑"
+    digest = [line.strip() for line in analysis.splitlines() if line.strip()][:5] or [analysis[:200]]
+    report = FinalReport(
+        topic=news_text.splitlines()[0][:60] if news_text else fact_check.get("classification", ""),
+        overall_assessment=(
+            f"{verdict}：Fact-check 判定「{weight.get('llm_label')}」，SLM 分數 {weight.get('slm_score')}，"
+            f"加權分數 {weight.get('final_score')}；兩者高信心一致，略過辯論與社群模擬。"
+        ),
+        evidence_digest=digest,
+        stake_summaries=[],
+        key_contentions=[],
+        appendix_links=list(dict.fromkeys(_URL.findall(analysis)))[:8],
+    )
+    return report.model_dump()
+
+
+class PrescreenAgent(BaseAgent):
+    """先執行初篩階段，結果明確時以精簡報告取代完整流程
+
+    Attributes:
+        high:      加權分數達此值且兩邊皆偏真時視為明確為真
+        low:       加權分數低於此值且兩邊皆偏假時視為明確為假
+        agreement: LLM 與 SLM 分數可容許的最大差距
+    """
+
+    high: float = 0.85
+    low: float = 0.15
+    agreement: float = 0.3
+    label_to_score: dict = Field(default_factory=lambda: dict(DEFAULT_LABEL_TO_SCORE))
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        screen, full = self.sub_agents
+        async for event in screen.run_async(ctx):
+            yield event
+        state = ctx.session.state
+        prescreen_stats["screened"] += 1
+        decision = None
+        # 任一初篩輸入缺少或無法解析時一律走完整流程
+        if screened_inputs(state, self.label_to_score) is not None:
+            decision = prescreen_decision(
+                state.get("weight_calculation_json"), self.high, self.low, self.agreement, self.label_to_score
+            )
+        if decision is None:
+            prescreen_stats["full"] += 1
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta={PRESCREEN_KEY: {"shortcut": False}}),
+            )
+            async for event in full.run_async(ctx):
+                yield event
+            return
+        prescreen_stats["shortcut"] += 1
+        logger.info(f"初篩結果明確（{decision}），略過辯論與社群層")
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(
+                state_delta={
+                    PRESCREEN_KEY: {"shortcut": True, "decision": decision},
+                    "final_report_json": reduced_report(state, decision, _user_text(ctx)),
+                }
+            ),
+        )
+
+
+def _user_text(ctx: InvocationContext) -> str:
+    content = ctx.user_content
+    if content is None:
+        return ""
+    return "\n".join(part.text for part in content.parts or [] if part.text)
+
+
+def prescreen_enabled() -> bool:
+    return os.getenv("JUDGE_PRESCREEN", "0") == "1"
+
+
+def create_prescreen_agent(name: str, screen: BaseAgent, full: BaseAgent, **kwargs: Any) -> PrescreenAgent:
+    """依環境變數設定門檻建立 ``PrescreenAgent``"""
+    return PrescreenAgent(
+        name=name,
+        sub_agents=[screen, full],
+        high=float(os.getenv("JUDGE_PRESCREEN_HIGH") or 0.85),
+        low=float(os.getenv("JUDGE_PRESCREEN_LOW") or 0.15),
+        agreement=float(os.getenv("JUDGE_PRESCREEN_AGREEMENT") or 0.3),
+        # 與權重階段使用相同的標籤映射
+        label_to_score=weight_settings_from_env()[1],
+        **kwargs,
+    )
@@ -1,9 +1,16 @@
 # weight_calculator_agent.py
+from typing import Any, AsyncGenerator, Optional
+
 from google.adk.agents import LlmAgent, SequentialAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
 from google.genai import types
 from pydantic import BaseModel, Field
 import json
 import logging
+import os
 
 # 配置日誌
 logging.basicConfig(level=logging.INFO)
@@ -22,6 +29,100 @@ class WeightCalculationOutput(BaseModel):
 # -----------------------
 # 權重計算函數
 # -----------------------
+# 標籤轉分數映射（可由 JUDGE_WEIGHT_LABELS 覆寫）
+DEFAULT_LABEL_TO_SCORE = {
+    "完全錯誤": 0.0,
+    "部分錯誤": 0.25,
+    "部分正確": 0.5,
+    "基本正確": 0.75,
+    "完全正確": 1.0
+}
+
+# 權重設定（可由 JUDGE_WEIGHT_LLM / JUDGE_WEIGHT_SLM 覆寫）
+DEFAULT_WEIGHTS = {"llm": 0.6, "slm": 0.4}
+
+
+def _as_dict(value: Any) -> dict:
+    """state 中的結果可能是 dict、pydantic 物件或 JSON 字串"""
+    if value is None:
+        return {}
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if isinstance(value, str):
+        value = json.loads(value) if value.strip() else {}
+    if not isinstance(value, dict):
+        raise TypeError(f"預期為物件，實際為 {type(value).__name__}")
+    return value
+
+
+def compute_weighted_score(
+    llm_result: Any,
+    slm_result: Any,
+    weights: Optional[dict] = None,
+    label_to_score: Optional[dict] = None,
+) -> dict:
+    """
+    依 LLM 分類標籤與 SLM 分數計算加權分數（純計算，不呼叫模型）
+
+    Args:
+        llm_result: fact_check_result_json（含 classification）
+        slm_result: classification_json（含 score）
+        weights: {"llm": 權重, "slm": 權重}
+        label_to_score: 標籤轉分數映射
+
+    Returns:
+        符合 WeightCalculationOutput 的字典
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    label_to_score = label_to_score or DEFAULT_LABEL_TO_SCORE
+    llm_weight = weights["llm"]
+    slm_weight = weights["slm"]
+
+    # 缺少或無法解析的輸入回傳錯誤結果，不以任何真實標籤代替
+    try:
+        llm_data = _as_dict(llm_result)
+        slm_data = _as_dict(slm_result)
+    except (ValueError, TypeError) as e:
+        return _error_result(ValueError(f"無法解析輸入: {e}"), weights)
+    if not llm_data.get("classification"):
+        return _error_result(ValueError("缺少 fact_check_result_json.classification"), weights)
+    if slm_data.get("score") is None:
+        return _error_result(ValueError("缺少 classification_json.score"), weights)
+
+    # 轉換 LLM 標籤為分數（未知標籤保留原文，分數為 0）
+    llm_label = str(llm_data["classification"])
+    llm_score = label_to_score.get(llm_label, 0.0)
+
+    # 取得 SLM 分數
+    try:
+        slm_score = float(slm_data["score"])
+    except (ValueError, TypeError) as e:
+        return _error_result(ValueError(f"classification_json.score 不是數值: {e}"), weights)
+
+    # 計算最終加權分數：(標籤分數*LLM權重 + SLM分數*SLM權重) / (LLM權重 + SLM權重)
+    final_score = (llm_score * llm_weight + slm_score * slm_weight) / (llm_weight + slm_weight)
+
+    return {
+        "llm_label": llm_label,
+        "llm_score": llm_score,
+        "slm_score": slm_score,
+        "final_score": round(final_score, 4),
+        "weights": {"llm": llm_weight, "slm": slm_weight}
+    }
+
+
+def _error_result(error: Exception, weights: Optional[dict] = None) -> dict:
+    weights = weights or DEFAULT_WEIGHTS
+    return {
+        "llm_label": "錯誤",
+        "llm_score": 0.0,
+        "slm_score": 0.0,
+        "final_score": 0.0,
+        "weights": {"llm": weights["llm"], "slm": weights["slm"]},
+        "error": str(error)
+    }
+
+
 def calculate_weighted_score(state_data: str = "") -> dict:
     """
     從 state 中取得其他 agent 的結果並計算權重分數
@@ -35,19 +136,6 @@ def calculate_weighted_score(state_data: str = "") -> dict:
     logger.info("開始權重計算...")
     
     try:
-        # 標籤轉分數映射
-        label_to_score = {
-            "完全錯誤": 0.0,
-            "部分錯誤": 0.25,
-            "部分正確": 0.5,
-            "基本正確": 0.75,
-            "完全正確": 1.0
-        }
-        
-        # 權重設定
-        llm_weight = 0.6
-        slm_weight = 0.4
-        
         # 嘗試解析傳入的 state 數據
         try:
             if state_data and state_data.strip():
@@ -60,60 +148,64 @@ def calculate_weighted_score(state_data: str = "") -> dict:
         except json.JSONDecodeError:
             llm_result = None
             slm_result = None
-        
-        # 如果沒有從參數取得，使用預設範例（你需要替換為實際的 state key）
-        """if llm_result is None:
-            # 這裡你需要替換為實際從 state 取得的方式
-            # 例如：llm_result = agent.get_state("classification_json")
-            llm_result = agent.get_state("fact_check_result_json")
-        
-        if slm_result is None:
-            # 這裡你需要替換為實際從 state 取得的方式  
-            # 例如：slm_result = agent.get_state("bert_result")
-            slm_result = agent.get_state("classification_json")"""
-        
-        # 解析結果
-        if isinstance(llm_result, str):
-            llm_data = json.loads(llm_result)
-        else:
-            llm_data = llm_result
-            
-        if isinstance(slm_result, str):
-            slm_data = json.loads(slm_result)
-        else:
-            slm_data = slm_result
-        
-        # 轉換 LLM 標籤為分數
-        llm_label = llm_data.get("classification", "完全錯誤")
-        llm_score = label_to_score.get(llm_label, 0.0)
-        
-        # 取得 SLM 分數
-        slm_score = float(slm_data.get("score", 0.0))
-        
-        # 計算最終加權分數：(標籤分數*LLM權重 + SLM分數*SLM權重) / (LLM權重 + SLM權重)
-        final_score = (llm_score * llm_weight + slm_score * slm_weight) / (llm_weight + slm_weight)
-        
-        result = {
-            "llm_label": llm_label,
-            "llm_score": llm_score,
-            "slm_score": slm_score,
-            "final_score": round(final_score, 4),
-            "weights": {"llm": llm_weight, "slm": slm_weight}
-        }
-        
-        logger.info(f"權重計算完成: 最終分數 {final_score:.4f}")
+
+        result = compute_weighted_score(llm_result, slm_result)
+        if not result.get("error"):
+            logger.info(f"權重計算完成: 最終分數 {result['final_score']:.4f}")
         return result
         
     except Exception as e:
         logger.error(f"權重計算過程中發生錯誤: {e}")
-        return {
-            "llm_label": "錯誤",
-            "llm_score": 0.0,
-            "slm_score": 0.0,
-            "final_score": 0.0,
-            "weights": {"llm": 0.6, "slm": 0.4},
-            "error": str(e)
-        }
+        return _error_result(e)
+
+
+def weight_settings_from_env() -> tuple[dict, dict]:
+    """讀取權重設定：JUDGE_WEIGHT_LLM / JUDGE_WEIGHT_SLM，以及 JUDGE_WEIGHT_LABELS（JSON 字串或 JSON 檔路徑）"""
+    weights = {
+        "llm": float(os.getenv("JUDGE_WEIGHT_LLM") or DEFAULT_WEIGHTS["llm"]),
+        "slm": float(os.getenv("JUDGE_WEIGHT_SLM") or DEFAULT_WEIGHTS["slm"]),
+    }
+    labels = os.getenv("JUDGE_WEIGHT_LABELS")
+    label_to_score = dict(DEFAULT_LABEL_TO_SCORE)
+    if labels:
+        if os.path.isfile(labels):
+            with open(labels, "r", encoding="utf-8") as f:
+                label_to_score = json.load(f)
+        else:
+            label_to_score = json.loads(labels)
+    return weights, label_to_score
+
+
+class WeightAgent(BaseAgent):
+    """不呼叫模型的權重計算階段：直接讀取 state 並寫入 weight_calculation_json"""
+
+    weights: dict = Field(default_factory=lambda: dict(DEFAULT_WEIGHTS))
+    label_to_score: dict = Field(default_factory=lambda: dict(DEFAULT_LABEL_TO_SCORE))
+    output_key: str = "weight_calculation_json"
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        try:
+            result = compute_weighted_score(
+                state.get("fact_check_result_json"),
+                state.get("classification_json"),
+                self.weights,
+                self.label_to_score,
+            )
+            if result.get("error"):
+                logger.warning(f"權重計算略過: {result['error']}")
+            else:
+                result = WeightCalculationOutput.model_validate(result).model_dump()
+                logger.info(f"權重計算完成: 最終分數 {result['final_score']:.4f}")
+        except Exception as e:
+            logger.error(f"權重計算過程中發生錯誤: {e}")
+            result = _error_result(e, self.weights)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={self.output_key: result}),
+        )
 
 # -----------------------
 # 使用 LlmAgent 來處理權重計算
@@ -155,9 +247,23 @@ weight_schema_agent = LlmAgent(
 )
 
 # -----------------------
-# Sequential pipeline
+# Sequential pipeline（舊版：兩次模型呼叫，JUDGE_WEIGHT_STAGE=llm 時使用）
 # -----------------------
-weight_agent = SequentialAgent(
+weight_llm_agent = SequentialAgent(
     name="weight_calculator_agent",
     sub_agents=[weight_processor_agent, weight_schema_agent],
+)
+
+# -----------------------
+# 預設：本地計算，不呼叫模型
+# -----------------------
+_weights, _label_to_score = weight_settings_from_env()
+weight_agent = (
+    weight_llm_agent
+    if os.getenv("JUDGE_WEIGHT_STAGE", "local").lower() == "llm"
+    else WeightAgent(
+        name="weight_calculator_agent",
+        weights=_weights,
+        label_to_score=_label_to_score,
+    )
 )
\ No newline at end of file
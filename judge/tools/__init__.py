@@ -2,11 +2,11 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
 
 from google.adk.events.event import Event
 from google.adk.events.event_actions import EventActions
-from google.adk.sessions.in_memory_session_service import InMemorySessionService
+from google.adk.sessions.base_session_service import BaseSessionService
 from google.adk.sessions.session import Session
 
 from judge.tools.session_service import session_service
@@ -18,10 +18,30 @@ from .debate_log import (
     append_event_update,
     export_debate_log,
     export_session,
+    clear_turn_cache,
 )
 from .evidence import Evidence, curator_result_to_evidence
+from .evidence_store import EvidenceStore, canonicalize_url, collect_evidence_digest
 from .file_io import ensure_parent_dir, write_json_file
+from .event_batcher import EventBatcher, open_batcher, flush_events, close_batcher
+from .pretty import pretty_message, pretty_metadata, render_pretty
+from .search_cache import SearchCache, search_cache, normalize_query, search_tools
+from .local_search import LocalSearchIndex, build_index, local_search
+from .knowledge_base import KnowledgeBase, knowledge_base, extract_entities
+from .near_duplicate import VerdictArchive, verdict_archive, minhash_signature
+from .agent_tree import iter_llm_agents, add_model_callbacks
+from .llm_cache import LlmResponseCache, llm_cache, install_llm_cache
+from .llm_backend import RecordingLlm, ReplayLlm, install_llm_backend
+from .model_tiers import ModelRouter, TieredLlm, model_router, install_model_tiers
+from .pipeline_dag import DagAgent, plan_dependencies
+from .llm_scheduler import LlmScheduler, ScheduledLlm, llm_scheduler, install_llm_scheduler
+from .structured_output import SinglePassAgent, structured_stage, parse_structured, single_pass_stats
+from .journal import open_journal, get_journal, close_journal, load_journal
+from .session_service import create_session_service
+from .sqlite_session_service import SqliteSessionService
+from .evicting_session_service import EvictingSessionService
 from .fallacies import flatten_fallacies
+from .debate_history import render_history, update_history_view, history_view_callback
 
 
 
@@ -29,13 +49,17 @@ from .fallacies import flatten_fallacies
 async def append_event(
     session: Session,
     event: Event,
-    service: InMemorySessionService = session_service,
+    service: BaseSessionService = session_service,
 ) -> Event:
     """加入事件到指定 Session 並同步更新 state（非同步）"""
 
     # 透過 await 呼叫 Session 服務，避免在回呼中建立新事件迴圈
     result = await service.append_event(session, event)
     append_event_update(session.state, event)
+    # 若此 Session 已開啟事件日誌，交由背景執行緒追加寫入
+    journal = get_journal(session.id)
+    if journal is not None:
+        journal.write(event)
     return result
 
 
@@ -43,10 +67,13 @@ def make_record_callback(author: str, key: str, show_pretty_message: bool = Fals
     """建立統一的 after_agent_callback 以記錄代理輸出
 
     會從 state 中擷取資料，並透過 google.adk 的事件 API 寫入 Session。
+    每次輸出只寫入一個事件；pretty JSON 不預先產生，匯出 Session 時才由
+    ``pretty_message(event)`` 計算並快取。
 
     Args:
         author: 事件來源代理名稱
         key:    在 state 與事件中使用的鍵名
+        show_pretty_message: 是否標記此事件，於匯出時附上 pretty JSON
     """
 
     async def _callback(agent_context=None, append_event=None, **_):
@@ -58,22 +85,13 @@ def make_record_callback(author: str, key: str, show_pretty_message: bool = Fals
         # 優先讀取 *_report，否則回退至原始 key
         output = state.get(f"{key}_report") or state.get(key)
 
-        # 可選：將結構化輸出同時以 pretty JSON 作為 message 供 Web/CLI 檢視
-        message: str | None = None
-        if show_pretty_message and output is not None:
-            try:
-                if hasattr(output, "model_dump"):
-                    data = output.model_dump()
-                else:
-                    data = output
-                message = json.dumps(data, ensure_ascii=False, indent=2)
-            except Exception:
-                # 退回為字串
-                message = str(output)
-
         # 非同步寫入事件，確保使用同一事件迴圈
         await append_event(
-            Event(author=author, actions=EventActions(state_delta={key: output}, message=message))
+            Event(
+                author=author,
+                actions=EventActions(state_delta={key: output}),
+                custom_metadata=pretty_metadata(key) if show_pretty_message else None,
+            )
         )
 
         return None
@@ -82,10 +100,11 @@ def make_record_callback(author: str, key: str, show_pretty_message: bool = Fals
 
 
 async def export_latest_debate_log(
-    session: Session, service: InMemorySessionService = session_service
+    session: Session, service: BaseSessionService = session_service
 ) -> str:
     """取得最新事件並輸出辯論紀錄（非同步）"""
 
+    await flush_events(session)
     session = await service.get_session(
         app_name=session.app_name,
         user_id=session.user_id,
@@ -97,20 +116,39 @@ async def export_latest_debate_log(
 async def export_latest_session(
     session: Session,
     path: str = "debate_log.json",
-    service: InMemorySessionService = session_service,
+    service: BaseSessionService = session_service,
 ) -> dict:
-    """匯出最新 Session 並保存為 JSON 檔（非同步）"""
+    """匯出最新 Session 並保存為 JSON 檔（非同步）
+
+    JSON 寫檔在背景執行緒進行，不阻塞事件迴圈。已開啟事件日誌的 Session 可改用
+    ``export_latest_journal``，只關閉並改名日誌而不重新序列化整個 Session。
+    匯出即代表辯論已完成：寫完並關閉合併寫入器，``EvictingSessionService`` 之後才可淘汰此 Session。
+    """
 
+    await close_batcher(session)
     session = await service.get_session(
         app_name=session.app_name,
         user_id=session.user_id,
         session_id=session.id,
     )
+    if isinstance(service, EvictingSessionService):
+        service.mark_finished(app_name=session.app_name, user_id=session.user_id, session_id=session.id)
     data = export_session(session)
-    write_json_file(path, data)
+    await asyncio.to_thread(write_json_file, path, data)
     return data
 
 
+async def export_latest_journal(session: Session, path: str | None = None) -> str | None:
+    """關閉此 Session 的事件日誌並改名為 ``path``（預設為開啟時的 ``.ndjson`` 路徑）
+
+    日誌為 NDJSON（每行一個事件，可由 ``load_journal`` 讀回），不會寫入 JSON 匯出檔；
+    等待背景寫入執行緒結束的動作在另一個執行緒進行。未開啟日誌時回傳 None。
+    """
+
+    await close_batcher(session)
+    return await asyncio.to_thread(close_journal, session.id, path)
+
+
 def _before_init_session(agent_context=None, **_):
     """在 agent 執行前初始化辯論相關的 state（無檔案耦合）。"""
     if agent_context is None:
@@ -126,6 +164,9 @@ __all__ = [
     "write_json_file",
     "Evidence",
     "curator_result_to_evidence",
+    "EvidenceStore",
+    "canonicalize_url",
+    "collect_evidence_digest",
     "append_event",
     "update_state_from_session",
     "append_event_update",
@@ -133,7 +174,61 @@ __all__ = [
     "export_debate_log",
     "export_latest_debate_log",
     "export_session",
+    "clear_turn_cache",
     "export_latest_session",
+    "export_latest_journal",
     "_before_init_session",
     "flatten_fallacies",
+    "render_history",
+    "update_history_view",
+    "history_view_callback",
+    "open_journal",
+    "get_journal",
+    "close_journal",
+    "load_journal",
+    "create_session_service",
+    "SqliteSessionService",
+    "EvictingSessionService",
+    "EventBatcher",
+    "open_batcher",
+    "flush_events",
+    "close_batcher",
+    "pretty_message",
+    "pretty_metadata",
+    "render_pretty",
+    "SearchCache",
+    "search_cache",
+    "normalize_query",
+    "search_tools",
+    "LocalSearchIndex",
+    "build_index",
+    "local_search",
+    "KnowledgeBase",
+    "knowledge_base",
+    "extract_entities",
+    "VerdictArchive",
+    "verdict_archive",
+    "minhash_signature",
+    "iter_llm_agents",
+    "add_model_callbacks",
+    "LlmResponseCache",
+    "llm_cache",
+    "install_llm_cache",
+    "RecordingLlm",
+    "ReplayLlm",
+    "install_llm_backend",
+    "ModelRouter",
+    "TieredLlm",
+    "model_router",
+    "install_model_tiers",
+    "DagAgent",
+    "plan_dependencies",
+    "LlmScheduler",
+    "ScheduledLlm",
+    "llm_scheduler",
+    "install_llm_scheduler",
+    "SinglePassAgent",
+    "structured_stage",
+    "parse_structured",
+    "single_pass_stats",
 ]
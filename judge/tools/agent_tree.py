@@ -0,0 +1,54 @@
+"""代理樹工具：走訪 root_agent 下所有 LlmAgent（含 AgentTool 包裝者），並追加模型回呼。"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Iterator, Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.tools.agent_tool import AgentTool
+
+
+def iter_agents(root: BaseAgent) -> Iterator[BaseAgent]:
+    """深度優先走訪代理樹；同一代理只回傳一次"""
+    seen: set[int] = set()
+    stack = [root]
+    while stack:
+        agent = stack.pop()
+        if id(agent) in seen:
+            continue
+        seen.add(id(agent))
+        yield agent
+        children = list(agent.sub_agents)
+        if isinstance(agent, LlmAgent):
+            children += [t.agent for t in agent.tools if isinstance(t, AgentTool)]
+        stack.extend(reversed(children))
+
+
+def iter_llm_agents(root: BaseAgent) -> Iterator[LlmAgent]:
+    for agent in iter_agents(root):
+        if isinstance(agent, LlmAgent):
+            yield agent
+
+
+def _as_list(callback: Any) -> list:
+    if not callback:
+        return []
+    return list(callback) if isinstance(callback, list) else [callback]
+
+
+def add_model_callbacks(
+    agent: LlmAgent,
+    before: Optional[Callable] = None,
+    after: Optional[Callable] = None,
+) -> None:
+    """追加模型回呼：``before`` 接在既有回呼之後（可看到其他回呼修改後的請求），
+    ``after`` 放在最前面（先拿到模型原始回應）。重複安裝同一回呼不會重複加入。"""
+    if before is not None:
+        callbacks = _as_list(agent.before_model_callback)
+        if before not in callbacks:
+            agent.before_model_callback = callbacks + [before]
+    if after is not None:
+        callbacks = _as_list(agent.after_model_callback)
+        if after not in callbacks:
+            agent.after_model_callback = [after] + callbacks
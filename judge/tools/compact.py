@@ -0,0 +1,187 @@
+"""辯論紀錄的輕量內部表示
+
+由已解析、可信的事件資料建立 ``__slots__`` 物件，不經 pydantic 驗證，
+並 intern 重複出現的發言者與來源字串；僅在 API 與匯出邊界才轉回
+``Turn`` / ``Evidence`` 模型。
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import Any, Optional
+
+from .evidence import Evidence
+
+_EVIDENCE_FIELDS = ("source", "claim", "warrant", "method", "risk", "confidence")
+_TURN_FIELDS = ("speaker", "content", "claim", "confidence", "evidence", "fallacies")
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+def _repr(record: Any, fields: tuple) -> str:
+    args = ", ".join(f"{f}={getattr(record, f)!r}" for f in fields if getattr(record, f) not in (None, [], ()))
+    return f"{type(record).__name__}({args})"
+
+
+class EvidenceRecord:
+    """``Evidence`` 的輕量版本"""
+
+    __slots__ = _EVIDENCE_FIELDS
+
+    def __init__(
+        self,
+        source: str,
+        claim: str,
+        warrant: str,
+        method: Optional[str] = None,
+        risk: Optional[str] = None,
+        confidence: Optional[str] = None,
+    ) -> None:
+        self.source = _intern(source)
+        self.claim = claim
+        self.warrant = warrant
+        self.method = method
+        self.risk = risk
+        self.confidence = confidence
+
+    @classmethod
+    def from_data(cls, data: Any) -> "EvidenceRecord":
+        if isinstance(data, cls):
+            return data
+        if isinstance(data, dict):
+            return cls(*(data.get(f) for f in _EVIDENCE_FIELDS))
+        return cls(*(getattr(data, f, None) for f in _EVIDENCE_FIELDS))
+
+    def to_dict(self) -> dict:
+        return {f: getattr(self, f) for f in _EVIDENCE_FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EvidenceRecord":
+        return cls(*(data.get(f) for f in _EVIDENCE_FIELDS))
+
+    def to_model(self) -> Evidence:
+        return Evidence.model_construct(**self.to_dict())
+
+    def __repr__(self) -> str:
+        return _repr(self, _EVIDENCE_FIELDS)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, EvidenceRecord):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in _EVIDENCE_FIELDS)
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, f) for f in _EVIDENCE_FIELDS))
+
+
+class TurnRecord:
+    """``Turn`` 的輕量版本；欄位與 ``Turn`` 相同，可直接用於指標計算"""
+
+    __slots__ = _TURN_FIELDS
+
+    def __init__(
+        self,
+        speaker: str,
+        content: str,
+        claim: Optional[str] = None,
+        confidence: Optional[float] = None,
+        evidence: tuple = (),
+        fallacies: Optional[list] = None,
+    ) -> None:
+        self.speaker = _intern(speaker)
+        self.content = content
+        self.claim = claim
+        self.confidence = float(confidence) if confidence is not None else None
+        self.evidence = tuple(EvidenceRecord.from_data(ev) for ev in evidence)
+        self.fallacies = fallacies if fallacies is not None else []
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TurnRecord":
+        """由 ``to_dict`` 的結果（或已解析的 JSON）重建"""
+        return cls(
+            speaker=data.get("speaker") or "",
+            content=data.get("content") or "",
+            claim=data.get("claim"),
+            confidence=data.get("confidence"),
+            evidence=data.get("evidence") or (),
+            fallacies=data.get("fallacies"),
+        )
+
+    def __repr__(self) -> str:
+        return _repr(self, _TURN_FIELDS)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TurnRecord):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in _TURN_FIELDS)
+
+    __hash__ = None
+
+    def to_dict(self) -> dict:
+        return {
+            "speaker": self.speaker,
+            "content": self.content,
+            "claim": self.claim,
+            "confidence": self.confidence,
+            "evidence": [ev.to_dict() for ev in self.evidence],
+            "fallacies": list(self.fallacies),
+        }
+
+    def to_model(self):
+        from .debate_log import Turn
+
+        return Turn.model_construct(
+            speaker=self.speaker,
+            content=self.content,
+            claim=self.claim,
+            confidence=self.confidence,
+            evidence=[ev.to_model() for ev in self.evidence],
+            fallacies=list(self.fallacies),
+        )
+
+
+def benchmark(n: int = 10_000) -> dict[str, float]:
+    """比較 n 個回合以 pydantic ``Turn`` 與 ``TurnRecord`` 保存時的記憶體用量（MiB）"""
+    import tracemalloc
+
+    from .debate_log import Turn
+
+    speakers = ("advocate", "skeptic", "devil")
+    sources = [f"https://example.com/news/{i}" for i in range(50)]
+
+    # 以 "".join 產生新的字串物件，模擬每個事件各自解析出的重複字串
+    def _message(i: int) -> dict:
+        return {
+            "speaker": "".join(speakers[i % 3]),
+            "content": f"Thesis {i}\n- point a\n- point b",
+            "claim": f"claim {i % 40}",
+            "confidence": 0.5,
+            "evidence": [
+                {
+                    "source": "".join(sources[(i + k) % 50]),
+                    "claim": f"claim {i % 40}",
+                    "warrant": "supporting statement",
+                }
+                for k in range(3)
+            ],
+            "fallacies": [],
+        }
+
+    messages = [_message(i) for i in range(n)]
+    result = {}
+    for label, factory in (("pydantic Turn", Turn), ("TurnRecord", TurnRecord)):
+        tracemalloc.start()
+        kept = [factory(**m) for m in messages]
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result[label] = current / 1024 / 1024
+        del kept
+    return result
+
+
+if __name__ == "__main__":
+    n = 10_000
+    for label, mib in benchmark(n).items():
+        print(f"{label:>14}: {mib:8.2f} MiB per {n} turns")
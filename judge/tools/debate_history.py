@@ -0,0 +1,257 @@
+"""辯論歷史壓縮：依 token 預算為各代理產生大小合適的辯論紀錄檢視。
+
+``state['debate_messages']`` 每則訊息都帶完整 ``data``，直接放進提示會隨回合數線性成長。
+此模組以 ``state['debate_history']`` 增量保存（每則訊息只處理一次，原地更新；只有重建時
+才整份寫回 state，之後的事件 state_delta 不再帶著完整歷史）：
+
+- 每回合一行的摘要（發言者、主張、首個重點）
+- 去重的主張清單（記錄提出者與次數）
+- 去重的證據清單（以 ``evidence_key`` 判斷重複）
+
+各代理的檢視（``state['temp:debate_view_<profile>']``，不持久化）包含「最近 k 回合原文
+（不含 ``data``）+ 較早回合的滾動摘要 + 主張與證據摘要」，超出預算時先合併最舊的摘要行，
+再依序截短證據、主張與較早的原文回合。
+
+設定（環境變數）：``JUDGE_HISTORY_BUDGET``（token 預算）與 ``JUDGE_HISTORY_RECENT``
+（保留原文的回合數）覆寫所有檢視；``JUDGE_HISTORY_BUDGET_<PROFILE>`` /
+``JUDGE_HISTORY_RECENT_<PROFILE>`` 只覆寫單一檢視（如 ``JURY``）。
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import unicodedata
+from typing import Any, Optional
+
+from .evidence_store import evidence_key
+
+HISTORY_STATE_KEY = "debate_history"
+VIEW_KEY_PREFIX = "temp:debate_view_"
+
+# 各檢視預設的 (token 預算, 保留原文的回合數)
+VIEW_PROFILES: dict[str, tuple[int, int]] = {
+    "moderator": (1200, 2),
+    "stop": (800, 2),
+    "evidence": (1500, 1),
+    "jury": (4000, 4),
+    "synthesizer": (4000, 4),
+}
+
+_LINE_CHARS = 160
+_TURN_CHARS = 1200
+_CJK_RANGES = "\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_CJK = re.compile(f"[{_CJK_RANGES}]")
+_WORD = re.compile(f"[^\\s{_CJK_RANGES}]+")
+_SPACE = re.compile(r"\s+")
+_HEADERS = (
+    "EARLIER TURNS (rolling summary, 9999 turns):",
+    "RECENT TURNS (last 99):",
+    "CLAIMS (deduplicated):",
+    "EVIDENCE (deduplicated):",
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """粗估 token 數：中日韓字元各算一個，其餘字詞約每四個字元一個"""
+    if not text:
+        return 0
+    return len(_CJK.findall(text)) + sum((len(w) + 3) // 4 for w in _WORD.findall(text))
+
+
+_HEADER_TOKENS = sum(estimate_tokens(h) for h in _HEADERS)
+
+
+def _clip(text: str, limit: int) -> str:
+    """截短至 ``limit`` 個字元；``limit <= 0`` 時回傳空字串"""
+    text = _SPACE.sub(" ", str(text or "")).strip()
+    if limit <= 0:
+        return ""
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _clip_tokens(text: str, limit: int) -> str:
+    """截短至估計不超過 ``limit`` token；``limit <= 0`` 時回傳空字串"""
+    if limit <= 0:
+        return ""
+    if estimate_tokens(text) <= limit:
+        return text
+    # 以二分搜尋找出加上省略號後仍不超過預算的最長前綴
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid] + "…") <= limit:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo] + "…" if lo else ""
+
+
+def _normalize_claim(claim: str) -> str:
+    return _SPACE.sub(" ", unicodedata.normalize("NFKC", claim).lower()).strip()
+
+
+def _summary_line(msg: dict) -> str:
+    speaker = msg.get("speaker") or "?"
+    claim = msg.get("claim")
+    content = str(msg.get("content") or "")
+    # content 為「主張 + 條列重點」，取主張之外的第一個重點
+    points = [ln.lstrip("- ").strip() for ln in content.splitlines() if ln.strip().startswith("-")]
+    head = claim or (content.splitlines()[0] if content else "")
+    line = f"{speaker}: {head}"
+    if points:
+        line += f"（{points[0]}）"
+    return _clip(line, _LINE_CHARS)
+
+
+def _evidence_line(ev: Any) -> str:
+    get = ev.get if isinstance(ev, dict) else lambda k: getattr(ev, k, None)
+    return _clip(f"{get('source') or '?'}：{get('claim') or get('warrant') or ''}", _LINE_CHARS)
+
+
+def update_history(state: Any) -> dict:
+    """將尚未處理的訊息原地併入 ``state['debate_history']`` 並回傳；訊息被重設時從頭重建
+
+    只有建立或重建時才寫回 state，其餘情況只處理新訊息（O(新回合)）。
+    """
+    messages = state.get("debate_messages") or []
+    history = state.get(HISTORY_STATE_KEY)
+    if not isinstance(history, dict) or history.get("turns", 0) > len(messages):
+        history = {"turns": 0, "lines": [], "claims": {}, "evidence": {}}
+        state[HISTORY_STATE_KEY] = history
+    for msg in messages[history["turns"] :]:
+        if not isinstance(msg, dict):
+            msg = {"content": str(msg)}
+        history["lines"].append(_summary_line(msg))
+        claim = msg.get("claim")
+        if claim:
+            entry = history["claims"].setdefault(
+                _normalize_claim(claim), {"claim": _clip(claim, _LINE_CHARS), "speakers": [], "count": 0}
+            )
+            entry["count"] += 1
+            speaker = msg.get("speaker")
+            if speaker and speaker not in entry["speakers"]:
+                entry["speakers"].append(speaker)
+        data = msg.get("data")
+        if isinstance(data, dict):
+            for ev in data.get("evidence") or []:
+                key = "|".join(evidence_key(ev))
+                history["evidence"].setdefault(key, _evidence_line(ev))
+    history["turns"] = len(messages)
+    return history
+
+
+def _render_turn(msg: Any) -> str:
+    if not isinstance(msg, dict):
+        return _clip(msg, _TURN_CHARS)
+    text = f"[{msg.get('speaker') or '?'}] {msg.get('content') or msg.get('claim') or ''}"
+    return text if len(text) <= _TURN_CHARS else text[: _TURN_CHARS - 1] + "…"
+
+
+def _fold(lines: list[str], budget: int) -> list[str]:
+    """合併最舊的摘要行直到不超過預算（滾動摘要）"""
+    lines = list(lines)
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > budget:
+        lines[0:2] = [_clip(f"{lines[0]}；{lines[1]}", _LINE_CHARS)]
+    if lines and estimate_tokens(lines[0]) > budget:
+        return []
+    return lines
+
+
+def _take(lines: list[str], budget: int) -> list[str]:
+    """依序取行直到用完預算"""
+    taken, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        taken.append(line)
+        used += cost
+    return taken
+
+
+def _claim_line(entry: dict) -> str:
+    speakers = ", ".join(entry["speakers"]) or "?"
+    times = f" ×{entry['count']}" if entry["count"] > 1 else ""
+    return f"- {entry['claim']}（{speakers}{times}）"
+
+
+def render_history(state: Any, budget: int, recent: int) -> str:
+    """產生不超過 ``budget`` token 的辯論紀錄檢視"""
+    history = update_history(state)
+    messages = state.get("debate_messages") or []
+    if not messages:
+        return "（尚無辯論紀錄）"
+    recent = max(0, min(recent, len(messages)))
+    turns = [_render_turn(m) for m in messages[len(messages) - recent :]]
+    earlier = history["lines"][: len(messages) - recent]
+    claims = [_claim_line(c) for c in history["claims"].values()]
+    evidence = [f"- {line}" for line in history["evidence"].values()]
+    # 預留各段標題的 token
+    budget = max(0, budget - _HEADER_TOKENS)
+
+    # 最近回合最優先；其餘預算依序分給主張、滾動摘要與證據
+    turns_budget = budget * 3 // 5 if earlier or claims or evidence else budget
+    while len(turns) > 1 and estimate_tokens("\n".join(turns)) > turns_budget:
+        earlier.append(_summary_line(messages[len(messages) - len(turns)]))
+        turns.pop(0)
+    if turns and estimate_tokens("\n".join(turns)) > turns_budget:
+        clipped = _clip_tokens(turns[0], turns_budget)
+        turns = [clipped] if clipped else []
+    remaining = budget - estimate_tokens("\n".join(turns))
+    claims = _take(claims, remaining // 3)
+    remaining -= estimate_tokens("\n".join(claims))
+    summary = _fold(earlier, remaining * 2 // 3)
+    remaining -= estimate_tokens("\n".join(summary))
+    evidence = _take(evidence, remaining)
+
+    sections = []
+    # 標題格式變更時需同步 _HEADERS
+    if summary:
+        sections.append(f"EARLIER TURNS (rolling summary, {len(messages) - len(turns)} turns):\n" + "\n".join(summary))
+    if turns:
+        sections.append(f"RECENT TURNS (last {len(turns)}):\n" + "\n".join(turns))
+    if claims:
+        sections.append("CLAIMS (deduplicated):\n" + "\n".join(claims))
+    if evidence:
+        sections.append("EVIDENCE (deduplicated):\n" + "\n".join(evidence))
+    return "\n\n".join(sections)
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+def view_settings(profile: str) -> tuple[int, int]:
+    """回傳檢視的 (token 預算, 保留原文的回合數)，依環境變數覆寫預設值"""
+    budget, recent = VIEW_PROFILES.get(profile, VIEW_PROFILES["moderator"])
+    suffix = profile.upper()
+    budget = _env_int(f"JUDGE_HISTORY_BUDGET_{suffix}") or _env_int("JUDGE_HISTORY_BUDGET") or budget
+    recent_override = _env_int(f"JUDGE_HISTORY_RECENT_{suffix}")
+    if recent_override is None:
+        recent_override = _env_int("JUDGE_HISTORY_RECENT")
+    return budget, recent if recent_override is None else recent_override
+
+
+def update_history_view(state: Any, profile: str, key: Optional[str] = None) -> str:
+    """將指定檢視寫入 ``state['temp:debate_view_<profile>']``（或 ``key``）並回傳；內容未變時不寫入"""
+    budget, recent = view_settings(profile)
+    view = render_history(state, budget, recent)
+    key = key or f"{VIEW_KEY_PREFIX}{profile}"
+    if state.get(key) != view:
+        state[key] = view
+    return view
+
+
+def history_view_callback(profile: str, key: Optional[str] = None):
+    """建立 before_agent_callback：執行代理前更新指定檢視，供 instruction 以
+    ``{temp:debate_view_<profile>?}``（或 ``key``）注入"""
+
+    def _callback(callback_context=None, **_):
+        if callback_context is None:
+            return None
+        update_history_view(callback_context.state, profile, key)
+        return None
+
+    return _callback
@@ -1,12 +1,21 @@
 from __future__ import annotations
-from typing import List, Optional
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Union
 import json
+import logging
 from pydantic import BaseModel, Field
 
 from google.adk.events.event import Event
+from google.adk.sessions.base_session_service import BaseSessionService
 from google.adk.sessions.session import Session
 
+from .compact import EvidenceRecord, TurnRecord
 from .evidence import Evidence
+from .evidence_store import EvidenceStore, evidence_key
+from .local_search import tokenize
+from .pretty import pretty_message
+
+logger = logging.getLogger(__name__)
 
 
 class Turn(BaseModel):
@@ -19,9 +28,17 @@ class Turn(BaseModel):
 
 
 def recalculate_metrics(turns: List[Turn]) -> dict:
+    """完整重算辯論指標（O(n)）；保留作為累加器結果的驗證路徑。"""
     claims = {t.claim for t in turns if t.claim}
     confidences = [t.confidence for t in turns if t.confidence is not None]
-    evidences = [ev for t in turns for ev in t.evidence]
+    evidences = []
+    seen = set()
+    for t in turns:
+        for ev in t.evidence:
+            key = evidence_key(ev)
+            if key not in seen:
+                seen.add(key)
+                evidences.append(ev)
     return {
         "dispute_points": len(claims),
         "credibility": sum(confidences) / len(confidences) if confidences else 0.0,
@@ -29,10 +46,232 @@ def recalculate_metrics(turns: List[Turn]) -> dict:
     }
 
 
-def append_turn(state: dict, turn: Turn) -> None:
-    turns: List[Turn] = state.setdefault("debate_log", [])
+class DebateMetrics:
+    """辯論指標累加器：每加入一回合以 O(1) 更新 dispute_points / credibility / evidence。
+
+    證據存於 ``EvidenceStore``（以正規化網址與主張去重）；寫入 state 的
+    ``state['evidence']`` 是另一份只增不減的列表，每回合只追加新證據，外部修改
+    不會影響累加器本身。``first_seen`` 記錄每個詞彙首次出現的回合序號，供
+    ``novelty`` 只切詞新回合即可計算詞彙新穎度。
+    """
+
+    __slots__ = (
+        "claims",
+        "confidence_sum",
+        "confidence_count",
+        "evidence_store",
+        "turn_count",
+        "published",
+        "first_seen",
+    )
+
+    def __init__(self) -> None:
+        self.claims: set = set()
+        self.confidence_sum = 0.0
+        self.confidence_count = 0
+        self.evidence_store = EvidenceStore()
+        self.turn_count = 0
+        # 最近一次寫入 state['evidence'] 的列表
+        self.published: Optional[list] = None
+        self.first_seen: dict[str, int] = {}
+
+    @property
+    def evidence(self) -> List[EvidenceRecord]:
+        return self.evidence_store.records
+
+    @property
+    def credibility(self) -> float:
+        return self.confidence_sum / self.confidence_count if self.confidence_count else 0.0
+
+    @classmethod
+    def from_turns(cls, turns: list) -> "DebateMetrics":
+        acc = cls()
+        for turn in turns:
+            acc.add(turn)
+        return acc
+
+    def add(self, turn: Union[Turn, TurnRecord]) -> List[EvidenceRecord]:
+        """加入一回合，回傳其中首次出現的證據"""
+        if turn.claim:
+            self.claims.add(turn.claim)
+        if turn.confidence is not None:
+            self.confidence_sum += turn.confidence
+            self.confidence_count += 1
+        before = len(self.evidence_store)
+        # 只有彙總的證據去重；回合保留自己引用的證據（同一來源與主張，各方的 warrant 可能相反）
+        self.evidence_store.extend(turn.evidence)
+        for term in _turn_terms(turn):
+            self.first_seen.setdefault(term, self.turn_count)
+        self.turn_count += 1
+        return self.evidence[before:]
+
+    def novelty(self, turns: list, since: int) -> float:
+        """``turns[since:]`` 中未曾出現在先前回合的詞彙比例（0~1）；只切詞新回合"""
+        new_terms: set = set()
+        for turn in turns[since:]:
+            new_terms.update(_turn_terms(turn))
+        if not new_terms:
+            return 0.0
+        return sum(self.first_seen.get(t, since) >= since for t in new_terms) / len(new_terms)
+
+    def as_state(self) -> dict:
+        return {
+            "dispute_points": len(self.claims),
+            "credibility": self.credibility,
+            "evidence": list(self.evidence),
+        }
+
+    def publish(self, state: dict, new_evidence: List[EvidenceRecord]) -> None:
+        """將指標寫入 state；``state['evidence']`` 未被外部替換或修改時只追加新證據"""
+        state["dispute_points"] = len(self.claims)
+        state["credibility"] = self.credibility
+        evidence = state.get("evidence")
+        if evidence is not None and evidence is self.published and len(evidence) + len(new_evidence) == len(self.evidence):
+            evidence.extend(new_evidence)
+        else:
+            self.published = list(self.evidence)
+            state["evidence"] = self.published
+
+
+def _turn_terms(turn: Union[Turn, TurnRecord]) -> list:
+    return tokenize(f"{turn.claim or ''}\n{turn.content or ''}")
+
+
+class DebateLog(list):
+    """``state['debate_log']`` 的列表型別，附帶與內容同步的 ``DebateMetrics``
+
+    累加器掛在列表上而非另存為 state 鍵，序列化（匯出、SQLite）時與一般列表相同。
+    """
+
+    def __init__(self, turns: Iterable = ()) -> None:
+        super().__init__(turns)
+        self.metrics = DebateMetrics.from_turns(self)
+
+
+def _debate_log(state: dict) -> DebateLog:
+    """取得與內容同步的 debate_log；若 state 曾被重設或直接修改則以完整回合重建。"""
+    turns = state.get("debate_log")
+    if not isinstance(turns, DebateLog):
+        turns = DebateLog(turns or [])
+        state["debate_log"] = turns
+    elif turns.metrics.turn_count != len(turns):
+        turns.metrics = DebateMetrics.from_turns(turns)
+    return turns
+
+
+def append_turn(state: dict, turn: Union[Turn, TurnRecord]) -> None:
+    turns = _debate_log(state)
     turns.append(turn)
-    state.update(recalculate_metrics(turns))
+    new_evidence = turns.metrics.add(turn)
+    turns.metrics.publish(state, new_evidence)
+
+
+def sync_debate_log(state: dict) -> DebateLog:
+    """讓 debate_log 追上 debate_messages：只轉換尚未處理的新訊息（O(新回合)）
+
+    debate_log 比 debate_messages 長時代表訊息已被重設，改以完整訊息重建。
+    """
+    messages = state.get("debate_messages") or []
+    turns = _debate_log(state)
+    if len(turns) > len(messages):
+        turns = state["debate_log"] = DebateLog()
+    for msg in messages[len(turns):]:
+        if isinstance(msg, dict):
+            append_turn(state, _turn_from_message(msg, "", {}))
+        else:
+            append_turn(state, TurnRecord(speaker="", content=str(msg)))
+    return turns
+
+
+# 傳輸用的鍵以 temp: 開頭：只存在事件的 state_delta，SessionService 不會寫入 state
+MESSAGES_DELTA_KEY = "temp:debate_messages_delta"
+MESSAGES_SEQ_KEY = "temp:debate_messages_seq"
+_MESSAGE_KEYS = ("debate_messages", MESSAGES_DELTA_KEY, MESSAGES_SEQ_KEY)
+
+
+def debate_messages_delta(messages: list, seq: int) -> dict:
+    """建立只含新增訊息的 state_delta 片段；seq 為第一則新訊息在完整紀錄中的序號。"""
+    return {MESSAGES_DELTA_KEY: list(messages), MESSAGES_SEQ_KEY: seq}
+
+
+def _messages_after(state_delta: dict, seen: int, history: Optional[list] = None) -> Optional[list]:
+    """回傳事件中序號 >= seen 的訊息；同時支援增量格式與舊版完整列表格式。
+
+    增量事件的序號大於 ``seen``（中間漏收事件）或缺少序號時無法判斷訊息位置，
+    改由 ``history``（完整的 ``state['debate_messages']``）補齊；無法補齊時回傳 None。
+    """
+    delta = state_delta.get(MESSAGES_DELTA_KEY)
+    if isinstance(delta, list):
+        seq = state_delta.get(MESSAGES_SEQ_KEY)
+        if isinstance(seq, int) and seq <= seen:
+            return delta[seen - seq:]
+        if isinstance(history, list):
+            if not isinstance(seq, int):
+                return history[seen:]
+            if len(history) >= seq:
+                return history[seen:seq] + delta
+        logger.warning(f"debate_messages 增量序號不連續（seq={seq}，已處理 {seen} 則），且無法由完整紀錄補齊")
+        return None
+    msgs = state_delta.get("debate_messages")
+    if isinstance(msgs, list):
+        return msgs[seen:]
+    return None
+
+
+def _turn_from_message(msg: dict, author: Optional[str], state_delta: dict) -> TurnRecord:
+    speaker = msg.get("speaker") or author
+    content = msg.get("content")
+    if isinstance(content, (dict, list)):
+        content = json.dumps(content, ensure_ascii=False)
+    # 訊息自帶的 data 即該回合的輸出；補齊的舊訊息不可使用本事件的 payload
+    payload = msg.get("data")
+    if not isinstance(payload, dict):
+        payload = next((v for k, v in state_delta.items() if k not in _MESSAGE_KEYS), {})
+    confidence = payload.get("confidence") if isinstance(payload, dict) else None
+    evidence = payload.get("evidence", []) if isinstance(payload, dict) else []
+    # 事件資料已由各代理的 output_schema 驗證，內部以輕量 TurnRecord 保存
+    return TurnRecord(
+        speaker=speaker,
+        content=content or "",
+        claim=msg.get("claim"),
+        confidence=confidence,
+        evidence=evidence or (),
+        fallacies=msg.get("fallacies", []),
+    )
+
+
+def apply_messages_delta(state: dict, state_delta: dict) -> None:
+    """將事件中的新增訊息補進 ``state['debate_messages']``；可重複套用同一事件"""
+    delta = state_delta.get(MESSAGES_DELTA_KEY)
+    if isinstance(delta, list):
+        # 增量事件不會覆寫 state['debate_messages']，由此補上尚未存在的新訊息；
+        # 序號缺漏或超前時位置不明，不猜測插入位置
+        messages = state.get("debate_messages")
+        if not isinstance(messages, list):
+            messages = state["debate_messages"] = []
+        seq = state_delta.get(MESSAGES_SEQ_KEY)
+        if isinstance(seq, int) and seq <= len(messages):
+            messages.extend(delta[len(messages) - seq:])
+    elif isinstance(state_delta.get("debate_messages"), list):
+        # 舊版完整列表事件：複製一份，避免之後的增量寫回事件本身的列表
+        state["debate_messages"] = list(state_delta["debate_messages"])
+
+
+class DebateMessagesMixin(BaseSessionService):
+    """讓 SessionService 保存的 state 也套用辯論訊息增量
+
+    ADK 只把 ``state_delta`` 的鍵寫入 Session，增量事件不攜帶完整的
+    ``debate_messages``；混入此類別後，每次 ``append_event`` 都會把新訊息補進
+    該 Session 的 ``debate_messages``（``InMemorySessionService`` 對內部保存的
+    Session 也會再經過此處），重新讀取或匯出的 Session 因此保有完整辯論。
+    須放在基底 SessionService 之後：``class S(InMemorySessionService, DebateMessagesMixin)``。
+    """
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        if not event.partial and event.actions and event.actions.state_delta:
+            apply_messages_delta(session.state, event.actions.state_delta)
+        return event
 
 
 def append_event_update(state: dict, event: Event) -> None:
@@ -40,28 +279,13 @@ def append_event_update(state: dict, event: Event) -> None:
     if not actions or not getattr(actions, "state_delta", None):
         return
     state_delta = actions.state_delta
-    msgs = state_delta.get("debate_messages")
-    if not isinstance(msgs, list):
+    apply_messages_delta(state, state_delta)
+    turns: list = state.setdefault("debate_log", [])
+    msgs = _messages_after(state_delta, len(turns), state.get("debate_messages"))
+    if msgs is None:
         return
-    turns: List[Turn] = state.setdefault("debate_log", [])
-    seen = len(turns)
-    payload = next((v for k, v in state_delta.items() if k != "debate_messages"), {})
-    for msg in msgs[seen:]:
-        speaker = msg.get("speaker") or event.author
-        content = msg.get("content")
-        if isinstance(content, (dict, list)):
-            content = json.dumps(content, ensure_ascii=False)
-        confidence = payload.get("confidence") if isinstance(payload, dict) else None
-        evidence = payload.get("evidence", []) if isinstance(payload, dict) else []
-        turn = Turn(
-            speaker=speaker,
-            content=content or "",
-            claim=msg.get("claim"),
-            confidence=confidence,
-            evidence=evidence,
-            fallacies=msg.get("fallacies", []),
-        )
-        append_turn(state, turn)
+    for msg in msgs:
+        append_turn(state, _turn_from_message(msg, event.author, state_delta))
 
 
 def initialize_debate_state(state: dict, reset: bool = True) -> None:
@@ -76,49 +300,101 @@ def initialize_debate_state(state: dict, reset: bool = True) -> None:
         state["prev_evidence_count"] = 0
 
 
-def _turns_from_session(session: Session) -> List[Turn]:
-    turns: List[Turn] = []
-    seen = 0
-    for ev in session.events:
+class _TurnCache:
+    """單一 Session 的回合快取：記錄已處理的事件位置，只解析之後新增的事件。"""
+
+    __slots__ = ("event_count", "last_event_id", "turns", "models", "dumped")
+
+    def __init__(self) -> None:
+        self.event_count = 0
+        self.last_event_id: Optional[str] = None
+        self.turns: List[TurnRecord] = []
+        # 依需要逐步轉換的 Turn 模型與 JSON 字串
+        self.models: List[Turn] = []
+        self.dumped: List[str] = []
+
+    def matches(self, events: list) -> bool:
+        if self.event_count > len(events):
+            return False
+        if self.event_count == 0:
+            return True
+        return getattr(events[self.event_count - 1], "id", None) == self.last_event_id
+
+
+# 以 LRU 限制快取的 Session 數量，長時間執行時記憶體不會無限成長
+_TURN_CACHE_MAX = 128
+_turn_cache: OrderedDict[tuple[str, str, str], _TurnCache] = OrderedDict()
+
+
+def clear_turn_cache(
+    app_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+) -> None:
+    """清除指定 Session 的回合快取；未指定 session_id 時清除全部。"""
+    if session_id is None:
+        _turn_cache.clear()
+    else:
+        _turn_cache.pop((app_name, user_id, session_id), None)
+
+
+def _cached_turns(session: Session) -> _TurnCache:
+    events = session.events
+    key = (session.app_name, session.user_id, session.id)
+    cache = _turn_cache.get(key)
+    if cache is None or not cache.matches(events):
+        # 事件序列與快取不一致（如不同的 Session 或截斷的事件）時從頭重建
+        cache = _TurnCache()
+        _turn_cache[key] = cache
+        while len(_turn_cache) > _TURN_CACHE_MAX:
+            _turn_cache.popitem(last=False)
+    else:
+        _turn_cache.move_to_end(key)
+    for ev in events[cache.event_count:]:
         actions = getattr(ev, "actions", None)
         if not actions or not getattr(actions, "state_delta", None):
             continue
         state_delta = actions.state_delta
-        msgs = state_delta.get("debate_messages")
-        if not isinstance(msgs, list):
+        msgs = _messages_after(state_delta, len(cache.turns), session.state.get("debate_messages"))
+        if msgs is None:
             continue
-        while seen < len(msgs):
-            msg = msgs[seen]
-            speaker = msg.get("speaker") or ev.author
-            content = msg.get("content")
-            if isinstance(content, (dict, list)):
-                content = json.dumps(content, ensure_ascii=False)
-            payload = next((v for k, v in state_delta.items() if k != "debate_messages"), {})
-            confidence = payload.get("confidence") if isinstance(payload, dict) else None
-            evidence = payload.get("evidence", []) if isinstance(payload, dict) else []
-            turn = Turn(
-                speaker=speaker,
-                content=content or "",
-                claim=msg.get("claim"),
-                confidence=confidence,
-                evidence=evidence,
-                fallacies=msg.get("fallacies", []),
-            )
-            turns.append(turn)
-            seen += 1
-    return turns
+        for msg in msgs:
+            cache.turns.append(_turn_from_message(msg, ev.author, state_delta))
+    if events:
+        cache.event_count = len(events)
+        cache.last_event_id = getattr(events[-1], "id", None)
+    return cache
+
+
+def _turns_from_session(session: Session) -> List[Turn]:
+    """回傳快取中的 Turn 模型列表（只轉換新增的回合；呼叫端不應修改）"""
+    cache = _cached_turns(session)
+    cache.models.extend(record.to_model() for record in cache.turns[len(cache.models):])
+    return cache.models
 
 
 def update_state_from_session(state: dict, session: Session) -> None:
-    turns = _turns_from_session(session)
-    state["debate_log"] = turns
-    state.update(recalculate_metrics(turns))
+    """以 Session 事件更新 state 的 debate_log 與指標；只追加上次之後新增的回合"""
+    cache = _cached_turns(session)
+    turns = state.get("debate_log")
+    if not (
+        isinstance(turns, DebateLog)
+        and len(turns) <= len(cache.turns)
+        and (not turns or turns[-1] is cache.turns[len(turns) - 1])
+    ):
+        # state 中的紀錄不是此快取的前綴（首次同步或已被替換），從頭建立
+        state["debate_log"] = DebateLog()
+    for turn in cache.turns[len(state["debate_log"]):]:
+        append_turn(state, turn)
+    if not cache.turns:
+        state["debate_log"].metrics.publish(state, [])
 
 
 def export_debate_log(session: Session) -> str:
-    turns = _turns_from_session(session)
-    data = [t.model_dump() for t in turns]
-    return json.dumps(data, ensure_ascii=False)
+    cache = _cached_turns(session)
+    for turn in cache.turns[len(cache.dumped):]:
+        cache.dumped.append(json.dumps(turn.to_dict(), ensure_ascii=False))
+    return "[" + ", ".join(cache.dumped) + "]"
 
 
 def export_session(session: Session) -> dict:
@@ -130,7 +406,14 @@ def export_session(session: Session) -> dict:
             state_scoped["user"][key[5:]] = value
         else:
             state_scoped["shared"][key] = value
-    events = [ev.model_dump() for ev in session.events]
+    events = []
+    for ev in session.events:
+        data = ev.model_dump()
+        # 標記的結構化輸出（Jury、Synthesizer）於匯出時才產生 pretty JSON
+        pretty = pretty_message(ev)
+        if pretty is not None:
+            data["pretty"] = pretty
+        events.append(data)
     return {
         "session": {
             "id": session.id,
@@ -0,0 +1,168 @@
+"""合併式非同步事件寫入器：將短時間內的事件排隊、合併後批次寫入 SessionService。"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.session import Session
+
+from .debate_log import MESSAGES_DELTA_KEY, append_event_update
+
+logger = logging.getLogger(__name__)
+
+
+def _mergeable(prev: Event, event: Event) -> bool:
+    """僅合併同一作者、同一次呼叫、且只含 state_delta 的相鄰事件"""
+    if prev.author != event.author or prev.invocation_id != event.invocation_id:
+        return False
+    for ev in (prev, event):
+        if ev.content is not None or ev.partial:
+            return False
+        actions = ev.actions
+        if (
+            actions.escalate
+            or actions.transfer_to_agent
+            or actions.artifact_delta
+            or actions.skip_summarization
+            or actions.requested_auth_configs
+            or actions.requested_tool_confirmations
+        ):
+            return False
+    # 帶有辯論訊息的事件是回合邊界：合併會讓前一回合改用後一回合的 payload，故不合併
+    for ev in (prev, event):
+        if MESSAGES_DELTA_KEY in ev.actions.state_delta or "debate_messages" in ev.actions.state_delta:
+            return False
+    return True
+
+
+def _merge(prev: Event, event: Event) -> Event:
+    return Event(
+        author=event.author,
+        invocation_id=event.invocation_id,
+        branch=event.branch,
+        timestamp=event.timestamp,
+        actions=EventActions(state_delta={**prev.actions.state_delta, **event.actions.state_delta}),
+    )
+
+
+class EventBatcher:
+    """單一 Session 的合併式事件寫入器
+
+    ``submit`` 會立即將事件套用到 ``session.state``（含辯論紀錄），因此下一個代理
+    與 ``judge.tools`` 的匯出函式都能讀到剛寫入的內容；寫入 SessionService 則延後
+    ``window`` 秒，期間同一作者的相鄰 state_delta 會合併為單一事件。寫入失敗的事件
+    會放回佇列前端，由下一次 ``flush`` 重試；``close`` 會寫完佇列並解除註冊，
+    之後送入的事件直接寫入。
+
+    Args:
+        session:   要寫入的 Session
+        append_fn: 實際寫入函式（通常為 ``judge.tools.append_event`` 綁定 session 與 service）
+        window:    合併視窗秒數
+        max_batch: 佇列達到此數量時立即寫入
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        append_fn: Callable[[Event], Awaitable[Event]],
+        window: float = 0.05,
+        max_batch: int = 32,
+    ) -> None:
+        self.session = session
+        self.append_fn = append_fn
+        self.window = window
+        self.max_batch = max_batch
+        self.submitted = 0
+        self.written = 0
+        self._pending: list[Event] = []
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self.failures = 0
+        self.closed = False
+
+    async def submit(self, event: Event) -> Event:
+        """排入事件並立即更新本地 state；回傳（可能已合併的）事件"""
+        self.submitted += 1
+        if self.closed:
+            await self.append_fn(event)
+            self.written += 1
+            return event
+        if not event.partial and event.actions and event.actions.state_delta:
+            for key, value in event.actions.state_delta.items():
+                if not key.startswith("temp:"):
+                    self.session.state[key] = value
+            append_event_update(self.session.state, event)
+        if self._pending and _mergeable(self._pending[-1], event):
+            event = self._pending[-1] = _merge(self._pending[-1], event)
+        else:
+            self._pending.append(event)
+        if len(self._pending) >= self.max_batch:
+            await self.flush()
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+        return event
+
+    __call__ = submit
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        try:
+            await self.flush()
+        except Exception as e:
+            # 事件已放回佇列，留待下一次 submit / flush / close 重試
+            logger.error(f"事件批次寫入失敗（{len(self._pending)} 筆待重試）: {e}")
+
+    async def flush(self) -> None:
+        """依序寫入所有排隊中的事件；寫入失敗時未寫入的事件放回佇列並拋出例外"""
+        async with self._lock:
+            while self._pending:
+                batch, self._pending = self._pending, []
+                for i, event in enumerate(batch):
+                    try:
+                        await self.append_fn(event)
+                    except BaseException:
+                        self.failures += 1
+                        self._pending[:0] = batch[i:]
+                        raise
+                    self.written += 1
+
+    async def close(self) -> None:
+        """寫完佇列並自 ``_batchers`` 解除註冊"""
+        self.closed = True
+        timer, self._timer = self._timer, None
+        if timer is not None and not timer.done() and timer is not asyncio.current_task():
+            timer.cancel()
+        await self.flush()
+        if _batchers.get(self.session.id) is self:
+            del _batchers[self.session.id]
+
+
+_batchers: dict[str, EventBatcher] = {}
+
+
+def open_batcher(session: Session, append_fn, **kwargs) -> EventBatcher:
+    batcher = EventBatcher(session, append_fn, **kwargs)
+    _batchers[session.id] = batcher
+    return batcher
+
+
+def get_batcher(session_id: str) -> Optional[EventBatcher]:
+    return _batchers.get(session_id)
+
+
+async def flush_events(session: Session) -> None:
+    """若此 Session 有合併寫入器，等待其佇列寫完（讀取 SessionService 前呼叫）"""
+    batcher = _batchers.get(session.id)
+    if batcher is not None:
+        await batcher.flush()
+
+
+async def close_batcher(session: Session) -> None:
+    """寫完此 Session 的佇列並移除其合併寫入器（辯論結束時呼叫）"""
+    batcher = _batchers.get(session.id)
+    if batcher is not None:
+        await batcher.close()
@@ -0,0 +1,297 @@
+"""具淘汰策略的記憶體 SessionService：LRU 上限、閒置 TTL 與淘汰前歸檔。
+
+長時間執行的 worker 中，``InMemorySessionService`` 會無限保留已完成的辯論；
+此服務在每次操作時依設定淘汰「已完成」的 Session，使常駐記憶體維持平穩，而代理端
+不需任何修改。仍在進行中的 Session 不會因上限或 TTL 被淘汰（淘汰後 ADK 會默默丟棄
+其後續事件），除非閒置超過 ``abandon_ttl`` 而視為已放棄。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Optional
+
+from google.adk.events.event import Event
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+from google.adk.sessions.session import Session
+
+from .debate_log import DebateMessagesMixin, clear_turn_cache, export_session
+from .file_io import to_jsonable, write_json_file
+
+logger = logging.getLogger(__name__)
+
+_Key = tuple[str, str, str]
+
+
+class _Entry:
+    __slots__ = ("last_access", "size", "finished", "finished_invocation")
+
+    def __init__(self) -> None:
+        self.last_access = 0.0
+        self.size = 0
+        self.finished = False
+        # 標記完成的呼叫；同一呼叫的後續事件不會使 Session 恢復為進行中
+        self.finished_invocation: Optional[str] = None
+
+
+class EvictingSessionService(InMemorySessionService, DebateMessagesMixin):
+    """在 ``InMemorySessionService`` 之上加入淘汰策略
+
+    只有以 ``mark_finished`` 標記（``root_agent`` 每次呼叫結束時經 ``finish_session_callback``
+    標記，``judge.tools.export_latest_session`` 亦會標記）的 Session 會依 LRU 上限與閒置 TTL 淘汰；標記後再寫入事件即恢復為進行中。
+    歸檔在非同步方法中交由背景執行緒進行，不阻塞事件迴圈。
+
+    Args:
+        max_sessions: 常駐 Session 數量上限（None 表示不限）
+        max_bytes:    常駐大小上限（以事件與初始 state 的 JSON 長度估算）
+        idle_ttl:     已完成的 Session 閒置超過此秒數即淘汰（None 表示不限）
+        abandon_ttl:  未標記完成的 Session 閒置超過此秒數視為已放棄並淘汰（None 表示不淘汰）
+        archive:      淘汰前呼叫的歸檔函式，接收即將移除的 Session
+        archive_dir:  未提供 archive 時，將 ``export_session`` 結果寫入此目錄
+    """
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        idle_ttl: Optional[float] = None,
+        abandon_ttl: Optional[float] = None,
+        archive: Optional[Callable[[Session], None]] = None,
+        archive_dir: Optional[str] = None,
+    ) -> None:
+        super().__init__()
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.abandon_ttl = abandon_ttl
+        if archive is None and archive_dir:
+            archive = _archive_to_dir(archive_dir)
+        self.archive = archive
+        # LRU：最久未使用的 Session 在最前面
+        self._lru: OrderedDict[_Key, _Entry] = OrderedDict()
+        # 已移出、等待歸檔的 Session
+        self._to_archive: deque[Session] = deque()
+        self.resident_bytes = 0
+        self.evictions = 0
+        self.ttl_evictions = 0
+        self.abandoned = 0
+        self.archived = 0
+
+    def stats(self) -> dict[str, int]:
+        """淘汰與常駐大小的計數器"""
+        return {
+            "resident_sessions": len(self._lru),
+            "active_sessions": sum(not e.finished for e in self._lru.values()),
+            "resident_bytes": self.resident_bytes,
+            "evictions": self.evictions,
+            "ttl_evictions": self.ttl_evictions,
+            "abandoned": self.abandoned,
+            "archived": self.archived,
+        }
+
+    def mark_finished(
+        self, *, app_name: str, user_id: str, session_id: str, invocation_id: Optional[str] = None
+    ) -> None:
+        """標記 Session 已完成，之後才會依上限與 TTL 淘汰
+
+        Args:
+            invocation_id: 結束的呼叫；提供時，該呼叫之後寫入的事件不會使 Session 恢復為進行中
+        """
+        entry = self._lru.get((app_name, user_id, session_id))
+        if entry is not None:
+            entry.finished = True
+            entry.finished_invocation = invocation_id
+
+    # ---- InMemorySessionService hooks ----
+    def _create_session_impl(self, *, app_name, user_id, state=None, session_id=None) -> Session:
+        self._expire()
+        session = super()._create_session_impl(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        key = (app_name, user_id, session.id)
+        size = len(json.dumps(state or {}, ensure_ascii=False, default=to_jsonable))
+        self._touch(key, size)
+        self._enforce(keep=key)
+        return session
+
+    def _get_session_impl(self, *, app_name, user_id, session_id, config=None) -> Optional[Session]:
+        self._expire()
+        session = super()._get_session_impl(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        if session is not None:
+            self._touch((app_name, user_id, session_id))
+        return session
+
+    def _delete_session_impl(self, *, app_name, user_id, session_id) -> None:
+        super()._delete_session_impl(app_name=app_name, user_id=user_id, session_id=session_id)
+        self._forget((app_name, user_id, session_id))
+
+    def create_session_sync(self, **kwargs) -> Session:
+        session = super().create_session_sync(**kwargs)
+        self._archive_pending()
+        return session
+
+    def get_session_sync(self, **kwargs) -> Optional[Session]:
+        session = super().get_session_sync(**kwargs)
+        self._archive_pending()
+        return session
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session = await super().create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        await self._drain_archive()
+        return session
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        session = await super().get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        await self._drain_archive()
+        return session
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        result = await super().append_event(session=session, event=event)
+        key = (session.app_name, session.user_id, session.id)
+        if key in self._lru and not event.partial:
+            size = len(event.model_dump_json(exclude_none=True, fallback=to_jsonable))
+            self._touch(key, size)
+            # 已完成的 Session 又有新的呼叫寫入事件：恢復為進行中
+            entry = self._lru[key]
+            if entry.finished_invocation is None or event.invocation_id != entry.finished_invocation:
+                entry.finished = False
+            self._expire()
+            self._enforce(keep=key)
+            await self._drain_archive()
+        return result
+
+    # ---- eviction ----
+    def _touch(self, key: _Key, size: int = 0) -> None:
+        entry = self._lru.get(key)
+        if entry is None:
+            entry = self._lru[key] = _Entry()
+        entry.last_access = time.monotonic()
+        entry.size += size
+        self.resident_bytes += size
+        self._lru.move_to_end(key)
+
+    def _expire(self) -> None:
+        if self.idle_ttl is None and self.abandon_ttl is None:
+            return
+        now = time.monotonic()
+        for key, entry in list(self._lru.items()):
+            idle = now - entry.last_access
+            if entry.finished and self.idle_ttl is not None and idle >= self.idle_ttl:
+                self._evict(key)
+                self.ttl_evictions += 1
+            elif not entry.finished and self.abandon_ttl is not None and idle >= self.abandon_ttl:
+                logger.warning(f"Session {key[2]} 閒置 {idle:.0f} 秒仍未完成，視為已放棄並淘汰")
+                self._evict(key)
+                self.abandoned += 1
+            elif idle < min(t for t in (self.idle_ttl, self.abandon_ttl) if t is not None):
+                # LRU 依存取時間排序，之後的 Session 都更新
+                break
+
+    def _over_limit(self) -> bool:
+        return (self.max_sessions is not None and len(self._lru) > self.max_sessions) or (
+            self.max_bytes is not None and self.resident_bytes > self.max_bytes
+        )
+
+    def _enforce(self, keep: _Key) -> None:
+        if not self._over_limit():
+            return
+        for key in [k for k, e in self._lru.items() if e.finished and k != keep]:
+            self._evict(key)
+            if not self._over_limit():
+                return
+        logger.warning("常駐 Session 超過上限，但其餘 Session 皆未完成，暫不淘汰")
+
+    def _evict(self, key: _Key) -> None:
+        app_name, user_id, session_id = key
+        session = self.sessions.get(app_name, {}).get(user_id, {}).pop(session_id, None)
+        if session is not None and self.archive is not None:
+            self._to_archive.append(session)
+        self._forget(key)
+        self.evictions += 1
+
+    def _archive_pending(self) -> None:
+        while self._to_archive:
+            session = self._to_archive.popleft()
+            try:
+                self.archive(session)
+                self.archived += 1
+            except Exception as e:
+                logger.error(f"Session 歸檔失敗 {session.id}: {e}")
+
+    async def _drain_archive(self) -> None:
+        if self._to_archive:
+            await asyncio.to_thread(self._archive_pending)
+
+    def _forget(self, key: _Key) -> None:
+        entry = self._lru.pop(key, None)
+        if entry is not None:
+            self.resident_bytes -= entry.size
+        clear_turn_cache(*key)
+
+
+def finish_session_callback(callback_context=None, **_):
+    """root_agent 的 after_agent_callback：一次呼叫結束即標記 Session 已完成
+
+    之後 ``EvictingSessionService`` 才會依上限與 TTL 淘汰它；下一次呼叫寫入事件時
+    會自動恢復為進行中。其他 SessionService 不受影響。
+    """
+    if callback_context is None:
+        return None
+    ctx = callback_context._invocation_context
+    if isinstance(ctx.session_service, EvictingSessionService):
+        ctx.session_service.mark_finished(
+            app_name=ctx.app_name,
+            user_id=ctx.user_id,
+            session_id=ctx.session.id,
+            invocation_id=ctx.invocation_id,
+        )
+    return None
+
+
+def _archive_to_dir(directory: str) -> Callable[[Session], None]:
+    def _archive(session: Session) -> None:
+        write_json_file(os.path.join(directory, f"{session.id}.json"), export_session(session))
+
+    return _archive
+
+
+def _env_number(name: str, cast: Callable[[str], Any]) -> Any:
+    value = os.getenv(name)
+    return cast(value) if value else None
+
+
+def eviction_settings_from_env() -> dict[str, Any]:
+    """讀取淘汰設定：JUDGE_SESSION_MAX_SESSIONS / _MAX_BYTES / _TTL / _ABANDON_TTL / _ARCHIVE_DIR"""
+    return {
+        "max_sessions": _env_number("JUDGE_SESSION_MAX_SESSIONS", int),
+        "max_bytes": _env_number("JUDGE_SESSION_MAX_BYTES", int),
+        "idle_ttl": _env_number("JUDGE_SESSION_TTL", float),
+        "abandon_ttl": _env_number("JUDGE_SESSION_ABANDON_TTL", float),
+        "archive_dir": os.getenv("JUDGE_SESSION_ARCHIVE_DIR") or None,
+    }
@@ -0,0 +1,112 @@
+"""證據去重：以正規化網址與主張雜湊為鍵，彙整單一 Session 的證據（各回合自己的證據不受影響）。"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Any, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .compact import EvidenceRecord
+
+_TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid", "ref_src"}
+_WHITESPACE = re.compile(r"\s+")
+
+EVIDENCE_SOURCE_KEYS = ("advocacy", "skepticism", "devil_turn")
+
+
+def canonicalize_url(url: Optional[str]) -> str:
+    """正規化網址：小寫 scheme/host、去除 www.、片段、追蹤參數與結尾斜線，並排序查詢參數。
+
+    只移除廣告與點擊追蹤參數（utm_*、fbclid 等）；scheme 與其他查詢參數（如 ``ref``）
+    保持原樣，避免把不同來源誤併為同一筆。非網址的來源（如文獻名稱）僅去除前後空白並合併空白。
+    """
+    if not url:
+        return ""
+    url = url.strip()
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        return _WHITESPACE.sub(" ", url)
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or ""
+    return urlunsplit((parts.scheme.lower(), host, path, urlencode(query), ""))
+
+
+def evidence_key(evidence: Any) -> tuple[str, str]:
+    """證據的去重鍵：(正規化網址, 主張雜湊)"""
+    if isinstance(evidence, dict):
+        source, claim = evidence.get("source"), evidence.get("claim")
+    else:
+        source, claim = getattr(evidence, "source", None), getattr(evidence, "claim", None)
+    normalized = _WHITESPACE.sub(" ", claim or "").strip().lower()
+    digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).hexdigest()
+    return canonicalize_url(source), digest
+
+
+class EvidenceStore:
+    """單一 Session 的彙整證據庫；相同鍵的證據只保留第一筆"""
+
+    __slots__ = ("_by_key", "records")
+
+    def __init__(self) -> None:
+        self._by_key: dict[tuple[str, str], EvidenceRecord] = {}
+        # 只增不減，依首次出現順序排列
+        self.records: list[EvidenceRecord] = []
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, evidence: Any) -> bool:
+        return evidence_key(evidence) in self._by_key
+
+    def add(self, evidence: Any) -> EvidenceRecord:
+        key = evidence_key(evidence)
+        record = self._by_key.get(key)
+        if record is None:
+            record = EvidenceRecord.from_data(evidence)
+            self._by_key[key] = record
+            self.records.append(record)
+        return record
+
+    def extend(self, evidences: Iterable[Any]) -> None:
+        for ev in evidences:
+            self.add(ev)
+
+    def copy(self) -> "EvidenceStore":
+        store = EvidenceStore()
+        store._by_key = dict(self._by_key)
+        store.records = list(self.records)
+        return store
+
+    def to_list(self) -> list[dict]:
+        return [r.to_dict() for r in self.records]
+
+
+def _is_evidence(item: Any) -> bool:
+    return isinstance(item, dict) or hasattr(item, "source")
+
+
+def _payload_evidence(payload: Any) -> list:
+    if hasattr(payload, "model_dump"):
+        payload = payload.model_dump()
+    if isinstance(payload, dict) and isinstance(payload.get("evidence"), list):
+        return [ev for ev in payload["evidence"] if _is_evidence(ev)]
+    return []
+
+
+def collect_evidence_digest(state: Any) -> list[dict]:
+    """彙整 state 中各方輸出與辯論累積的證據，去重後回傳（供 Jury / Synthesizer 提示使用）"""
+    store = EvidenceStore()
+    for key in EVIDENCE_SOURCE_KEYS:
+        store.extend(_payload_evidence(state.get(key)))
+    evidence = state.get("evidence")
+    if isinstance(evidence, list):
+        store.extend(ev for ev in evidence if _is_evidence(ev))
+    return store.to_list()
@@ -9,9 +9,18 @@ def ensure_parent_dir(path: str) -> None:
     p.parent.mkdir(parents=True, exist_ok=True)
 
 
+def to_jsonable(obj: Any) -> Any:
+    """json 序列化的後備轉換：支援 pydantic 模型與輕量紀錄物件。"""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    return str(obj)
+
+
 def write_json_file(path: str, data: Any) -> None:
     ensure_parent_dir(path)
     p = Path(path)
     with p.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+        json.dump(data, f, ensure_ascii=False, indent=2, default=to_jsonable)
 
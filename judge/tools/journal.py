@@ -0,0 +1,179 @@
+"""事件日誌：以 NDJSON 逐行追加 Session 事件，由背景執行緒寫入並批次 fsync。"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from google.adk.events.event import Event
+from google.adk.sessions.session import Session
+
+from .file_io import ensure_parent_dir, to_jsonable
+
+logger = logging.getLogger(__name__)
+
+_CLOSE = object()
+
+
+class EventJournal:
+    """單一 Session 的追加式事件日誌
+
+    每個事件序列化為一行緊湊 JSON，寫入 ``<path>.part``；``finalize`` 時關閉並
+    改名為正式檔名，不需重新序列化整個 Session。
+
+    Args:
+        path:           完成後的日誌路徑
+        session:        所屬 Session，第一行寫入其基本資訊
+        fsync_every:    累積多少行後執行一次 fsync
+        fsync_interval: 距上次 fsync 超過多少秒即執行 fsync
+    """
+
+    def __init__(
+        self,
+        path: str,
+        session: Session,
+        fsync_every: int = 64,
+        fsync_interval: float = 1.0,
+    ) -> None:
+        self.path = path
+        self.part_path = f"{path}.part"
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.written = 0
+        ensure_parent_dir(self.part_path)
+        self._file = open(self.part_path, "a", encoding="utf-8")
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = False
+        # 背景寫入失敗時的例外；之後的 write / close 會拋出，不再默默排隊
+        self.error: Optional[BaseException] = None
+        self._thread = threading.Thread(
+            target=self._run, name=f"event-journal-{session.id}", daemon=True
+        )
+        header = {
+            "session": {
+                "id": session.id,
+                "app_name": session.app_name,
+                "user_id": session.user_id,
+            }
+        }
+        self._queue.put(json.dumps(header, ensure_ascii=False, separators=(",", ":")))
+        self._thread.start()
+
+    def _check(self) -> None:
+        if self.error is not None:
+            raise RuntimeError(f"事件日誌 {self.part_path} 的寫入執行緒已停止") from self.error
+
+    def write(self, event: Event) -> None:
+        """將事件序列化為一行後排入背景寫入佇列（不阻塞事件迴圈）
+
+        於呼叫當下序列化，之後事件或其 ``state_delta`` 再被修改也不影響日誌內容。
+        """
+        self._check()
+        if not self._closed:
+            self._queue.put(event.model_dump_json(exclude_none=True, fallback=to_jsonable))
+
+    def _run(self) -> None:
+        try:
+            self._write_loop()
+        except BaseException as e:
+            self.error = e
+            logger.exception(f"事件日誌 {self.part_path} 寫入失敗，已停止接收事件")
+        finally:
+            self._file.close()
+
+    def _write_loop(self) -> None:
+        pending = 0
+        last_sync = time.monotonic()
+        while True:
+            try:
+                line = self._queue.get(timeout=self.fsync_interval)
+            except queue.Empty:
+                line = None
+            if line is _CLOSE:
+                break
+            if line is not None:
+                self._file.write(line + "\n")
+                self.written += 1
+                pending += 1
+            if pending and (
+                pending >= self.fsync_every
+                or time.monotonic() - last_sync >= self.fsync_interval
+            ):
+                self._sync()
+                pending = 0
+                last_sync = time.monotonic()
+        self._sync()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """寫完佇列中剩餘事件後關閉檔案"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        self._check()
+
+    def finalize(self, path: Optional[str] = None) -> str:
+        """關閉日誌並改名為正式檔名，回傳最終路徑"""
+        self.close()
+        target = path or self.path
+        ensure_parent_dir(target)
+        os.replace(self.part_path, target)
+        return target
+
+
+_journals: dict[str, EventJournal] = {}
+
+
+def open_journal(session: Session, directory: str = "journals", **kwargs) -> EventJournal:
+    """為 Session 開啟事件日誌；之後經 ``judge.tools.append_event`` 的事件都會寫入"""
+    journal = _journals.get(session.id)
+    if journal is None:
+        path = str(Path(directory) / f"{session.id}.ndjson")
+        journal = EventJournal(path, session, **kwargs)
+        _journals[session.id] = journal
+    return journal
+
+
+def get_journal(session_id: str) -> Optional[EventJournal]:
+    return _journals.get(session_id)
+
+
+def close_journal(session_id: str, path: Optional[str] = None) -> Optional[str]:
+    """關閉並改名指定 Session 的日誌；若未開啟日誌則回傳 None"""
+    journal = _journals.pop(session_id, None)
+    if journal is None:
+        return None
+    return journal.finalize(path)
+
+
+def load_journal(path: str) -> Session:
+    """從 NDJSON 日誌重建 Session（供 export_debate_log 等讀取端使用）"""
+    meta: dict = {}
+    events: list[Event] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "session" in record and "author" not in record:
+                meta = record["session"]
+            else:
+                events.append(Event.model_validate(record))
+    return Session(
+        id=meta.get("id", ""),
+        app_name=meta.get("app_name", ""),
+        user_id=meta.get("user_id", ""),
+        events=events,
+        last_update_time=events[-1].timestamp if events else 0.0,
+    )
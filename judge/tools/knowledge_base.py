@@ -0,0 +1,345 @@
+"""持久化知識庫（KB）：保存 Curator 的整理卡片與 Historian 的時間軸，依實體與主題索引。
+
+Curator / Historian 執行前先查詢 KB：
+
+- 與既有卡片主題相似度達 ``reuse_threshold`` 且未過期：直接寫回 state 並略過該代理
+- 相似度達 ``related_threshold`` 或共享實體：將相關卡片放入 ``state['kb_related']`` 供 Curator 參考
+
+設定（環境變數）：
+
+- ``JUDGE_KB``：設為 ``1`` 啟用（預設停用）
+- ``JUDGE_KB_PATH``：SQLite 檔案（預設 ``.cache/knowledge_base.sqlite``）
+- ``JUDGE_KB_TTL``：卡片可沿用的秒數（預設 7 天）；過期卡片於下一次寫入時刪除
+- ``JUDGE_KB_REUSE`` / ``JUDGE_KB_RELATED``：沿用與參考的相似度門檻
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from google.genai import types
+
+from .file_io import ensure_parent_dir, to_jsonable
+from .llm_cache import llm_mode
+from .local_search import tokenize
+from .search_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+KB_KINDS = ("curation", "history")
+KB_RELATED_KEY = "kb_related"
+
+# 引號、書名號內的專有名詞，以及連續大寫開頭的英文詞組
+_QUOTED = re.compile(r"[「『《〈“\"]([^」』》〉”\"]{2,30})[」』》〉”\"]")
+_LATIN_NAME = re.compile(r"\b[A-Z][\w&.-]*(?:\s+[A-Z][\w&.-]*)*")
+
+
+def extract_entities(text: str) -> list[str]:
+    """以規則擷取實體：引號/書名號內的名稱與大寫開頭的英文詞組（轉小寫、去重）"""
+    found = [m.group(1) for m in _QUOTED.finditer(text or "")]
+    found += [m.group(0) for m in _LATIN_NAME.finditer(text or "") if len(m.group(0)) > 1]
+    seen: dict[str, None] = {}
+    for name in found:
+        key = normalize_query(name)
+        if key:
+            seen.setdefault(key, None)
+    return list(seen)
+
+
+def topic_terms(text: str) -> set[str]:
+    """主題詞：與本地搜尋相同的中文感知切詞結果"""
+    return set(tokenize(text))
+
+
+def request_text(callback_context: Any) -> str:
+    """取得本次請求的新聞文字：優先 state['news_text']，否則使用者訊息"""
+    text = callback_context.state.get("news_text")
+    if text:
+        return str(text)
+    content = getattr(callback_context, "user_content", None)
+    if content is None:
+        return ""
+    return "\n".join(p.text for p in content.parts or [] if p.text)
+
+
+class KnowledgeBase:
+    """SQLite 知識庫；卡片以 (kind, 主題雜湊) 為鍵，另建主題詞與實體的倒排表
+
+    Args:
+        path:              SQLite 檔案
+        ttl:               卡片可沿用的秒數
+        reuse_threshold:   主題 Jaccard 相似度達此值即沿用
+        related_threshold: 達此值（或共享實體）列為相關卡片
+    """
+
+    def __init__(
+        self,
+        path: str = ".cache/knowledge_base.sqlite",
+        ttl: float = 7 * 24 * 3600,
+        reuse_threshold: float = 0.8,
+        related_threshold: float = 0.3,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.reuse_threshold = reuse_threshold
+        self.related_threshold = related_threshold
+        self.hits = 0
+        self.related = 0
+        self.misses = 0
+        self.stores = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            ensure_parent_dir(self.path)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS kb_cards (
+                    id INTEGER PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    topic_key TEXT NOT NULL,
+                    topic TEXT NOT NULL,
+                    n_terms INTEGER NOT NULL,
+                    payload TEXT NOT NULL,
+                    updated REAL NOT NULL,
+                    UNIQUE (kind, topic_key)
+                );
+                CREATE TABLE IF NOT EXISTS kb_terms (
+                    term TEXT NOT NULL,
+                    card_id INTEGER NOT NULL,
+                    PRIMARY KEY (term, card_id)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS kb_entities (
+                    entity TEXT NOT NULL,
+                    card_id INTEGER NOT NULL,
+                    PRIMARY KEY (entity, card_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS kb_terms_card ON kb_terms (card_id);
+                CREATE INDEX IF NOT EXISTS kb_entities_card ON kb_entities (card_id);
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            cards = self._db().execute("SELECT COUNT(*) FROM kb_cards").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "related": self.related,
+            "misses": self.misses,
+            "stores": self.stores,
+            "cards": cards,
+        }
+
+    @staticmethod
+    def topic_key(text: str) -> str:
+        return hashlib.sha256(normalize_query(text).encode("utf-8")).hexdigest()
+
+    def put(self, kind: str, text: str, payload: Any, entities: Optional[list[str]] = None) -> None:
+        """保存（或覆寫同主題的）卡片；實體取自新聞文字與卡片內容，並順帶刪除過期卡片"""
+        terms = topic_terms(text)
+        body = json.dumps(payload, ensure_ascii=False, default=to_jsonable)
+        names = set(entities or []) | set(extract_entities(text))
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            with db:
+                self._purge(db, now - self.ttl)
+                row = db.execute(
+                    "SELECT id FROM kb_cards WHERE kind = ? AND topic_key = ?",
+                    (kind, self.topic_key(text)),
+                ).fetchone()
+                if row is not None:
+                    db.execute("DELETE FROM kb_terms WHERE card_id = ?", (row[0],))
+                    db.execute("DELETE FROM kb_entities WHERE card_id = ?", (row[0],))
+                    db.execute("DELETE FROM kb_cards WHERE id = ?", (row[0],))
+                card_id = db.execute(
+                    "INSERT INTO kb_cards (kind, topic_key, topic, n_terms, payload, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (kind, self.topic_key(text), text[:500], len(terms), body, now),
+                ).lastrowid
+                db.executemany(
+                    "INSERT OR IGNORE INTO kb_terms (term, card_id) VALUES (?, ?)",
+                    ((t, card_id) for t in terms),
+                )
+                db.executemany(
+                    "INSERT OR IGNORE INTO kb_entities (entity, card_id) VALUES (?, ?)",
+                    ((e, card_id) for e in names),
+                )
+            self.stores += 1
+
+    @staticmethod
+    def _purge(db: sqlite3.Connection, oldest: float) -> None:
+        expired = "SELECT id FROM kb_cards WHERE updated < ?"
+        db.execute(f"DELETE FROM kb_terms WHERE card_id IN ({expired})", (oldest,))
+        db.execute(f"DELETE FROM kb_entities WHERE card_id IN ({expired})", (oldest,))
+        db.execute("DELETE FROM kb_cards WHERE updated < ?", (oldest,))
+
+    def _candidates(self, kind: str, terms: set[str], entities: list[str]) -> list[tuple[float, bool, str]]:
+        """回傳 ``[(相似度, 是否共享實體, payload)]``，依相似度由高到低
+
+        主題詞與實體各以一個 ``IN`` 子查詢比對（清單以 JSON 陣列傳入，不受參數數量上限影響），
+        整個查詢只執行一次。
+        """
+        rows = self._db().execute(
+            """
+            WITH hits AS (
+                SELECT card_id, COUNT(*) AS common, 0 AS by_entity FROM kb_terms
+                WHERE term IN (SELECT value FROM json_each(:terms)) GROUP BY card_id
+                UNION ALL
+                SELECT card_id, 0, 1 FROM kb_entities
+                WHERE entity IN (SELECT value FROM json_each(:entities)) GROUP BY card_id
+            )
+            SELECT c.n_terms, c.payload, SUM(h.common), MAX(h.by_entity)
+            FROM hits h JOIN kb_cards c ON c.id = h.card_id
+            WHERE c.kind = :kind AND c.updated >= :oldest
+            GROUP BY c.id
+            """,
+            {
+                "terms": json.dumps(sorted(terms), ensure_ascii=False),
+                "entities": json.dumps(entities, ensure_ascii=False),
+                "kind": kind,
+                "oldest": time.time() - self.ttl,
+            },
+        ).fetchall()
+        any_entity = any(row[3] for row in rows)
+        results = []
+        for n_terms, payload, common, shares_entity in rows:
+            union = len(terms) + n_terms - common
+            score = common / union if union else 0.0
+            # 兩邊都有實體卻完全不重疊時視為不同事件
+            if entities and any_entity and not shares_entity:
+                score *= 0.5
+            results.append((score, bool(shares_entity), payload))
+        results.sort(key=lambda r: r[0], reverse=True)
+        return results
+
+    def lookup(self, kind: str, text: str) -> tuple[Optional[Any], list[Any]]:
+        """查詢卡片
+
+        Returns:
+            ``(可直接沿用的卡片或 None, 相關卡片清單)``
+        """
+        terms = topic_terms(text)
+        if not terms:
+            return None, []
+        with self._lock:
+            candidates = self._candidates(kind, terms, extract_entities(text))
+        reuse = None
+        related: list[Any] = []
+        for score, shares_entity, payload in candidates:
+            if reuse is None and score >= self.reuse_threshold:
+                reuse = json.loads(payload)
+            elif (score >= self.related_threshold or shares_entity) and len(related) < 3:
+                related.append(json.loads(payload))
+        if reuse is not None:
+            self.hits += 1
+        elif related:
+            self.related += 1
+        else:
+            self.misses += 1
+        return reuse, related
+
+    def by_entity(self, entity: str, kind: Optional[str] = None) -> list[Any]:
+        """列出含指定實體的卡片（新到舊）"""
+        sql = (
+            "SELECT c.payload FROM kb_entities e JOIN kb_cards c ON c.id = e.card_id "
+            "WHERE e.entity = ?"
+        )
+        params: list[Any] = [normalize_query(entity)]
+        if kind is not None:
+            sql += " AND c.kind = ?"
+            params.append(kind)
+        with self._lock:
+            rows = self._db().execute(sql + " ORDER BY c.updated DESC", params).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ---- ADK agent callbacks ----
+    def lookup_callback(self, kind: str, output_key: str):
+        """建立 before_agent_callback：命中時寫入 ``state[output_key]`` 並略過代理"""
+
+        def _callback(callback_context=None, **_):
+            if callback_context is None:
+                return None
+            text = request_text(callback_context)
+            if not text:
+                return None
+            try:
+                reuse, related = self.lookup(kind, text)
+            except sqlite3.Error as e:
+                logger.warning(f"知識庫查詢失敗，改為重新計算: {e}")
+                return None
+            if reuse is not None:
+                callback_context.state[output_key] = reuse
+                return types.Content(role="model", parts=[types.Part(text=f"沿用知識庫中的 {output_key}")])
+            if related and kind == "curation":
+                callback_context.state[KB_RELATED_KEY] = related
+            return None
+
+        return _callback
+
+    def store_callback(self, kind: str, output_key: str):
+        """建立 after_agent_callback：將代理輸出存入 KB"""
+
+        def _callback(callback_context=None, **_):
+            if callback_context is None:
+                return None
+            text = request_text(callback_context)
+            payload = callback_context.state.get(output_key)
+            if not text or not payload:
+                return None
+            entities: list[str] = []
+            if kind == "curation" and isinstance(payload, dict):
+                entities = extract_entities(" ".join(r.get("title", "") for r in payload.get("results") or []))
+            try:
+                self.put(kind, text, payload, entities)
+            except sqlite3.Error as e:
+                logger.warning(f"知識庫寫入失敗: {e}")
+            return None
+
+        return _callback
+
+
+def _create_knowledge_base() -> Optional[KnowledgeBase]:
+    if os.getenv("JUDGE_KB", "0") != "1" or llm_mode() != "live":
+        return None
+    return KnowledgeBase(
+        path=os.getenv("JUDGE_KB_PATH") or ".cache/knowledge_base.sqlite",
+        ttl=float(os.getenv("JUDGE_KB_TTL") or 7 * 24 * 3600),
+        reuse_threshold=float(os.getenv("JUDGE_KB_REUSE") or 0.8),
+        related_threshold=float(os.getenv("JUDGE_KB_RELATED") or 0.3),
+    )
+
+
+knowledge_base: Optional[KnowledgeBase] = _create_knowledge_base()
+
+
+def kb_lookup_callbacks(kind: str, output_key: str) -> dict[str, Any]:
+    """供 Curator / Historian 外層代理展開的 before_agent_callback 參數"""
+    if knowledge_base is None:
+        return {}
+    return {"before_agent_callback": knowledge_base.lookup_callback(kind, output_key)}
+
+
+def kb_store_callbacks(kind: str, output_key: str) -> dict[str, Any]:
+    """供產出卡片的 LlmAgent 展開的 after_agent_callback 參數"""
+    if knowledge_base is None:
+        return {}
+    return {"after_agent_callback": knowledge_base.store_callback(kind, output_key)}
@@ -0,0 +1,185 @@
+"""錄製/回放的模型後端：讓 root_agent 可在無 Gemini 的環境下完整執行。
+
+- ``record``：以 ``RecordingLlm`` 包住原本的模型，照常呼叫並把每次請求的內容位址
+  （同 ``llm_cache.request_key``）與回應依序寫入 NDJSON 錄製檔
+- ``replay``：以 ``ReplayLlm`` 取代模型，依內容位址（找不到時依該代理的呼叫順序）
+  回放錄製的回應，並可加入合成延遲
+
+設定（環境變數）：
+
+- ``JUDGE_LLM_MODE``：``live``（預設）/ ``record`` / ``replay``
+- ``JUDGE_LLM_CASSETTE``：錄製檔路徑（預設 ``.cache/llm_cassette.ndjson``）
+- ``JUDGE_LLM_REPLAY_LATENCY``：每次回放的延遲秒數；``recorded`` 表示沿用錄製時的耗時
+- ``JUDGE_LLM_REPLAY_JITTER``：延遲的隨機抖動秒數（±）
+- ``JUDGE_LLM_REPLAY_SCALE``：``recorded`` 延遲的倍率
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, AsyncGenerator, Optional
+
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from .agent_tree import iter_llm_agents
+from .file_io import ensure_parent_dir
+from .llm_cache import llm_mode, request_key
+
+logger = logging.getLogger(__name__)
+
+_AGENT_LABEL = "adk_agent_name"
+
+
+def _agent_name(llm_request: LlmRequest) -> str:
+    labels = llm_request.config.labels if llm_request.config else None
+    return (labels or {}).get(_AGENT_LABEL, "")
+
+
+class Cassette:
+    """NDJSON 錄製檔：每行為一次模型呼叫 ``{"agent", "key", "model", "duration", "responses"}``"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._by_key: dict[tuple[str, str], deque] = defaultdict(deque)
+        self._by_agent: dict[str, deque] = defaultdict(deque)
+        self._loaded = False
+
+    def record(self, agent: str, key: str, model: str, duration: float, responses: list[LlmResponse]) -> None:
+        line = json.dumps(
+            {
+                "agent": agent,
+                "key": key,
+                "model": model,
+                "duration": round(duration, 4),
+                "responses": [r.model_dump(mode="json", exclude_none=True) for r in responses],
+            },
+            ensure_ascii=False,
+        )
+        with self._lock:
+            ensure_parent_dir(self.path)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def _load(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                entry["used"] = False
+                self._by_key[(entry["agent"], entry["key"])].append(entry)
+                self._by_agent[entry["agent"]].append(entry)
+        self._loaded = True
+
+    def take(self, agent: str, key: str) -> dict[str, Any]:
+        """取出對應的錄製項目：先比對內容位址，否則取該代理下一個未使用的項目"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entries = self._by_key.get((agent, key))
+            while entries and entries[0]["used"]:
+                entries.popleft()
+            if entries:
+                entry = entries.popleft()
+            else:
+                pending = self._by_agent.get(agent)
+                while pending and pending[0]["used"]:
+                    pending.popleft()
+                if not pending:
+                    raise LookupError(f"錄製檔 {self.path} 中沒有代理 {agent!r} 的回應可回放")
+                entry = pending.popleft()
+                logger.debug(f"回放 {agent} 時內容位址不符，改依呼叫順序")
+            entry["used"] = True
+            return entry
+
+
+class RecordingLlm(BaseLlm):
+    """呼叫實際模型並錄製回應"""
+
+    inner: BaseLlm
+    cassette: Cassette
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        key = request_key(llm_request)
+        started = time.perf_counter()
+        responses: list[LlmResponse] = []
+        async for response in self.inner.generate_content_async(llm_request, stream=stream):
+            responses.append(response)
+            yield response
+        self.cassette.record(
+            _agent_name(llm_request), key, self.model, time.perf_counter() - started, responses
+        )
+
+
+class ReplayLlm(BaseLlm):
+    """回放錄製的回應；不需要網路與 API 金鑰
+
+    Attributes:
+        latency:      每次回放的延遲秒數；``None`` 表示沿用錄製時的耗時
+        jitter:       延遲的隨機抖動秒數（±）
+        scale:        沿用錄製耗時時的倍率
+    """
+
+    cassette: Cassette
+    latency: Optional[float] = 0.0
+    jitter: float = 0.0
+    scale: float = 1.0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        entry = self.cassette.take(_agent_name(llm_request), request_key(llm_request))
+        delay = entry["duration"] * self.scale if self.latency is None else self.latency
+        if self.jitter:
+            delay += random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        for data in entry["responses"]:
+            response = LlmResponse.model_validate(data)
+            # 非串流呼叫只回傳完整回應
+            if response.partial and not stream:
+                continue
+            yield response
+
+
+def _replay_latency() -> Optional[float]:
+    value = os.getenv("JUDGE_LLM_REPLAY_LATENCY") or "0"
+    return None if value == "recorded" else float(value)
+
+
+def install_llm_backend(root: BaseAgent, mode: Optional[str] = None, cassette_path: Optional[str] = None) -> str:
+    """依模式替換 root 之下所有 LlmAgent 的模型，回傳實際使用的模式"""
+    mode = (mode or llm_mode()).lower()
+    if mode == "live":
+        return mode
+    if mode not in ("record", "replay"):
+        raise ValueError(f"Unknown LLM mode: {mode}")
+    cassette = Cassette(cassette_path or os.getenv("JUDGE_LLM_CASSETTE") or ".cache/llm_cassette.ndjson")
+    for agent in iter_llm_agents(root):
+        if isinstance(agent.model, (RecordingLlm, ReplayLlm)):
+            continue
+        inner = agent.canonical_model
+        if mode == "record":
+            agent.model = RecordingLlm(model=inner.model, inner=inner, cassette=cassette)
+        else:
+            agent.model = ReplayLlm(
+                model=inner.model,
+                cassette=cassette,
+                latency=_replay_latency(),
+                jitter=float(os.getenv("JUDGE_LLM_REPLAY_JITTER") or 0),
+                scale=float(os.getenv("JUDGE_LLM_REPLAY_SCALE") or 1),
+            )
+    return mode
@@ -0,0 +1,265 @@
+"""內容定址的 LLM 回應快取：透過 ADK model callback 套用於各 LlmAgent。
+
+快取鍵為下列內容的 SHA-256：
+
+- 模型名稱
+- 已渲染的 instruction（``system_instruction``，state 中以 ``{key}`` 注入的值已在其中）
+- 對話內容（``contents``，含前序代理輸出與工具回應等 state 輸入）
+- 工具宣告與 ``generate_content_config`` 其餘參數（temperature、response_schema 等）
+
+回應存於 SQLite，總大小超過 ``max_bytes`` 時依最近使用時間淘汰。啟用後預設只快取
+``temperature == 0`` 的代理；可用 ``JUDGE_LLM_CACHE_AGENTS``（逗號分隔，``*`` 表示全部）
+指定加入、``JUDGE_LLM_CACHE_EXCLUDE`` 指定排除。使用搜尋工具的代理已由
+``search_cache`` 處理，不重複快取。
+
+設定（環境變數）：``JUDGE_LLM_CACHE``（``1`` 啟用，預設停用）、``JUDGE_LLM_CACHE_PATH``、
+``JUDGE_LLM_CACHE_MAX_BYTES``。``JUDGE_LLM_MODE`` 為 ``record`` / ``replay`` 時
+（見 ``llm_backend``）停用此快取與其他跨執行的快取，讓每次模型呼叫都被錄製或回放。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Any, Iterable, Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.tools.google_search_tool import GoogleSearchTool
+
+from .agent_tree import add_model_callbacks, iter_llm_agents
+from .file_io import ensure_parent_dir
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_METADATA_KEY = "llm_cache"
+
+# 不影響輸出、或每次呼叫都會變動的設定欄位
+_CONFIG_EXCLUDE = {"http_options", "labels", "should_return_http_response"}
+
+
+def _fallback(value: Any) -> Any:
+    # response_schema 可能是 pydantic 類別
+    if hasattr(value, "model_json_schema"):
+        return value.model_json_schema()
+    return repr(value)
+
+
+def request_key(llm_request: LlmRequest) -> str:
+    """計算請求的內容位址"""
+    config = llm_request.config
+    payload = {
+        "model": llm_request.model,
+        "config": (
+            config.model_dump(mode="json", exclude_none=True, exclude=_CONFIG_EXCLUDE, fallback=_fallback)
+            if config is not None
+            else None
+        ),
+        "contents": [
+            c.model_dump(mode="json", exclude_none=True, fallback=_fallback) for c in llm_request.contents or []
+        ],
+    }
+    blob = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def llm_mode() -> str:
+    """模型後端模式：``live``（預設）、``record`` 或 ``replay``"""
+    return (os.getenv("JUDGE_LLM_MODE") or "live").lower()
+
+
+def _names(value: Optional[str]) -> set[str]:
+    return {n.strip() for n in (value or "").split(",") if n.strip()}
+
+
+class LlmResponseCache:
+    """SQLite 磁碟快取，依總大小做 LRU 淘汰並記錄各代理的命中統計
+
+    Args:
+        path:      SQLite 檔案
+        max_bytes: 回應總大小上限（位元組）
+        include:   指定快取的代理名稱；``None`` 表示只快取 temperature 為 0 的代理，``{"*"}`` 表示全部
+        exclude:   不快取的代理名稱
+    """
+
+    def __init__(
+        self,
+        path: str = ".cache/llm_cache.sqlite",
+        max_bytes: int = 256 * 1024 * 1024,
+        include: Optional[Iterable[str]] = None,
+        exclude: Optional[Iterable[str]] = None,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.include = set(include) if include is not None else None
+        self.exclude = set(exclude or ())
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        self.stores: Counter[str] = Counter()
+        self.evictions = 0
+        self._inflight: dict[tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total: Optional[int] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            ensure_parent_dir(self.path)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, agent TEXT NOT NULL, size INTEGER NOT NULL, "
+                "accessed REAL NOT NULL, response TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed)")
+            self._conn = conn
+            self._total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        return self._conn
+
+    def enabled_for(self, agent: LlmAgent) -> bool:
+        """依名稱設定與 temperature 判斷是否快取此代理"""
+        if agent.name in self.exclude:
+            return False
+        if any(isinstance(t, GoogleSearchTool) for t in agent.tools):
+            return False
+        if self.include is not None:
+            return "*" in self.include or agent.name in self.include
+        config = agent.generate_content_config
+        return config is not None and config.temperature == 0
+
+    def stats(self) -> dict[str, Any]:
+        agents = sorted(set(self.hits) | set(self.misses))
+        return {
+            "hits": sum(self.hits.values()),
+            "misses": sum(self.misses.values()),
+            "stores": sum(self.stores.values()),
+            "evictions": self.evictions,
+            "bytes": self._total or 0,
+            "agents": {
+                name: {"hits": self.hits[name], "misses": self.misses[name], "stores": self.stores[name]}
+                for name in agents
+            },
+        }
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT response FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            with db:
+                db.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key: str, agent_name: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            db = self._db()
+            with db:
+                old = db.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, agent, size, accessed, response) VALUES (?, ?, ?, ?, ?)",
+                    (key, agent_name, size, time.time(), value),
+                )
+                self._total += size - (old[0] if old else 0)
+                self._evict(db)
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        # 依最近使用時間由舊到新淘汰，直到總大小低於上限
+        while self._total > self.max_bytes:
+            rows = db.execute("SELECT key, size FROM llm_cache ORDER BY accessed LIMIT 64").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._total -= size
+                self.evictions += 1
+                if self._total <= self.max_bytes:
+                    break
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ---- ADK model callbacks ----
+    def before_model(self, callback_context=None, llm_request: LlmRequest = None, **_) -> Optional[LlmResponse]:
+        """命中時回傳快取回應並略過模型呼叫"""
+        if callback_context is None or llm_request is None:
+            return None
+        agent_name = callback_context.agent_name
+        key = request_key(llm_request)
+        try:
+            cached = self.get(key)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM 快取讀取失敗: {e}")
+            return None
+        if cached is not None:
+            try:
+                response = LlmResponse.model_validate_json(cached)
+            except Exception as e:
+                logger.warning(f"LLM 快取內容無法解析，改為重新呼叫: {e}")
+            else:
+                self.hits[agent_name] += 1
+                response.custom_metadata = {**(response.custom_metadata or {}), LLM_CACHE_METADATA_KEY: "hit"}
+                return response
+        self.misses[agent_name] += 1
+        self._inflight[(callback_context.invocation_id, agent_name)] = key
+        return None
+
+    def after_model(self, callback_context=None, llm_response: LlmResponse = None, **_) -> None:
+        """保存完整且無錯誤的回應"""
+        if callback_context is None or llm_response is None:
+            return None
+        agent_name = callback_context.agent_name
+        key = self._inflight.pop((callback_context.invocation_id, agent_name), None)
+        if key is None or llm_response.partial or llm_response.error_code or not llm_response.content:
+            return None
+        try:
+            self.put(key, agent_name, llm_response.model_dump_json(exclude_none=True))
+            self.stores[agent_name] += 1
+        except sqlite3.Error as e:
+            logger.warning(f"LLM 快取寫入失敗: {e}")
+        return None
+
+    def install(self, root: BaseAgent) -> list[str]:
+        """將快取回呼掛到 root 之下符合條件的 LlmAgent，回傳已啟用的代理名稱"""
+        installed = []
+        for agent in iter_llm_agents(root):
+            if self.enabled_for(agent):
+                add_model_callbacks(agent, before=self.before_model, after=self.after_model)
+                installed.append(agent.name)
+        return installed
+
+
+def _create_llm_cache() -> Optional[LlmResponseCache]:
+    if os.getenv("JUDGE_LLM_CACHE", "0") != "1" or llm_mode() != "live":
+        return None
+    include = os.getenv("JUDGE_LLM_CACHE_AGENTS")
+    return LlmResponseCache(
+        path=os.getenv("JUDGE_LLM_CACHE_PATH") or ".cache/llm_cache.sqlite",
+        max_bytes=int(os.getenv("JUDGE_LLM_CACHE_MAX_BYTES") or 256 * 1024 * 1024),
+        include=_names(include) if include else None,
+        exclude=_names(os.getenv("JUDGE_LLM_CACHE_EXCLUDE")),
+    )
+
+
+llm_cache: Optional[LlmResponseCache] = _create_llm_cache()
+
+
+def install_llm_cache(root: BaseAgent) -> list[str]:
+    """依設定為 root 之下的 LlmAgent 啟用回應快取"""
+    if llm_cache is None:
+        return []
+    return llm_cache.install(root)
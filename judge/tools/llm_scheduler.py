@@ -0,0 +1,296 @@
+"""行程層級的 Gemini 呼叫排程：依模型限制速率與並行數，並對配額錯誤做抖動退避重試。
+
+``social_parallel`` / ``social_noise_parallel`` 等 ParallelAgent 與批次執行的多個 Session
+會同時發出模型呼叫。``install_llm_scheduler`` 以 ``ScheduledLlm`` 包住 ``root_agent`` 下
+所有 LlmAgent 的模型（含 Weight 階段的 ``gemini-2.0-flash``），同一模型的呼叫共用：
+
+- token bucket：每分鐘請求數上限（``rpm``）與突發量（``burst``）
+- 自適應並行上限（AIMD）：成功且延遲低於目標時緩慢調升；配額/伺服器錯誤時減半，
+  延遲超過目標時減一
+- 退避重試：429 / 5xx 錯誤且尚未輸出任何回應時，以 full jitter 指數退避重試
+
+設定（環境變數）：``JUDGE_LLM_SCHEDULER``（``0`` 停用）、``JUDGE_LLM_RPM``、``JUDGE_LLM_BURST``、
+``JUDGE_LLM_MAX_CONCURRENCY``、``JUDGE_LLM_TARGET_LATENCY``（秒）、``JUDGE_LLM_MAX_RETRIES``、
+``JUDGE_LLM_BACKOFF``（基礎秒數）、``JUDGE_LLM_BACKOFF_MAX``。``RPM`` / ``BURST`` /
+``MAX_CONCURRENCY`` 可加上模型後綴個別設定，如 ``JUDGE_LLM_RPM_GEMINI_2_0_FLASH``。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Optional
+
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import errors
+
+from .agent_tree import iter_llm_agents
+from .llm_cache import llm_mode
+from .model_tiers import TieredLlm
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+# 跨事件迴圈共用狀態，等待時以短暫 sleep 輪詢
+_POLL_INTERVAL = 0.02
+
+
+class TokenBucket:
+    """每分鐘 ``rpm`` 個令牌、容量 ``burst`` 的令牌桶；``rpm <= 0`` 表示不限速"""
+
+    def __init__(self, rpm: float, burst: int) -> None:
+        self.rate = rpm / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_take(self) -> float:
+        """取得一個令牌時回傳 0，否則回傳需等待的秒數"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    async def acquire(self) -> float:
+        """等待直到取得令牌，回傳等待秒數"""
+        waited = 0.0
+        while (delay := self.try_take()) > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+        return waited
+
+
+class AdaptiveLimiter:
+    """AIMD 並行上限：成功時每輪加一、錯誤時減半，延遲過高時減一"""
+
+    def __init__(self, max_limit: int, target_latency: float, min_limit: int = 1) -> None:
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.target_latency = target_latency
+        self.limit = float(self.max_limit)
+        self.inflight = 0
+        self._lock = threading.Lock()
+
+    def try_enter(self) -> bool:
+        with self._lock:
+            if self.inflight < int(self.limit):
+                self.inflight += 1
+                return True
+            return False
+
+    async def enter(self) -> float:
+        started = time.monotonic()
+        while not self.try_enter():
+            await asyncio.sleep(_POLL_INTERVAL)
+        return time.monotonic() - started
+
+    def leave(self, latency: Optional[float], throttled: bool) -> None:
+        with self._lock:
+            self.inflight -= 1
+            if throttled:
+                self.limit = max(self.min_limit, self.limit / 2)
+            elif latency is not None and self.target_latency and latency > self.target_latency:
+                self.limit = max(self.min_limit, self.limit - 1)
+            elif latency is not None:
+                self.limit = min(self.max_limit, self.limit + 1 / max(self.limit, 1))
+
+
+def _model_suffix(model: str) -> str:
+    return re.sub(r"[^A-Z0-9]+", "_", model.upper()).strip("_")
+
+
+def _env_number(name: str, model: str, default: float) -> float:
+    value = os.getenv(f"{name}_{_model_suffix(model)}") or os.getenv(name)
+    return float(value) if value else default
+
+
+def is_retryable(error: BaseException) -> bool:
+    return isinstance(error, errors.APIError) and error.code in RETRYABLE_CODES
+
+
+class LlmScheduler:
+    """依模型名稱分開的令牌桶與並行上限，並統計等待、重試與錯誤次數
+
+    Args:
+        rpm:             預設每分鐘請求數上限（``<= 0`` 不限速）
+        burst:           預設突發量
+        max_concurrency: 預設並行上限
+        target_latency:  調降並行上限的延遲門檻（秒）
+        max_retries:     可重試錯誤的最大重試次數
+        backoff:         退避的基礎秒數
+        backoff_max:     單次退避的上限秒數
+    """
+
+    def __init__(
+        self,
+        rpm: float = 60,
+        burst: int = 10,
+        max_concurrency: int = 8,
+        target_latency: float = 30.0,
+        max_retries: int = 4,
+        backoff: float = 1.0,
+        backoff_max: float = 30.0,
+    ) -> None:
+        self.rpm = rpm
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.calls: Counter[str] = Counter()
+        self.retries: Counter[str] = Counter()
+        self.throttled: Counter[str] = Counter()
+        self.failures: Counter[str] = Counter()
+        self.wait_seconds: Counter[str] = Counter()
+        self._buckets: dict[str, TokenBucket] = {}
+        self._limiters: dict[str, AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+
+    def _for_model(self, model: str) -> tuple[TokenBucket, AdaptiveLimiter]:
+        with self._lock:
+            if model not in self._buckets:
+                self._buckets[model] = TokenBucket(
+                    _env_number("JUDGE_LLM_RPM", model, self.rpm),
+                    int(_env_number("JUDGE_LLM_BURST", model, self.burst)),
+                )
+                self._limiters[model] = AdaptiveLimiter(
+                    int(_env_number("JUDGE_LLM_MAX_CONCURRENCY", model, self.max_concurrency)),
+                    self.target_latency,
+                )
+            return self._buckets[model], self._limiters[model]
+
+    def backoff_delay(self, attempt: int) -> float:
+        """第 ``attempt`` 次重試前的等待秒數（full jitter）"""
+        return random.uniform(0, min(self.backoff_max, self.backoff * (2**attempt)))
+
+    @asynccontextmanager
+    async def slot(self, model: str) -> AsyncIterator[dict[str, Any]]:
+        """取得令牌與並行名額；區塊內將 ``outcome['throttled']`` 設為 True 表示遇到配額錯誤"""
+        bucket, limiter = self._for_model(model)
+        waited = await bucket.acquire()
+        waited += await limiter.enter()
+        self.calls[model] += 1
+        self.wait_seconds[model] += waited
+        outcome: dict[str, Any] = {"throttled": False, "ok": False}
+        started = time.monotonic()
+        try:
+            yield outcome
+        finally:
+            latency = time.monotonic() - started if outcome["ok"] else None
+            limiter.leave(latency, outcome["throttled"])
+
+    def stats(self) -> dict[str, Any]:
+        models = sorted(self._limiters)
+        return {
+            model: {
+                "calls": self.calls[model],
+                "retries": self.retries[model],
+                "throttled": self.throttled[model],
+                "failures": self.failures[model],
+                "wait_seconds": round(self.wait_seconds[model], 3),
+                "concurrency_limit": int(self._limiters[model].limit),
+                "inflight": self._limiters[model].inflight,
+            }
+            for model in models
+        }
+
+
+class ScheduledLlm(BaseLlm):
+    """經排程器呼叫內部模型；尚未輸出回應前遇到可重試錯誤時退避重試"""
+
+    inner: BaseLlm
+    scheduler: LlmScheduler
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        scheduler = self.scheduler
+        model = llm_request.model or self.model
+        attempt = 0
+        while True:
+            yielded = False
+            async with scheduler.slot(model) as outcome:
+                try:
+                    async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                        yielded = True
+                        yield response
+                    outcome["ok"] = True
+                    return
+                except Exception as e:
+                    if not is_retryable(e):
+                        scheduler.failures[model] += 1
+                        raise
+                    code = e.code
+                    outcome["throttled"] = True
+                    scheduler.throttled[model] += 1
+                    if yielded or attempt >= scheduler.max_retries:
+                        scheduler.failures[model] += 1
+                        raise
+            delay = scheduler.backoff_delay(attempt)
+            attempt += 1
+            scheduler.retries[model] += 1
+            logger.info(f"{model} 回應 {code}，{delay:.1f} 秒後第 {attempt} 次重試")
+            await asyncio.sleep(delay)
+
+
+def _create_llm_scheduler() -> Optional[LlmScheduler]:
+    if os.getenv("JUDGE_LLM_SCHEDULER", "1") == "0":
+        return None
+    return LlmScheduler(
+        rpm=float(os.getenv("JUDGE_LLM_RPM") or 60),
+        burst=int(os.getenv("JUDGE_LLM_BURST") or 10),
+        max_concurrency=int(os.getenv("JUDGE_LLM_MAX_CONCURRENCY") or 8),
+        target_latency=float(os.getenv("JUDGE_LLM_TARGET_LATENCY") or 30),
+        max_retries=int(os.getenv("JUDGE_LLM_MAX_RETRIES") or 4),
+        backoff=float(os.getenv("JUDGE_LLM_BACKOFF") or 1.0),
+        backoff_max=float(os.getenv("JUDGE_LLM_BACKOFF_MAX") or 30),
+    )
+
+
+llm_scheduler: Optional[LlmScheduler] = _create_llm_scheduler()
+
+
+def install_llm_scheduler(root: BaseAgent, scheduler: Optional[LlmScheduler] = None) -> list[str]:
+    """以 ``ScheduledLlm`` 包住 root 之下所有 LlmAgent 的模型，回傳已套用的代理名稱
+
+    回放模式不呼叫實際模型，不套用排程；分級路由的代理分別包住其便宜與升級模型，
+    讓兩者各自依模型計入限速。
+    """
+    scheduler = scheduler or llm_scheduler
+    if scheduler is None or llm_mode() == "replay":
+        return []
+    installed = []
+    for agent in iter_llm_agents(root):
+        if isinstance(agent.model, ScheduledLlm):
+            continue
+        if isinstance(agent.model, TieredLlm):
+            tiered = agent.model
+            for field in ("primary", "fallback"):
+                inner = getattr(tiered, field)
+                if not isinstance(inner, ScheduledLlm):
+                    setattr(tiered, field, ScheduledLlm(model=inner.model, inner=inner, scheduler=scheduler))
+            installed.append(agent.name)
+            continue
+        inner = agent.canonical_model
+        agent.model = ScheduledLlm(model=inner.model, inner=inner, scheduler=scheduler)
+        installed.append(agent.name)
+    return installed
@@ -0,0 +1,417 @@
+"""離線搜尋後端：以本地語料建立 BM25 倒排索引，取代 GoogleSearchTool 供基準測試與壓力測試。
+
+結果格式與 Curator 的 ``SearchResult``（``title`` / ``url`` / ``snippet``）一致。
+
+索引目錄內容：
+
+- ``lexicon.json``：詞彙表（詞 → postings 位移與文件頻率）與 BM25 統計
+- ``postings.bin``：``(doc_id, tf)`` 的 uint32 配對，查詢時以 mmap 讀取
+- ``lengths.bin``：各文件的詞數（uint32）
+- ``docs.bin`` / ``docs.idx``：文件內容（JSON）與其位移（uint64），以 mmap 隨機存取
+- ``tf.bin`` / ``tf.idx``：各文件的 ``(詞序號, tf)`` uint32 配對（正向索引）與其位移
+- ``files.jsonl``：來源檔案的 mtime/size 與其文件序號範圍；重建索引時未變動的檔案
+  直接以 mmap 沿用舊索引的文件內容與詞頻，不重新讀檔或切詞
+
+語料支援 ``.txt`` / ``.md``（首行為標題）、``.json``（物件或物件陣列）與 ``.jsonl``；
+JSON 物件可含 ``title``、``url``、``text``（或 ``content`` / ``snippet``）。
+
+建立或更新索引::
+
+    python -m judge.tools.local_search index <corpus_dir> [--index DIR]
+    python -m judge.tools.local_search search "查詢字串" [--index DIR] [--top-k 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import mmap
+import os
+import re
+import unicodedata
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterator, Optional
+from urllib.parse import urlsplit
+
+DEFAULT_INDEX_DIR = ".cache/local_index"
+CORPUS_SUFFIXES = (".txt", ".md", ".json", ".jsonl")
+
+_CJK = (
+    r"㐀-䶿一-鿿豈-﫿"  # 中日韓統一表意文字
+    r"぀-ヿ가-힯"  # 假名、韓文
+)
+_TOKEN = re.compile(rf"[{_CJK}]+|[^\W_]+", re.UNICODE)
+_IS_CJK = re.compile(rf"[{_CJK}]")
+_SITE = re.compile(r"\bsite:(\S+)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+_SNIPPET_CHARS = 160
+
+
+def tokenize(text: str) -> list[str]:
+    """中文感知的切詞：中日韓字元取二元組（單字時取單字），其餘以字詞切分並轉小寫"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    tokens: list[str] = []
+    for run in _TOKEN.findall(text):
+        if _IS_CJK.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+# ---- 語料讀取 ----
+def _doc_from_obj(obj: Any, default_url: str) -> Optional[dict]:
+    if not isinstance(obj, dict):
+        return None
+    text = obj.get("text") or obj.get("content") or obj.get("snippet") or ""
+    title = obj.get("title") or ""
+    if not text and not title:
+        return None
+    return {"title": str(title), "url": str(obj.get("url") or default_url), "text": str(text)}
+
+
+def _read_corpus_file(path: Path) -> list[dict]:
+    url = path.resolve().as_uri()
+    suffix = path.suffix.lower()
+    with path.open("r", encoding="utf-8") as f:
+        if suffix == ".jsonl":
+            docs = []
+            for lineno, line in enumerate(f, 1):
+                if line.strip():
+                    doc = _doc_from_obj(json.loads(line), f"{url}#L{lineno}")
+                    if doc:
+                        docs.append(doc)
+            return docs
+        if suffix == ".json":
+            data = json.load(f)
+            items = data if isinstance(data, list) else [data]
+            return [d for i, obj in enumerate(items) if (d := _doc_from_obj(obj, f"{url}#{i}"))]
+        text = f.read()
+    title, _, body = text.strip().partition("\n")
+    return [{"title": title.strip().lstrip("# ").strip(), "url": url, "text": body.strip()}]
+
+
+def _iter_corpus(corpus_dir: Path) -> Iterator[Path]:
+    for path in sorted(corpus_dir.rglob("*")):
+        if path.is_file() and path.suffix.lower() in CORPUS_SUFFIXES:
+            yield path
+
+
+# ---- 建立索引 ----
+INDEX_VERSION = 2
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".part")
+    with tmp.open("wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class _PreviousIndex:
+    """上一版索引；只讀取 files.jsonl 的檔案清單，文件內容與詞頻以 mmap 按需取用"""
+
+    def __init__(self, index_dir: Path) -> None:
+        self.files: dict[str, dict] = {}
+        self._maps: list[Optional[mmap.mmap]] = []
+        lexicon_path = index_dir / "lexicon.json"
+        if not lexicon_path.exists() or not (index_dir / "tf.idx").exists():
+            return
+        with lexicon_path.open("r", encoding="utf-8") as f:
+            lexicon = json.load(f)
+        if lexicon.get("version") != INDEX_VERSION:
+            return
+        with (index_dir / "files.jsonl").open("r", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                self.files[entry["file"]] = entry
+        # 詞序號即詞彙表（已排序）中的位置
+        self.terms = list(lexicon["terms"])
+        self._maps = [_map(index_dir / name) for name in ("docs.bin", "docs.idx", "tf.bin", "tf.idx")]
+        self._docs = self._maps[0]
+        self._offsets = _view(self._maps[1], "Q")
+        self._tf = _view(self._maps[2], "I")
+        self._tf_offsets = _view(self._maps[3], "Q")
+
+    def unchanged(self, rel: str, st: os.stat_result) -> Optional[dict]:
+        entry = self.files.get(rel)
+        if entry is not None and entry["mtime"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            return entry
+        return None
+
+    def docs(self, entry: dict) -> Iterator[tuple[bytes, dict[str, int]]]:
+        start, count = entry["docs"]
+        for doc_id in range(start, start + count):
+            pairs = self._tf[self._tf_offsets[doc_id] * 2 : self._tf_offsets[doc_id + 1] * 2]
+            tf = {self.terms[pairs[i]]: pairs[i + 1] for i in range(0, len(pairs), 2)}
+            yield bytes(self._docs[self._offsets[doc_id] : self._offsets[doc_id + 1]]), tf
+
+    def close(self) -> None:
+        if not self._maps:
+            return
+        for view in (self._offsets, self._tf, self._tf_offsets):
+            view.release()
+        for mapped in self._maps:
+            if mapped is not None:
+                mapped.close()
+
+
+def _encode_doc(doc: dict) -> bytes:
+    return json.dumps(
+        {"title": doc["title"], "url": doc["url"], "text": doc["text"]}, ensure_ascii=False
+    ).encode("utf-8")
+
+
+def build_index(corpus_dir: str, index_dir: str = DEFAULT_INDEX_DIR) -> dict[str, int]:
+    """建立或增量更新索引；只重新讀取與切詞 mtime/size 有變動的檔案
+
+    Returns:
+        ``{"files", "reused", "updated", "removed", "docs", "terms"}`` 統計
+
+    Raises:
+        FileNotFoundError: 語料目錄不存在
+    """
+    corpus = Path(corpus_dir)
+    if not corpus.is_dir():
+        raise FileNotFoundError(f"找不到語料目錄: {corpus_dir}")
+    out = Path(index_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    previous = _PreviousIndex(out)
+    files: list[dict] = []
+    docs: list[tuple[bytes, dict[str, int]]] = []
+    reused = updated = 0
+    try:
+        for path in _iter_corpus(corpus):
+            rel = path.relative_to(corpus).as_posix()
+            st = path.stat()
+            start = len(docs)
+            entry = previous.unchanged(rel, st)
+            if entry is not None:
+                docs.extend(previous.docs(entry))
+                reused += 1
+            else:
+                for doc in _read_corpus_file(path):
+                    tf = dict(Counter(tokenize(f"{doc['title']}\n{doc['text']}")))
+                    docs.append((_encode_doc(doc), tf))
+                updated += 1
+            files.append(
+                {"file": rel, "mtime": st.st_mtime_ns, "size": st.st_size, "docs": [start, len(docs) - start]}
+            )
+    finally:
+        previous.close()
+    removed = len(set(previous.files) - {f["file"] for f in files})
+
+    # 由各文件的詞頻組成倒排索引與正向索引（不需重新切詞）
+    postings: dict[str, array] = {}
+    lengths = array("I")
+    offsets = array("Q")
+    docs_blob = bytearray()
+    for doc_id, (blob, tf) in enumerate(docs):
+        lengths.append(sum(tf.values()))
+        offsets.append(len(docs_blob))
+        docs_blob += blob
+        for term, count in tf.items():
+            postings.setdefault(term, array("I")).extend((doc_id, count))
+    offsets.append(len(docs_blob))
+
+    terms: dict[str, list[int]] = {}
+    term_ids: dict[str, int] = {}
+    postings_blob = array("I")
+    for term in sorted(postings):
+        pairs = postings[term]
+        term_ids[term] = len(terms)
+        terms[term] = [len(postings_blob) // 2, len(pairs) // 2]
+        postings_blob.extend(pairs)
+
+    tf_blob = array("I")
+    tf_offsets = array("Q")
+    for _, tf in docs:
+        tf_offsets.append(len(tf_blob) // 2)
+        for term, count in tf.items():
+            tf_blob.extend((term_ids[term], count))
+    tf_offsets.append(len(tf_blob) // 2)
+
+    n_docs = len(lengths)
+    lexicon = {
+        "version": INDEX_VERSION,
+        "docs": n_docs,
+        "avgdl": (sum(lengths) / n_docs) if n_docs else 0.0,
+        "terms": terms,
+    }
+    _write_atomic(out / "postings.bin", postings_blob.tobytes())
+    _write_atomic(out / "lengths.bin", lengths.tobytes())
+    _write_atomic(out / "docs.bin", bytes(docs_blob))
+    _write_atomic(out / "docs.idx", offsets.tobytes())
+    _write_atomic(out / "tf.bin", tf_blob.tobytes())
+    _write_atomic(out / "tf.idx", tf_offsets.tobytes())
+    _write_atomic(
+        out / "files.jsonl",
+        "".join(json.dumps(f, ensure_ascii=False) + "\n" for f in files).encode("utf-8"),
+    )
+    # 詞彙表最後寫入，作為索引完成的標記
+    _write_atomic(out / "lexicon.json", json.dumps(lexicon, ensure_ascii=False).encode("utf-8"))
+    return {
+        "files": len(files),
+        "reused": reused,
+        "updated": updated,
+        "removed": removed,
+        "docs": n_docs,
+        "terms": len(terms),
+    }
+
+
+# ---- 查詢 ----
+def _map(path: Path) -> Optional[mmap.mmap]:
+    if path.stat().st_size == 0:
+        return None
+    with path.open("rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _view(mapped: Optional[mmap.mmap], fmt: str) -> memoryview:
+    if mapped is None:
+        return memoryview(b"").cast(fmt)
+    return memoryview(mapped).cast(fmt)
+
+
+def _host_matches(url: str, site: str) -> bool:
+    site = site.lower().removeprefix("site:").strip("/")
+    host = (urlsplit(url).hostname or "").lower()
+    return host == site or host.endswith("." + site)
+
+
+def _snippet(text: str, terms: set[str]) -> str:
+    text = _WHITESPACE.sub(" ", text).strip()
+    lowered = unicodedata.normalize("NFKC", text).lower()
+    hits = [i for t in terms if (i := lowered.find(t)) >= 0]
+    start = max(0, min(hits) - _SNIPPET_CHARS // 4) if hits else 0
+    snippet = text[start : start + _SNIPPET_CHARS]
+    return ("…" if start else "") + snippet + ("…" if start + _SNIPPET_CHARS < len(text) else "")
+
+
+class LocalSearchIndex:
+    """唯讀的 BM25 索引；postings、文件長度與內容皆以 mmap 存取，不整份載入記憶體
+
+    Args:
+        index_dir: ``build_index`` 產生的索引目錄
+        k1, b:     BM25 參數
+    """
+
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR, k1: float = 1.5, b: float = 0.75) -> None:
+        self.index_dir = Path(index_dir)
+        self.k1 = k1
+        self.b = b
+        with (self.index_dir / "lexicon.json").open("r", encoding="utf-8") as f:
+            lexicon = json.load(f)
+        self.n_docs: int = lexicon["docs"]
+        self.avgdl: float = lexicon["avgdl"] or 1.0
+        self._terms: dict[str, list[int]] = lexicon["terms"]
+        self._maps = [_map(self.index_dir / name) for name in ("postings.bin", "lengths.bin", "docs.bin", "docs.idx")]
+        self._postings = _view(self._maps[0], "I")
+        self._lengths = _view(self._maps[1], "I")
+        self._docs = self._maps[2]
+        self._offsets = _view(self._maps[3], "Q")
+
+    def close(self) -> None:
+        for view in (self._postings, self._lengths, self._offsets):
+            view.release()
+        for mapped in self._maps:
+            if mapped is not None:
+                mapped.close()
+
+    def document(self, doc_id: int) -> dict:
+        start, end = self._offsets[doc_id], self._offsets[doc_id + 1]
+        return json.loads(self._docs[start:end].decode("utf-8"))
+
+    def scores(self, query: str) -> dict[int, float]:
+        """以 BM25 計算含任一查詢詞的文件分數"""
+        scores: dict[int, float] = {}
+        k1, b, avgdl = self.k1, self.b, self.avgdl
+        for term, qtf in Counter(tokenize(query)).items():
+            entry = self._terms.get(term)
+            if entry is None:
+                continue
+            offset, df = entry
+            idf = math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            pairs = self._postings[offset * 2 : (offset + df) * 2]
+            for i in range(0, len(pairs), 2):
+                doc_id, tf = pairs[i], pairs[i + 1]
+                norm = tf + k1 * (1 - b + b * self._lengths[doc_id] / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + qtf * idf * tf * (k1 + 1) / norm
+        return scores
+
+    def search(self, query: str, top_k: int = 5, site: Optional[str] = None) -> list[dict]:
+        """回傳 ``[{"title", "url", "snippet"}]``；查詢中的 ``site:網域`` 亦視為站點過濾"""
+        sites = _SITE.findall(query)
+        if site:
+            sites.append(site)
+        query = _SITE.sub(" ", query)
+        ranked = sorted(self.scores(query).items(), key=lambda item: (-item[1], item[0]))
+        terms = set(tokenize(query))
+        results: list[dict] = []
+        for doc_id, _ in ranked:
+            doc = self.document(doc_id)
+            if sites and not any(_host_matches(doc["url"], s) for s in sites):
+                continue
+            results.append(
+                {"title": doc["title"], "url": doc["url"], "snippet": _snippet(doc["text"] or doc["title"], terms)}
+            )
+            if len(results) >= top_k:
+                break
+        return results
+
+
+_index: Optional[LocalSearchIndex] = None
+
+
+def get_local_index() -> LocalSearchIndex:
+    """取得共用索引（路徑由 ``JUDGE_LOCAL_INDEX`` 設定）"""
+    global _index
+    if _index is None:
+        _index = LocalSearchIndex(os.getenv("JUDGE_LOCAL_INDEX") or DEFAULT_INDEX_DIR)
+    return _index
+
+
+def local_search(query: str, top_k: int = 5) -> dict:
+    """在本地語料中搜尋，回傳與 CuratorOutput 相同格式的結果。
+
+    Args:
+        query: 搜尋查詢；可包含 ``site:網域`` 過濾
+        top_k: 回傳前幾筆結果
+
+    Returns:
+        ``{"query": query, "results": [{"title", "url", "snippet"}, ...]}``
+    """
+    return {"query": query, "results": get_local_index().search(query, top_k=top_k)}
+
+
+def _main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m judge.tools.local_search")
+    sub = parser.add_subparsers(dest="command", required=True)
+    index_cmd = sub.add_parser("index", help="建立或增量更新索引")
+    index_cmd.add_argument("corpus")
+    index_cmd.add_argument("--index", default=os.getenv("JUDGE_LOCAL_INDEX") or DEFAULT_INDEX_DIR)
+    search_cmd = sub.add_parser("search", help="以索引查詢")
+    search_cmd.add_argument("query")
+    search_cmd.add_argument("--index", default=os.getenv("JUDGE_LOCAL_INDEX") or DEFAULT_INDEX_DIR)
+    search_cmd.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "index":
+        print(json.dumps(build_index(args.corpus, args.index), ensure_ascii=False))
+    else:
+        index = LocalSearchIndex(args.index)
+        print(json.dumps(index.search(args.query, top_k=args.top_k), ensure_ascii=False, indent=2))
+        index.close()
+
+
+if __name__ == "__main__":
+    _main()
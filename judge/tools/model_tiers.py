@@ -0,0 +1,177 @@
+"""模型分級路由：純整理/驗證的代理改用最便宜的模型，輸出不合 schema 時才升級重試。
+
+預設將名稱符合 ``*_schema_validator`` 的代理（如 ``curator_schema_validator``、
+``fact_check_schema_validator``）路由到 ``lite`` 級模型；``historian_schema_agent`` 需自行
+建立時間軸與比對宣傳模式，並非純驗證，不在預設路由內。設有 ``output_schema`` 且不使用工具的
+代理會換成 ``TieredLlm``：先以便宜模型產生回應，
+若無法通過 ``output_schema`` 驗證，改以代理原本的模型重新產生；``model_router.stats()``
+回報各代理的呼叫次數與升級率。
+
+設定（環境變數）：
+
+- ``JUDGE_MODEL_TIERING``：``0`` 停用
+- ``JUDGE_MODEL_LITE``：``lite`` 級模型（預設 ``gemini-2.5-flash-lite``）
+- ``JUDGE_MODEL_ROUTES``：以逗號分隔的 ``代理名稱模式=模型或級別``，覆寫或追加預設路由，
+  如 ``jury=gemini-2.5-pro,weight_schema_validator=standard``；``standard`` 表示沿用原模型
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from collections import Counter
+from fnmatch import fnmatch
+from typing import Any, AsyncGenerator, Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from pydantic import BaseModel, ValidationError
+
+from .agent_tree import iter_llm_agents
+
+logger = logging.getLogger(__name__)
+
+_AGENT_LABEL = "adk_agent_name"
+
+DEFAULT_ROUTES: dict[str, str] = {
+    "*_schema_validator": "lite",
+}
+
+
+def _agent_name(llm_request: LlmRequest) -> str:
+    labels = llm_request.config.labels if llm_request.config else None
+    return (labels or {}).get(_AGENT_LABEL, "")
+
+
+def _response_text(responses: list[LlmResponse]) -> str:
+    final = [r for r in responses if not r.partial] or responses
+    parts = final[-1].content.parts if final and final[-1].content else None
+    return "".join(p.text for p in parts or [] if p.text and not p.thought)
+
+
+def schema_valid(responses: list[LlmResponse], schema: type[BaseModel]) -> bool:
+    """回應是否能通過 ``output_schema`` 驗證（與 LlmAgent 儲存輸出時的檢查相同）"""
+    if not responses or any(r.error_code for r in responses):
+        return False
+    try:
+        schema.model_validate_json(_response_text(responses))
+    except (ValidationError, ValueError):
+        return False
+    return True
+
+
+class ModelRouter:
+    """依代理名稱模式決定模型，並統計各代理的呼叫與升級次數
+
+    Args:
+        routes: ``{代理名稱模式: 模型名稱或級別}``；後加入的模式優先
+        tiers:  ``{級別: 模型名稱}``；``standard`` 固定表示代理原本的模型
+    """
+
+    def __init__(self, routes: dict[str, str], tiers: dict[str, str]) -> None:
+        self.routes = dict(routes)
+        self.tiers = dict(tiers)
+        self.calls: Counter[str] = Counter()
+        self.escalations: Counter[str] = Counter()
+
+    def route(self, agent: LlmAgent) -> Optional[str]:
+        """回傳代理應使用的模型；不需改變時回傳 None"""
+        target = None
+        for pattern, value in self.routes.items():
+            if fnmatch(agent.name, pattern):
+                target = value
+        if target is None or target == "standard":
+            return None
+        model = self.tiers.get(target, target)
+        current = agent.canonical_model.model
+        return None if model == current else model
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            name: {
+                "calls": self.calls[name],
+                "escalations": self.escalations[name],
+                "escalation_rate": self.escalations[name] / self.calls[name] if self.calls[name] else 0.0,
+            }
+            for name in sorted(self.calls)
+        }
+
+    def install(self, root: BaseAgent) -> dict[str, str]:
+        """套用路由，回傳 ``{代理名稱: 模型}``"""
+        installed = {}
+        for agent in iter_llm_agents(root):
+            if isinstance(agent.model, TieredLlm):
+                continue
+            model = self.route(agent)
+            if model is None:
+                continue
+            primary = LLMRegistry.new_llm(model)
+            if agent.output_schema is not None and not agent.tools:
+                # 僅有 output_schema 的代理可在驗證失敗時升級回原模型
+                fallback = agent.canonical_model
+                agent.model = TieredLlm(
+                    model=model, primary=primary, fallback=fallback, output_schema=agent.output_schema, router=self
+                )
+            else:
+                agent.model = primary
+            installed[agent.name] = model
+        return installed
+
+
+class TieredLlm(BaseLlm):
+    """先以 ``primary`` 產生回應；未通過 ``output_schema`` 驗證時改以 ``fallback`` 重新產生"""
+
+    primary: BaseLlm
+    fallback: BaseLlm
+    output_schema: type[BaseModel]
+    router: ModelRouter
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        agent_name = _agent_name(llm_request)
+        self.router.calls[agent_name] += 1
+        request = llm_request.model_copy(update={"model": self.primary.model})
+        # 先收齊便宜模型的回應，驗證通過才往外輸出
+        responses = [r async for r in self.primary.generate_content_async(request, stream=stream)]
+        if schema_valid(responses, self.output_schema):
+            for response in responses:
+                yield response
+            return
+        self.router.escalations[agent_name] += 1
+        logger.info(f"{agent_name} 的 {self.primary.model} 輸出未通過 {self.output_schema.__name__} 驗證，改用 {self.fallback.model}")
+        request = llm_request.model_copy(update={"model": self.fallback.model})
+        async for response in self.fallback.generate_content_async(request, stream=stream):
+            yield response
+
+
+def _parse_routes(value: Optional[str]) -> dict[str, str]:
+    routes = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            pattern, target = item.split("=", 1)
+            routes[pattern.strip()] = target.strip()
+    return routes
+
+
+def _create_model_router() -> Optional[ModelRouter]:
+    if os.getenv("JUDGE_MODEL_TIERING", "1") == "0":
+        return None
+    return ModelRouter(
+        routes={**DEFAULT_ROUTES, **_parse_routes(os.getenv("JUDGE_MODEL_ROUTES"))},
+        tiers={"lite": os.getenv("JUDGE_MODEL_LITE") or "gemini-2.5-flash-lite"},
+    )
+
+
+model_router: Optional[ModelRouter] = _create_model_router()
+
+
+def install_model_tiers(root: BaseAgent) -> dict[str, str]:
+    """依設定為 root 之下的 LlmAgent 套用模型分級路由"""
+    if model_router is None:
+        return {}
+    return model_router.install(root)
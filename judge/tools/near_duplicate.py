@@ -0,0 +1,308 @@
+"""近似重複新聞偵測：以 MinHash/LSH 指紋比對輸入新聞與已歸檔的判定（舊聞新炒）。
+
+每次 ``root_agent`` 完成後，將新聞文字的 MinHash 簽章連同 ``final_report_json`` /
+``weight_calculation_json`` 歸檔。新請求進來時先以 LSH 分桶找出候選，再以簽章
+估計 Jaccard 相似度：
+
+- 達 ``reuse_threshold`` 且判定仍新鮮：直接寫回歸檔判定並略過整條流程
+- 達 ``seed_threshold``：將歸檔判定放入 ``state['archived_verdict']`` 供 Synthesizer 參考
+
+判定「新鮮」指歸檔未超過 ``ttl`` 秒，且兩則新聞的 ``news_date`` 相差不超過
+``date_window`` 天（任一方沒有日期時只看 ``ttl``）。初篩略過辯論所產生的精簡報告
+（``state['prescreen']['shortcut']``）不歸檔，避免之後的相似新聞沿用未經完整流程的判定。
+
+設定（環境變數）：``JUDGE_DEDUP``（``1`` 啟用，預設停用）、``JUDGE_DEDUP_PATH``、
+``JUDGE_DEDUP_THRESHOLD``、``JUDGE_DEDUP_SEED``、``JUDGE_DEDUP_TTL``（秒）、
+``JUDGE_DEDUP_DATE_WINDOW``（天）。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from datetime import date
+from typing import Any, Optional
+
+from google.genai import types
+
+from .file_io import ensure_parent_dir, to_jsonable
+from .llm_cache import llm_mode
+from .knowledge_base import request_text
+
+logger = logging.getLogger(__name__)
+
+VERDICT_KEYS = ("final_report_json", "weight_calculation_json")
+ARCHIVED_VERDICT_KEY = "archived_verdict"
+DEDUP_MATCH_KEY = "dedup_match"
+# 與 judge.agents.prescreen.agent.PRESCREEN_KEY 相同
+PRESCREEN_KEY = "prescreen"
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE = 5
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(20240607)
+_PERMS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+_NOISE = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def _normalize(text: str) -> str:
+    # 去除空白與標點：轉貼常只改排版或標點
+    return _NOISE.sub("", unicodedata.normalize("NFKC", text or "").lower())
+
+
+def shingles(text: str) -> set[int]:
+    """字元 ``SHINGLE``-gram 的 64 位元雜湊集合"""
+    text = _normalize(text)
+    if len(text) <= SHINGLE:
+        grams = {text} if text else set()
+    else:
+        grams = {text[i : i + SHINGLE] for i in range(len(text) - SHINGLE + 1)}
+    return {
+        int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "little")
+        for g in grams
+    }
+
+
+def minhash_signature(text: str) -> array:
+    """回傳長度 ``NUM_PERM`` 的 MinHash 簽章（``array('Q')``）"""
+    hashes = shingles(text)
+    if not hashes:
+        return array("Q", [_MERSENNE] * NUM_PERM)
+    return array("Q", (min((a * x + b) % _MERSENNE for x in hashes) for a, b in _PERMS))
+
+
+def estimate_similarity(sig_a: array, sig_b: array) -> float:
+    """以相同位置的最小雜湊比例估計 Jaccard 相似度"""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def _band_keys(signature: array) -> list[str]:
+    return [
+        hashlib.blake2b(signature[i * ROWS : (i + 1) * ROWS].tobytes(), digest_size=8).hexdigest()
+        for i in range(BANDS)
+    ]
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        return None
+
+
+class VerdictArchive:
+    """SQLite 判定歸檔與 LSH 分桶索引
+
+    Args:
+        path:            SQLite 檔案
+        reuse_threshold: 直接沿用判定的相似度門檻
+        seed_threshold:  提供歸檔判定作為參考的相似度門檻
+        ttl:             歸檔判定可沿用的秒數
+        date_window:     兩則新聞 ``news_date`` 可相差的天數
+    """
+
+    def __init__(
+        self,
+        path: str = ".cache/verdicts.sqlite",
+        reuse_threshold: float = 0.9,
+        seed_threshold: float = 0.7,
+        ttl: float = 30 * 24 * 3600,
+        date_window: int = 7,
+    ) -> None:
+        self.path = path
+        self.reuse_threshold = reuse_threshold
+        self.seed_threshold = seed_threshold
+        self.ttl = ttl
+        self.date_window = date_window
+        self.reused = 0
+        self.seeded = 0
+        self.misses = 0
+        self.archived = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            ensure_parent_dir(self.path)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS verdicts (
+                    id INTEGER PRIMARY KEY,
+                    news_date TEXT,
+                    created REAL NOT NULL,
+                    signature BLOB NOT NULL,
+                    verdict TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS verdict_bands (
+                    band INTEGER NOT NULL,
+                    bucket TEXT NOT NULL,
+                    verdict_id INTEGER NOT NULL,
+                    PRIMARY KEY (band, bucket, verdict_id)
+                ) WITHOUT ROWID;
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "reused": self.reused,
+            "seeded": self.seeded,
+            "misses": self.misses,
+            "archived": self.archived,
+        }
+
+    def archive(self, text: str, verdict: dict[str, Any], news_date: Optional[str] = None) -> int:
+        """歸檔判定並寫入 LSH 分桶，回傳歸檔 id"""
+        signature = minhash_signature(text)
+        body = json.dumps(verdict, ensure_ascii=False, default=to_jsonable)
+        with self._lock:
+            db = self._db()
+            with db:
+                verdict_id = db.execute(
+                    "INSERT INTO verdicts (news_date, created, signature, verdict) VALUES (?, ?, ?, ?)",
+                    (news_date, time.time(), signature.tobytes(), body),
+                ).lastrowid
+                db.executemany(
+                    "INSERT OR IGNORE INTO verdict_bands (band, bucket, verdict_id) VALUES (?, ?, ?)",
+                    ((band, bucket, verdict_id) for band, bucket in enumerate(_band_keys(signature))),
+                )
+            self.archived += 1
+        return verdict_id
+
+    def _fresh(self, created: float, archived_date: Optional[str], news_date: Optional[str]) -> bool:
+        if time.time() - created > self.ttl:
+            return False
+        a, b = _parse_date(archived_date), _parse_date(news_date)
+        if a is None or b is None:
+            return True
+        return abs((a - b).days) <= self.date_window
+
+    def match(self, text: str, news_date: Optional[str] = None) -> Optional[dict[str, Any]]:
+        """找出最相似且仍新鮮的歸檔判定
+
+        Returns:
+            ``{"id", "similarity", "news_date", "verdict"}``；無候選時回傳 None
+        """
+        signature = minhash_signature(text)
+        best: Optional[dict[str, Any]] = None
+        with self._lock:
+            db = self._db()
+            candidates: set[int] = set()
+            for band, bucket in enumerate(_band_keys(signature)):
+                candidates.update(
+                    vid
+                    for (vid,) in db.execute(
+                        "SELECT verdict_id FROM verdict_bands WHERE band = ? AND bucket = ?", (band, bucket)
+                    )
+                )
+            for vid in candidates:
+                row = db.execute(
+                    "SELECT news_date, created, signature, verdict FROM verdicts WHERE id = ?", (vid,)
+                ).fetchone()
+                if row is None or not self._fresh(row[1], row[0], news_date):
+                    continue
+                similarity = estimate_similarity(signature, array("Q", row[2]))
+                if best is None or similarity > best["similarity"] or (
+                    similarity == best["similarity"] and vid > best["id"]
+                ):
+                    best = {"id": vid, "similarity": similarity, "news_date": row[0], "verdict": row[3]}
+        if best is not None:
+            best["verdict"] = json.loads(best["verdict"])
+        return best
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ---- ADK agent callbacks（掛在 root_agent）----
+    def before_pipeline(self, callback_context=None, **_):
+        """相似度足夠時沿用或提供歸檔判定"""
+        if callback_context is None:
+            return None
+        text = request_text(callback_context)
+        if not text:
+            return None
+        state = callback_context.state
+        try:
+            found = self.match(text, state.get("news_date"))
+        except sqlite3.Error as e:
+            logger.warning(f"判定歸檔查詢失敗，改為完整執行: {e}")
+            return None
+        if found is None or found["similarity"] < self.seed_threshold:
+            self.misses += 1
+            return None
+        match = {"id": found["id"], "similarity": found["similarity"], "news_date": found["news_date"]}
+        state[DEDUP_MATCH_KEY] = match
+        if found["similarity"] >= self.reuse_threshold:
+            self.reused += 1
+            for key in VERDICT_KEYS:
+                if key in found["verdict"]:
+                    state[key] = found["verdict"][key]
+            return types.Content(
+                role="model",
+                parts=[types.Part(text=f"沿用相似新聞的既有判定（相似度 {found['similarity']:.2f}）")],
+            )
+        self.seeded += 1
+        state[ARCHIVED_VERDICT_KEY] = found["verdict"]
+        return None
+
+    def after_pipeline(self, callback_context=None, **_):
+        """完整執行後歸檔本次判定"""
+        if callback_context is None:
+            return None
+        state = callback_context.state
+        prescreen = state.get(PRESCREEN_KEY)
+        if isinstance(prescreen, dict) and prescreen.get("shortcut"):
+            return None
+        text = request_text(callback_context)
+        verdict = {key: state.get(key) for key in VERDICT_KEYS if state.get(key)}
+        if not text or not verdict:
+            return None
+        try:
+            self.archive(text, verdict, state.get("news_date"))
+        except sqlite3.Error as e:
+            logger.warning(f"判定歸檔寫入失敗: {e}")
+        return None
+
+
+def _create_verdict_archive() -> Optional[VerdictArchive]:
+    if os.getenv("JUDGE_DEDUP", "0") != "1" or llm_mode() != "live":
+        return None
+    return VerdictArchive(
+        path=os.getenv("JUDGE_DEDUP_PATH") or ".cache/verdicts.sqlite",
+        reuse_threshold=float(os.getenv("JUDGE_DEDUP_THRESHOLD") or 0.9),
+        seed_threshold=float(os.getenv("JUDGE_DEDUP_SEED") or 0.7),
+        ttl=float(os.getenv("JUDGE_DEDUP_TTL") or 30 * 24 * 3600),
+        date_window=int(os.getenv("JUDGE_DEDUP_DATE_WINDOW") or 7),
+    )
+
+
+verdict_archive: Optional[VerdictArchive] = _create_verdict_archive()
+
+
+def verdict_callbacks() -> dict[str, Any]:
+    """供 root_agent 展開的 before/after agent callback 參數"""
+    if verdict_archive is None:
+        return {}
+    return {
+        "before_agent_callback": verdict_archive.before_pipeline,
+        "after_agent_callback": verdict_archive.after_pipeline,
+    }
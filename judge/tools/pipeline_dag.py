@@ -0,0 +1,199 @@
+"""依 state 相依關係並行執行的管線：取代固定順序的 ``SequentialAgent``。
+
+每個階段的讀寫鍵由其子樹中的代理推斷：
+
+- 讀取：instruction 中的 ``{key}`` / ``{key?}`` 佔位符與 ``state['key']`` 引用
+- 寫入：各代理的 ``output_key``（含自訂代理的 ``output_key`` 欄位）
+
+回呼中讀寫的鍵無法推斷，可用 ``extra_reads`` / ``extra_writes`` 補充；推斷不到任何
+讀取的階段視為屏障（等待之前所有階段，之後的階段也都等待它）。後面的階段與前面的
+階段有 寫→讀、讀→寫 或 寫→寫 重疊時需等待前者完成，其餘可同時執行。
+
+為了結果可重現，每個階段在「執行前的 Session + 其所有前置階段的事件（依宣告順序）」
+的副本上執行，看到的 state 與對話內容不受其他並行階段完成時間影響；產生的事件先暫存，
+再依階段宣告順序交給 Runner 寫入 Session。
+
+回呼直接寫入 Session 的側通道事件（``bind_session`` 注入的 ``append_event``）經
+``defer_in_stage`` 包裝：在階段內呼叫時只排入該階段的暫存，與階段事件一起依宣告順序寫入。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import re
+from typing import Any, AsyncGenerator, Awaitable, Callable, Iterable, Optional, Union
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.sessions.session import Session
+
+from .agent_tree import iter_agents
+
+_PLACEHOLDER = re.compile(r"{+([^{}]*)}+")
+_STATE_REF = re.compile(r"""state\[\s*['"]([^'"]+)['"]\s*\]""")
+_PREFIXES = ("app:", "user:", "temp:")
+
+# 目前階段的暫存：階段事件與延後的側通道寫入（每個階段的 task 各自設定）
+_StageItem = Union[Event, Callable[[], Awaitable[Any]]]
+_stage_buffer: contextvars.ContextVar[Optional[list[_StageItem]]] = contextvars.ContextVar(
+    "judge_dag_stage_buffer", default=None
+)
+
+
+def defer_in_stage(append_fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """包裝側通道寫入函式：在 ``DagAgent`` 階段內呼叫時延後到該階段依宣告順序輸出時才寫入
+
+    延後時立即回傳傳入的事件；不在階段內時直接呼叫 ``append_fn``。
+    """
+
+    @functools.wraps(append_fn)
+    async def _append(event: Event, *args, **kwargs):
+        buffer = _stage_buffer.get()
+        if buffer is None:
+            return await append_fn(event, *args, **kwargs)
+        # 輸出時再經包裝呼叫，巢狀 DagAgent 會轉交外層階段的暫存
+        buffer.append(functools.partial(_append, event, *args, **kwargs))
+        return event
+
+    return _append
+
+
+def _placeholder_key(text: str) -> Optional[str]:
+    key = text.strip().removesuffix("?")
+    for prefix in _PREFIXES:
+        key = key.removeprefix(prefix)
+    return key if key.isidentifier() else None
+
+
+def instruction_reads(instruction: Any) -> set[str]:
+    """從 instruction 字串推斷讀取的 state 鍵"""
+    if not isinstance(instruction, str):
+        return set()
+    keys = {k for m in _PLACEHOLDER.finditer(instruction) if (k := _placeholder_key(m.group(1)))}
+    keys.update(m.group(1) for m in _STATE_REF.finditer(instruction))
+    return keys
+
+
+def stage_reads(stage: BaseAgent) -> set[str]:
+    reads: set[str] = set()
+    for agent in iter_agents(stage):
+        if isinstance(agent, LlmAgent):
+            reads |= instruction_reads(agent.instruction) | instruction_reads(agent.global_instruction)
+    return reads
+
+
+def stage_writes(stage: BaseAgent) -> set[str]:
+    return {key for agent in iter_agents(stage) if isinstance(key := getattr(agent, "output_key", None), str)}
+
+
+def plan_dependencies(
+    stages: list[BaseAgent],
+    extra_reads: Optional[dict[str, Iterable[str]]] = None,
+    extra_writes: Optional[dict[str, Iterable[str]]] = None,
+) -> list[set[int]]:
+    """回傳每個階段需等待的前置階段索引"""
+    extra_reads = extra_reads or {}
+    extra_writes = extra_writes or {}
+    reads = [stage_reads(s) | set(extra_reads.get(s.name, ())) for s in stages]
+    writes = [stage_writes(s) | set(extra_writes.get(s.name, ())) for s in stages]
+    barriers = [not r for r in reads]
+    deps: list[set[int]] = []
+    for j in range(len(stages)):
+        deps.append(
+            {
+                i
+                for i in range(j)
+                if barriers[i]
+                or barriers[j]
+                or writes[i] & reads[j]
+                or reads[i] & writes[j]
+                or writes[i] & writes[j]
+            }
+        )
+    return deps
+
+
+def _apply(session: Session, event: Event) -> None:
+    delta = event.actions.state_delta if event.actions else None
+    for key, value in (delta or {}).items():
+        if not key.startswith("temp:"):
+            session.state[key] = value
+    session.events.append(event)
+
+
+class DagAgent(BaseAgent):
+    """依推斷的相依關係並行執行 ``sub_agents``，事件依宣告順序輸出
+
+    Attributes:
+        extra_reads:  ``{階段名稱: 額外讀取的鍵}``，補充回呼中讀取的 state
+        extra_writes: ``{階段名稱: 額外寫入的鍵}``，補充回呼中寫入的 state
+    """
+
+    extra_reads: dict[str, list[str]] = {}
+    extra_writes: dict[str, list[str]] = {}
+
+    def plan(self) -> list[tuple[str, list[str]]]:
+        """回傳 ``[(階段名稱, 需等待的階段名稱)]``，供檢視推斷結果"""
+        deps = plan_dependencies(self.sub_agents, self.extra_reads, self.extra_writes)
+        return [
+            (stage.name, [self.sub_agents[i].name for i in sorted(d)])
+            for stage, d in zip(self.sub_agents, deps)
+        ]
+
+    def _fork(self, ctx: InvocationContext, base: Session, outputs: dict[int, list[_StageItem]], ancestors: set[int]) -> InvocationContext:
+        session = base.model_copy(update={"state": dict(base.state), "events": list(base.events)})
+        for i in sorted(ancestors):
+            for item in outputs[i]:
+                if isinstance(item, Event):
+                    _apply(session, item)
+        return ctx.model_copy(update={"session": session})
+
+    async def _run_stage(self, stage: BaseAgent, ctx: InvocationContext, buffer: list[_StageItem]) -> None:
+        # 只影響此階段的 task（create_task 會複製 context）
+        _stage_buffer.set(buffer)
+        async for event in stage.run_async(ctx):
+            # 階段內後續步驟需看到自己先前的輸出
+            _apply(ctx.session, event)
+            buffer.append(event)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        stages = self.sub_agents
+        deps = plan_dependencies(stages, self.extra_reads, self.extra_writes)
+        ancestors: list[set[int]] = []
+        for d in deps:
+            ancestors.append(set(d).union(*(ancestors[i] for i in d)))
+
+        base = ctx.session.model_copy(
+            update={"state": dict(ctx.session.state), "events": list(ctx.session.events)}
+        )
+        outputs: dict[int, list[_StageItem]] = {}
+        tasks: dict[int, asyncio.Task] = {}
+        done: set[int] = set()
+        committed = 0
+        try:
+            while committed < len(stages):
+                for j in range(len(stages)):
+                    if j not in tasks and deps[j] <= done:
+                        outputs[j] = []
+                        stage_ctx = self._fork(ctx, base, outputs, ancestors[j])
+                        tasks[j] = asyncio.create_task(self._run_stage(stages[j], stage_ctx, outputs[j]))
+                running = [tasks[j] for j in tasks if j not in done]
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    task.result()
+                done |= {j for j, task in tasks.items() if task.done()}
+                # 依宣告順序輸出已完成階段的事件
+                while committed in done:
+                    for item in outputs[committed]:
+                        if isinstance(item, Event):
+                            yield item
+                        else:
+                            await item()
+                    committed += 1
+        finally:
+            for task in tasks.values():
+                task.cancel()
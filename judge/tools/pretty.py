@@ -0,0 +1,61 @@
+"""結構化輸出的延遲美化檢視：僅在匯出 Session（``export_session`` 的 ``pretty`` 欄位）時才產生 pretty JSON，並依事件快取。"""
+
+from __future__ import annotations
+
+import json
+from collections import OrderedDict
+from typing import Any, Optional
+
+from google.adk.events.event import Event
+
+PRETTY_METADATA_KEY = "pretty_key"
+
+# 未標記的事件中，預設以美化方式檢視的 state 鍵
+PRETTY_KEYS = ("jury_result", "final_report_json")
+
+_PRETTY_CACHE_MAX = 256
+_pretty_cache: OrderedDict[str, str] = OrderedDict()
+
+
+def pretty_metadata(key: str) -> dict[str, Any]:
+    """標記事件中需以 pretty JSON 檢視的 state 鍵（寫入 ``Event.custom_metadata``）"""
+    return {PRETTY_METADATA_KEY: key}
+
+
+def _pretty_target(event: Event) -> Optional[str]:
+    metadata = getattr(event, "custom_metadata", None) or {}
+    key = metadata.get(PRETTY_METADATA_KEY)
+    if key:
+        return key
+    actions = getattr(event, "actions", None)
+    state_delta = getattr(actions, "state_delta", None) or {}
+    return next((k for k in PRETTY_KEYS if k in state_delta), None)
+
+
+def render_pretty(data: Any) -> str:
+    try:
+        if hasattr(data, "model_dump"):
+            data = data.model_dump()
+        return json.dumps(data, ensure_ascii=False, indent=2)
+    except Exception:
+        # 退回為字串
+        return str(data)
+
+
+def pretty_message(event: Event) -> Optional[str]:
+    """回傳事件結構化輸出的 pretty JSON；結果依事件 id 快取，非結構化事件回傳 None"""
+    key = _pretty_target(event)
+    if key is None:
+        return None
+    state_delta = event.actions.state_delta if event.actions else {}
+    if state_delta.get(key) is None:
+        return None
+    cached = _pretty_cache.get(event.id)
+    if cached is not None:
+        _pretty_cache.move_to_end(event.id)
+        return cached
+    message = render_pretty(state_delta[key])
+    _pretty_cache[event.id] = message
+    while len(_pretty_cache) > _PRETTY_CACHE_MAX:
+        _pretty_cache.popitem(last=False)
+    return message
@@ -0,0 +1,319 @@
+"""搜尋結果快取：所有使用 GoogleSearchTool 的工具執行者共用。
+
+GoogleSearchTool 為模型端內建工具，搜尋在模型呼叫中完成，無法在本地攔截
+單一查詢；因此快取掛在工具執行者的模型呼叫上（ADK before/after model
+callback）。鍵為模型、生成設定與正規化後的查詢內容（不含各代理的 instruction），
+值為回應的 grounding 結果（搜尋查詢、來源與引用片段），而非整個回應；命中時
+把快取的搜尋結果附加到 instruction 並移除搜尋工具，模型仍依各自的 instruction
+作答，因此不同代理可共用同一次搜尋，省下搜尋延遲與配額。完整回應的重用由
+``judge.tools.llm_cache`` 負責。
+
+設定（環境變數）：
+- ``JUDGE_SEARCH_CACHE``：設為 ``1`` 啟用（預設停用）
+- ``JUDGE_SEARCH_CACHE_PATH``：磁碟快取檔案（預設 ``.cache/search_cache.sqlite``；空字串表示僅用記憶體）
+- ``JUDGE_SEARCH_CACHE_TTL`` / ``JUDGE_SEARCH_CACHE_FRESH_TTL``：一般與時效性查詢的存活秒數
+- ``JUDGE_SEARCH_BACKEND``：``google``（預設）或 ``local``；``local`` 改用
+  ``judge.tools.local_search`` 的離線 BM25 索引（索引目錄 ``JUDGE_LOCAL_INDEX``），
+  此時搜尋為本地函式呼叫，不再掛模型快取
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Optional
+
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.function_tool import FunctionTool
+from google.adk.tools.google_search_tool import GoogleSearchTool
+from google.genai import types
+
+from .file_io import ensure_parent_dir
+from .llm_cache import _CONFIG_EXCLUDE, _fallback, llm_mode
+
+logger = logging.getLogger(__name__)
+
+# 含這些字詞的查詢視為時效性查詢，採用較短的 TTL
+_FRESHNESS_MARKERS = ("今天", "今日", "最新", "即時", "快訊", "剛剛", "latest", "today", "breaking")
+_PUNCTUATION = re.compile(r"[\s\W_]+", re.UNICODE)
+# instruction 與工具因代理而異，不納入鍵，其餘生成設定（溫度、schema 等）仍納入
+_KEY_CONFIG_EXCLUDE = _CONFIG_EXCLUDE | {"system_instruction", "tools", "tool_config"}
+_MAX_SNIPPETS = 20
+
+# 所有代理共用同一個 GoogleSearchTool 實例
+google_search = GoogleSearchTool()
+
+
+def normalize_query(text: str) -> str:
+    """正規化查詢：NFKC、轉小寫、標點與空白合併為單一空白"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return _PUNCTUATION.sub(" ", text).strip()
+
+
+def request_query(llm_request: LlmRequest) -> str:
+    """請求中的查詢內容：只取對話內容文字，不含各代理的 instruction"""
+    parts: list[str] = []
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            if part.text:
+                parts.append(part.text)
+    return normalize_query("\n".join(parts))
+
+
+def request_key(llm_request: LlmRequest, query: str) -> str:
+    """快取鍵：模型 + 生成設定 + 正規化查詢"""
+    config = llm_request.config
+    payload = {
+        "model": llm_request.model,
+        "config": (
+            config.model_dump(mode="json", exclude_none=True, exclude=_KEY_CONFIG_EXCLUDE, fallback=_fallback)
+            if config is not None
+            else None
+        ),
+        "query": query,
+    }
+    blob = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def grounding_results(llm_response: LlmResponse) -> Optional[dict[str, Any]]:
+    """自回應的 grounding metadata 取出搜尋查詢、來源與引用片段；未搜尋時回傳 None"""
+    metadata = llm_response.grounding_metadata
+    if metadata is None:
+        return None
+    sources = [
+        {"title": chunk.web.title, "uri": chunk.web.uri}
+        for chunk in metadata.grounding_chunks or []
+        if chunk.web is not None and chunk.web.uri
+    ]
+    if not sources:
+        return None
+    snippets = [
+        support.segment.text
+        for support in metadata.grounding_supports or []
+        if support.segment is not None and support.segment.text
+    ]
+    return {
+        "queries": list(metadata.web_search_queries or []),
+        "sources": sources,
+        "snippets": list(dict.fromkeys(snippets))[:_MAX_SNIPPETS],
+    }
+
+
+def _drop_search_tools(llm_request: LlmRequest) -> None:
+    config = llm_request.config
+    if config is None or not config.tools:
+        return
+    tools = [
+        t
+        for t in config.tools
+        if not (isinstance(t, types.Tool) and (t.google_search or t.google_search_retrieval))
+    ]
+    config.tools = tools or None
+
+
+def _render_results(results: dict[str, Any]) -> str:
+    lines = ["以下為先前相同查詢的搜尋結果（快取），請直接據此作答，來源以下列網址為準："]
+    if results.get("queries"):
+        lines.append("搜尋查詢：" + "；".join(results["queries"]))
+    lines += [f"- {s.get('title') or s['uri']}: {s['uri']}" for s in results["sources"]]
+    if results.get("snippets"):
+        lines.append("引用片段：")
+        lines += [f"- {text}" for text in results["snippets"]]
+    return "\n".join(lines)
+
+
+class SearchCache:
+    """記憶體 LRU + SQLite 磁碟的搜尋結果快取
+
+    Args:
+        path:        磁碟快取檔案；None 表示僅使用記憶體
+        ttl:         一般查詢的存活秒數
+        fresh_ttl:   含時效性字詞查詢的存活秒數
+        max_entries: 記憶體 LRU 的項目上限
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = 6 * 3600,
+        fresh_ttl: float = 15 * 60,
+        max_entries: int = 512,
+    ) -> None:
+        self.ttl = ttl
+        self.fresh_ttl = fresh_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._inflight: dict[tuple[str, str], tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        # 第一次使用時才開啟磁碟快取，避免匯入模組即建立檔案
+        if self._conn is None and self.path:
+            ensure_parent_dir(self.path)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_results ("
+                "key TEXT PRIMARY KEY, expires REAL NOT NULL, results TEXT NOT NULL)"
+            )
+        return self._conn
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "entries": len(self._memory),
+        }
+
+    def ttl_for(self, query: str) -> float:
+        return self.fresh_ttl if any(m in query for m in _FRESHNESS_MARKERS) else self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._memory[key]
+            db = self._db()
+            if db is not None:
+                row = db.execute(
+                    "SELECT expires, results FROM search_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[0] > now:
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[1]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str, ttl: float) -> None:
+        expires = time.time() + ttl
+        with self._lock:
+            self._remember(key, expires, value)
+            self.stores += 1
+            db = self._db()
+            if db is not None:
+                with db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO search_results (key, expires, results) VALUES (?, ?, ?)",
+                        (key, expires, value),
+                    )
+                    db.execute("DELETE FROM search_results WHERE expires <= ?", (time.time(),))
+
+    def _remember(self, key: str, expires: float, value: str) -> None:
+        self._memory[key] = (expires, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # ---- ADK model callbacks ----
+    def before_model(self, callback_context=None, llm_request: LlmRequest = None, **_) -> Optional[LlmResponse]:
+        """命中快取時附上先前的搜尋結果並移除搜尋工具，模型不再重新搜尋"""
+        if callback_context is None or llm_request is None:
+            return None
+        # 函式工具回合（含 function_response）不快取，避免回放先前的工具呼叫
+        if any(p.function_response for c in llm_request.contents or [] for p in c.parts or []):
+            return None
+        query = request_query(llm_request)
+        if not query:
+            return None
+        key = request_key(llm_request, query)
+        cached = self.get(key)
+        if cached is not None:
+            try:
+                results = json.loads(cached)
+            except ValueError as e:
+                logger.warning(f"搜尋快取內容無法解析，改為重新查詢: {e}")
+            else:
+                llm_request.append_instructions([_render_results(results)])
+                _drop_search_tools(llm_request)
+                return None
+        if len(self._inflight) > 1024:
+            self._inflight.clear()
+        self._inflight[(callback_context.invocation_id, callback_context.agent_name)] = (
+            key,
+            self.ttl_for(query),
+        )
+        return None
+
+    def after_model(self, callback_context=None, llm_response: LlmResponse = None, **_) -> None:
+        """保存實際搜尋過的回應所帶的 grounding 結果"""
+        if callback_context is None or llm_response is None:
+            return None
+        inflight = self._inflight.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if inflight is None or llm_response.partial or llm_response.error_code:
+            return None
+        results = grounding_results(llm_response)
+        if results is None:
+            return None
+        key, ttl = inflight
+        self.put(key, json.dumps(results, ensure_ascii=False), ttl)
+        return None
+
+
+def search_backend() -> str:
+    return (os.getenv("JUDGE_SEARCH_BACKEND") or "google").lower()
+
+
+def _create_search_cache() -> Optional[SearchCache]:
+    if os.getenv("JUDGE_SEARCH_CACHE", "0") != "1" or search_backend() == "local" or llm_mode() != "live":
+        return None
+    return SearchCache(
+        path=os.getenv("JUDGE_SEARCH_CACHE_PATH", ".cache/search_cache.sqlite") or None,
+        ttl=float(os.getenv("JUDGE_SEARCH_CACHE_TTL") or 6 * 3600),
+        fresh_ttl=float(os.getenv("JUDGE_SEARCH_CACHE_FRESH_TTL") or 15 * 60),
+    )
+
+
+search_cache: Optional[SearchCache] = _create_search_cache()
+
+
+def search_callbacks() -> dict[str, Any]:
+    """供搜尋類 LlmAgent 展開使用的 before/after model callback 參數"""
+    if search_cache is None:
+        return {}
+    return {
+        "before_model_callback": search_cache.before_model,
+        "after_model_callback": search_cache.after_model,
+    }
+
+
+def search_tool_name() -> str:
+    """提示中提及的搜尋工具名稱，隨 ``JUDGE_SEARCH_BACKEND`` 變動"""
+    return "local_search" if search_backend() == "local" else "GoogleSearchTool"
+
+
+def search_tools() -> list[BaseTool]:
+    """依 ``JUDGE_SEARCH_BACKEND`` 回傳搜尋類 LlmAgent 使用的工具"""
+    backend = search_backend()
+    if backend == "local":
+        from .local_search import local_search
+
+        return [FunctionTool(local_search)]
+    if backend == "google":
+        return [google_search]
+    raise ValueError(f"Unknown search backend: {backend}")
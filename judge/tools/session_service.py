@@ -1,6 +1,40 @@
-"""Global SessionService singleton within tools namespace."""
+"""Global SessionService singleton within tools namespace.
 
+The backend is chosen by configuration (environment variables):
+
+- ``JUDGE_SESSION_BACKEND``: ``memory`` (default) or ``sqlite``
+- ``JUDGE_SESSION_DB``: SQLite file path when using the ``sqlite`` backend
+- ``JUDGE_SESSION_MAX_SESSIONS`` / ``JUDGE_SESSION_MAX_BYTES`` /
+  ``JUDGE_SESSION_TTL`` / ``JUDGE_SESSION_ABANDON_TTL`` / ``JUDGE_SESSION_ARCHIVE_DIR``:
+  eviction policy for the ``memory`` backend (LRU ceiling, idle TTL in seconds for
+  finished sessions, abandon TTL for unfinished ones, archive-on-evict)
+"""
+
+import os
+
+from google.adk.sessions.base_session_service import BaseSessionService
 from google.adk.sessions.in_memory_session_service import InMemorySessionService
 
-session_service: InMemorySessionService = InMemorySessionService()
+from .debate_log import DebateMessagesMixin
+from .evicting_session_service import EvictingSessionService, eviction_settings_from_env
+from .sqlite_session_service import SqliteSessionService
+
+
+class MemorySessionService(InMemorySessionService, DebateMessagesMixin):
+    """``InMemorySessionService`` whose stored sessions keep the full ``debate_messages``."""
+
+
+def create_session_service(backend: str | None = None, db_path: str | None = None) -> BaseSessionService:
+    """依設定建立 SessionService（memory / sqlite）"""
+    backend = (backend or os.getenv("JUDGE_SESSION_BACKEND") or "memory").lower()
+    if backend == "sqlite":
+        return SqliteSessionService(db_path or os.getenv("JUDGE_SESSION_DB") or "sessions.db")
+    if backend == "memory":
+        settings = eviction_settings_from_env()
+        if any(v is not None for v in settings.values()):
+            return EvictingSessionService(**settings)
+        return MemorySessionService()
+    raise ValueError(f"Unknown session backend: {backend}")
+
 
+session_service: BaseSessionService = create_session_service()
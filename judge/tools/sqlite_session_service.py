@@ -0,0 +1,393 @@
+"""以本機 SQLite 檔案保存 Session 與事件的 SessionService。
+
+介面與 ``InMemorySessionService`` 相同（``create_session_sync`` / ``get_session`` /
+``append_event`` 等），可直接替換；資料在重新啟動後仍可讀回，且常駐記憶體
+不會隨 Session 數量成長。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import json
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from typing import Any, Optional
+
+from google.adk.events.event import Event
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.session import Session
+from google.adk.sessions.state import State
+
+from .debate_log import MESSAGES_DELTA_KEY, DebateMessagesMixin
+from .file_io import ensure_parent_dir, to_jsonable
+
+try:
+    from google.adk.errors.already_exists_error import AlreadyExistsError
+except ImportError:  # 較舊的 google-adk 未提供此例外
+
+    class AlreadyExistsError(Exception):
+        """Session 已存在時拋出（與新版 google-adk 的同名例外對應）"""
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name    TEXT NOT NULL,
+    user_id     TEXT NOT NULL,
+    id          TEXT NOT NULL,
+    state       TEXT NOT NULL,
+    update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name    TEXT NOT NULL,
+    user_id     TEXT NOT NULL,
+    session_id  TEXT NOT NULL,
+    id          TEXT NOT NULL,
+    timestamp   REAL NOT NULL,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_session
+    ON events (app_name, user_id, session_id, seq);
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY,
+    state    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL,
+    user_id  TEXT NOT NULL,
+    state    TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+);
+"""
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=to_jsonable)
+
+
+# 尚未關閉的服務；行程結束時統一寫入緩衝事件並關閉（不延長服務物件的生命週期）
+_open_services: "weakref.WeakSet[SqliteSessionService]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_all() -> None:
+    for service in list(_open_services):
+        service.close()
+
+
+class SqliteSessionService(DebateMessagesMixin):
+    """SQLite 版 SessionService
+
+    使用 WAL 模式；``append_event`` 先累積於緩衝區，達到 ``batch_size`` 筆或
+    任何讀取操作前，才在同一個交易內批次寫入事件與 state 變更。非同步方法的
+    SQLite 讀寫皆在背景執行緒進行，不阻塞事件迴圈。
+
+    Args:
+        path:       SQLite 檔案路徑
+        batch_size: 累積多少筆事件後寫入一次（1 表示每筆立即寫入）
+    """
+
+    def __init__(self, path: str = "sessions.db", batch_size: int = 32) -> None:
+        if path != ":memory:":
+            ensure_parent_dir(path)
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        # 尚未寫入的事件列與各 Session 合併後的 state 變更
+        self._pending_events: list[tuple] = []
+        self._pending_state: dict[tuple[str, str, str], dict[str, Any]] = {}
+        self._pending_time: dict[tuple[str, str, str], float] = {}
+        _open_services.add(self)
+
+    # ---- Session ----
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        return await asyncio.to_thread(
+            self.create_session_sync,
+            app_name=app_name,
+            user_id=user_id,
+            state=state,
+            session_id=session_id,
+        )
+
+    def create_session_sync(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = (
+            session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        )
+        now = time.time()
+        app_delta, user_delta, session_state = self._split_state(state or {})
+        with self._lock:
+            self._flush()
+            try:
+                with self._conn:
+                    self._conn.execute("BEGIN")
+                    self._conn.execute(
+                        "INSERT INTO sessions (app_name, user_id, id, state, update_time) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (app_name, user_id, session_id, _dumps(session_state), now),
+                    )
+                    self._merge_scoped(app_name, user_id, app_delta, user_delta)
+            except sqlite3.IntegrityError as e:
+                raise AlreadyExistsError(f"Session with id {session_id} already exists.") from e
+        session = Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=session_state,
+            last_update_time=now,
+        )
+        return self._merge_state(session)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        return await asyncio.to_thread(
+            self.get_session_sync,
+            app_name=app_name,
+            user_id=user_id,
+            session_id=session_id,
+            config=config,
+        )
+
+    def get_session_sync(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        with self._lock:
+            self._flush()
+            row = self._conn.execute(
+                "SELECT state, update_time FROM sessions "
+                "WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id),
+            ).fetchone()
+            if row is None:
+                return None
+            query = (
+                "SELECT data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+            )
+            params: list[Any] = [app_name, user_id, session_id]
+            if config and config.after_timestamp:
+                query += " AND timestamp >= ?"
+                params.append(config.after_timestamp)
+            if config and config.num_recent_events:
+                query += " ORDER BY seq DESC LIMIT ?"
+                params.append(config.num_recent_events)
+                rows = self._conn.execute(query, params).fetchall()[::-1]
+            else:
+                rows = self._conn.execute(query + " ORDER BY seq", params).fetchall()
+        session = Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=json.loads(row[0]),
+            events=[Event.model_validate_json(r[0]) for r in rows],
+            last_update_time=row[1],
+        )
+        return self._merge_state(session)
+
+    async def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        return await asyncio.to_thread(self.list_sessions_sync, app_name=app_name, user_id=user_id)
+
+    def list_sessions_sync(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        with self._lock:
+            self._flush()
+            rows = self._conn.execute(
+                "SELECT id, state, update_time FROM sessions WHERE app_name = ? AND user_id = ?",
+                (app_name, user_id),
+            ).fetchall()
+        sessions = [
+            self._merge_state(
+                Session(
+                    app_name=app_name,
+                    user_id=user_id,
+                    id=sid,
+                    state=json.loads(state),
+                    last_update_time=update_time,
+                )
+            )
+            for sid, state, update_time in rows
+        ]
+        return ListSessionsResponse(sessions=sessions)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await asyncio.to_thread(
+            self.delete_session_sync, app_name=app_name, user_id=user_id, session_id=session_id
+        )
+
+    def delete_session_sync(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        with self._lock:
+            self._flush()
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.execute(
+                    "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                    (app_name, user_id, session_id),
+                )
+                self._conn.execute(
+                    "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                    (app_name, user_id, session_id),
+                )
+
+    # ---- Event ----
+    async def append_event(self, session: Session, event: Event) -> Event:
+        await super().append_event(session=session, event=event)
+        if event.partial:
+            return event
+        session.last_update_time = event.timestamp
+        key = (session.app_name, session.user_id, session.id)
+        # 於事件迴圈上序列化（快照），寫入 SQLite 則交給背景執行緒
+        row = (*key, event.id, event.timestamp, event.model_dump_json(exclude_none=True, fallback=to_jsonable))
+        with self._lock:
+            self._pending_events.append(row)
+            if event.actions and event.actions.state_delta:
+                delta = self._pending_state.setdefault(key, {})
+                for k, v in event.actions.state_delta.items():
+                    if not k.startswith(State.TEMP_PREFIX):
+                        delta[k] = v
+                if MESSAGES_DELTA_KEY in event.actions.state_delta:
+                    # 增量訊息已由 DebateMessagesMixin 補進 session.state，保存其快照
+                    delta["debate_messages"] = list(session.state.get("debate_messages") or [])
+            self._pending_time[key] = event.timestamp
+            full = len(self._pending_events) >= self.batch_size
+        if full:
+            await asyncio.to_thread(self.flush)
+        return event
+
+    def flush(self) -> None:
+        """立即寫入緩衝中的事件"""
+        with self._lock:
+            self._flush()
+
+    def __del__(self) -> None:
+        # 未明確關閉就被回收時，仍寫入緩衝中的事件
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush()
+            self._conn.close()
+            self._conn = None
+        _open_services.discard(self)
+
+    # ---- internal ----
+    def _flush(self) -> None:
+        if not self._pending_events and not self._pending_state:
+            return
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO events (app_name, user_id, session_id, id, timestamp, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                self._pending_events,
+            )
+            for key, delta in self._pending_state.items():
+                app_name, user_id, session_id = key
+                app_delta, user_delta, session_delta = self._split_state(delta)
+                row = self._conn.execute(
+                    "SELECT state FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                    key,
+                ).fetchone()
+                if row is not None and session_delta:
+                    state = json.loads(row[0])
+                    state.update(session_delta)
+                    self._conn.execute(
+                        "UPDATE sessions SET state = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+                        (_dumps(state), *key),
+                    )
+                self._merge_scoped(app_name, user_id, app_delta, user_delta)
+            for key, ts in self._pending_time.items():
+                self._conn.execute(
+                    "UPDATE sessions SET update_time = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+                    (ts, *key),
+                )
+        self._pending_events = []
+        self._pending_state = {}
+        self._pending_time = {}
+
+    @staticmethod
+    def _split_state(state: dict) -> tuple[dict, dict, dict]:
+        app_delta, user_delta, session_state = {}, {}, {}
+        for k, v in state.items():
+            if k.startswith(State.APP_PREFIX):
+                app_delta[k.removeprefix(State.APP_PREFIX)] = v
+            elif k.startswith(State.USER_PREFIX):
+                user_delta[k.removeprefix(State.USER_PREFIX)] = v
+            elif not k.startswith(State.TEMP_PREFIX):
+                session_state[k] = v
+        return app_delta, user_delta, session_state
+
+    def _merge_scoped(self, app_name: str, user_id: str, app_delta: dict, user_delta: dict) -> None:
+        if app_delta:
+            row = self._conn.execute(
+                "SELECT state FROM app_states WHERE app_name = ?", (app_name,)
+            ).fetchone()
+            state = json.loads(row[0]) if row else {}
+            state.update(app_delta)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO app_states (app_name, state) VALUES (?, ?)",
+                (app_name, _dumps(state)),
+            )
+        if user_delta:
+            row = self._conn.execute(
+                "SELECT state FROM user_states WHERE app_name = ? AND user_id = ?",
+                (app_name, user_id),
+            ).fetchone()
+            state = json.loads(row[0]) if row else {}
+            state.update(user_delta)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO user_states (app_name, user_id, state) VALUES (?, ?, ?)",
+                (app_name, user_id, _dumps(state)),
+            )
+
+    def _merge_state(self, session: Session) -> Session:
+        with self._lock:
+            app_row = self._conn.execute(
+                "SELECT state FROM app_states WHERE app_name = ?", (session.app_name,)
+            ).fetchone()
+            user_row = self._conn.execute(
+                "SELECT state FROM user_states WHERE app_name = ? AND user_id = ?",
+                (session.app_name, session.user_id),
+            ).fetchone()
+        if app_row:
+            for k, v in json.loads(app_row[0]).items():
+                session.state[State.APP_PREFIX + k] = v
+        if user_row:
+            for k, v in json.loads(user_row[0]).items():
+                session.state[State.USER_PREFIX + k] = v
+        return session
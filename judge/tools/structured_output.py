@@ -0,0 +1,222 @@
+"""單次結構化輸出：合併「工具執行者 + schema 驗證者」兩段式流程為一次模型呼叫。
+
+啟用時，工具執行者的 instruction 會附上驗證者的要求，直接輸出 schema JSON；
+輸出無法通過驗證時依序退回：
+
+1. 本地解析：擷取 JSON（去除 code fence、修正尾逗號與 Python 字面值）後驗證
+2. 各階段提供的確定性解析器（如 Fact-check 的「分析結果 / 真假分類」格式）
+3. 原本的 schema 驗證者（第二次模型呼叫）
+
+設定（環境變數）：``JUDGE_SINGLE_PASS`` 為 ``1`` / ``all`` 時全部啟用，或以逗號列出
+階段名稱（如 ``curator,advocate``）；未設定時維持兩段式流程。
+"""
+
+from __future__ import annotations
+
+import ast
+import inspect
+import json
+import logging
+import os
+import re
+from collections import Counter
+from typing import Any, AsyncGenerator, Callable, Optional
+
+from google.adk.agents import LlmAgent, SequentialAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# 確定性解析器：(原始輸出, state) -> dict 或 None
+StructuredParser = Callable[[str, Any], Optional[dict]]
+
+# 各階段結果統計：direct（模型直接輸出合格 JSON）、parser（本地解析器）、llm（退回驗證者）
+single_pass_stats: Counter[tuple[str, str]] = Counter()
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+
+def _balanced_json(text: str) -> Optional[str]:
+    """取出第一個括號平衡的 JSON 物件字串"""
+    start = text.find("{")
+    while start >= 0:
+        depth = 0
+        in_string = False
+        escaped = False
+        for i in range(start, len(text)):
+            ch = text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return text[start : i + 1]
+        start = text.find("{", start + 1)
+    return None
+
+
+def extract_json(raw: Any) -> Optional[Any]:
+    """從模型輸出擷取 JSON 物件；已是 dict 時直接回傳"""
+    if isinstance(raw, dict):
+        return raw
+    if hasattr(raw, "model_dump"):
+        return raw.model_dump()
+    if not isinstance(raw, str) or not raw.strip():
+        return None
+    candidates = [m.group(1) for m in _FENCE.finditer(raw)] + [raw]
+    for candidate in candidates:
+        body = _balanced_json(candidate)
+        if body is None:
+            continue
+        for attempt in (body, _TRAILING_COMMA.sub(r"\1", body.translate(_SMART_QUOTES))):
+            try:
+                return json.loads(attempt)
+            except json.JSONDecodeError:
+                pass
+        try:
+            value = ast.literal_eval(body)
+        except (ValueError, SyntaxError):
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+def parse_structured(
+    raw: Any,
+    schema: type[BaseModel],
+    state: Any = None,
+    parser: Optional[StructuredParser] = None,
+) -> tuple[Optional[dict], str]:
+    """依序以 JSON 擷取與確定性解析器產生合格輸出
+
+    Returns:
+        ``(輸出 dict 或 None, 來源)``；來源為 ``direct`` / ``parser`` / ``""``
+    """
+    data = extract_json(raw)
+    if data is not None:
+        try:
+            return schema.model_validate(data).model_dump(), "direct"
+        except ValidationError:
+            pass
+    if parser is not None and isinstance(raw, str):
+        try:
+            data = parser(raw, state if state is not None else {})
+            if data is not None:
+                return schema.model_validate(data).model_dump(), "parser"
+        except (ValidationError, ValueError, TypeError) as e:
+            logger.debug(f"{schema.__name__} 確定性解析失敗: {e}")
+    return None, ""
+
+
+class SinglePassAgent(BaseAgent):
+    """單次模型呼叫產生 schema 輸出；失敗時依序退回本地解析與驗證者
+
+    sub_agents 固定為 ``[runner, validator]``：runner 為合併 instruction 的工具執行者，
+    validator 為原本的 schema 驗證者，僅在本地解析失敗時執行。
+    """
+
+    output_model: type[BaseModel]
+    output_key: str
+    raw_key: str
+    parser: Optional[StructuredParser] = None
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        runner, validator = self.sub_agents
+        async for event in runner.run_async(ctx):
+            yield event
+        data, source = parse_structured(
+            ctx.session.state.get(self.raw_key), self.output_model, ctx.session.state, self.parser
+        )
+        if data is not None:
+            single_pass_stats[(self.name, source)] += 1
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta={self.output_key: data}),
+            )
+            # 驗證者被略過時仍執行其 after_agent_callback（如寫入知識庫）
+            if event := await self._validator_callbacks(ctx, validator):
+                yield event
+            return
+        single_pass_stats[(self.name, "llm")] += 1
+        async for event in validator.run_async(ctx):
+            yield event
+
+    async def _validator_callbacks(self, ctx: InvocationContext, validator: BaseAgent) -> Optional[Event]:
+        callback_context = CallbackContext(ctx.model_copy(update={"agent": validator}))
+        for callback in validator.canonical_after_agent_callbacks:
+            result = callback(callback_context=callback_context)
+            if inspect.isawaitable(result):
+                await result
+        if not callback_context.state.has_delta():
+            return None
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=validator.name,
+            branch=ctx.branch,
+            actions=callback_context._event_actions,
+        )
+
+
+def single_pass_enabled(name: str) -> bool:
+    value = (os.getenv("JUDGE_SINGLE_PASS") or "").strip().lower()
+    if value in ("", "0", "false", "off"):
+        return False
+    if value in ("1", "true", "on", "all", "*"):
+        return True
+    return name.lower() in {n.strip() for n in value.split(",")}
+
+
+def _schema_hint(schema: type[BaseModel]) -> str:
+    return json.dumps(schema.model_json_schema(), ensure_ascii=False, separators=(",", ":"))
+
+
+def structured_stage(
+    name: str,
+    runner: LlmAgent,
+    validator: LlmAgent,
+    parser: Optional[StructuredParser] = None,
+    **kwargs: Any,
+) -> BaseAgent:
+    """建立「工具執行者 + schema 驗證者」階段
+
+    依 ``JUDGE_SINGLE_PASS`` 回傳兩段式 ``SequentialAgent`` 或 ``SinglePassAgent``；
+    兩者名稱與 ``kwargs``（如 before/after_agent_callback）相同，呼叫端不需區分。
+    """
+    if not single_pass_enabled(name):
+        return SequentialAgent(name=name, sub_agents=[runner, validator], **kwargs)
+
+    schema = validator.output_schema
+    instruction = (
+        f"{runner.instruction}\n"
+        f"完成工具查詢後，在同一次回覆中直接整理：{validator.instruction}\n"
+        f"只輸出一個符合 {schema.__name__} 的 JSON 物件，不要多餘文字。JSON Schema：{_schema_hint(schema)}"
+    )
+    single_runner = runner.model_copy(update={"instruction": instruction})
+    return SinglePassAgent(
+        name=name,
+        sub_agents=[single_runner, validator],
+        output_model=schema,
+        output_key=validator.output_key,
+        raw_key=runner.output_key,
+        parser=parser,
+        **kwargs,
+    )
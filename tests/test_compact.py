@@ -0,0 +1,45 @@
+"""user-005：輕量回合紀錄可讀、可比較且可經 JSON 往返，並比 pydantic 模型省記憶體。"""
+
+import json
+
+from judge.tools.compact import EvidenceRecord, TurnRecord, benchmark
+from judge.tools.file_io import to_jsonable
+
+
+def _turn() -> TurnRecord:
+    return TurnRecord(
+        speaker="advocate",
+        content="Thesis\n- point",
+        claim="claim",
+        confidence=0.7,
+        evidence=[{"source": "https://e.com/a", "claim": "c", "warrant": "w", "risk": "low"}],
+        fallacies=[{"type": "strawman"}],
+    )
+
+
+def test_repr_shows_fields():
+    record = _turn()
+    assert repr(record).startswith("TurnRecord(speaker='advocate'")
+    assert "EvidenceRecord(source='https://e.com/a'" in repr(record)
+    assert "object at 0x" not in repr([record.evidence[0]])
+
+
+def test_json_round_trip():
+    record = _turn()
+    data = json.loads(json.dumps(record, default=to_jsonable))
+    assert TurnRecord.from_dict(data) == record
+    assert EvidenceRecord.from_dict(data["evidence"][0]) == record.evidence[0]
+    assert TurnRecord.from_dict(data).to_model() == record.to_model()
+
+
+def test_equality_compares_fields():
+    assert _turn() == _turn()
+    other = _turn()
+    other.claim = "different"
+    assert other != _turn()
+    assert len({_turn().evidence[0], _turn().evidence[0]}) == 1
+
+
+def test_records_use_less_memory_than_pydantic_models():
+    result = benchmark(2_000)
+    assert result["TurnRecord"] < result["pydantic Turn"]
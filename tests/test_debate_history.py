@@ -0,0 +1,62 @@
+"""user-020：辯論歷史原地增量更新，檢視寫入 temp: 鍵且不超過預算。"""
+
+from google.adk.sessions.state import State
+
+from judge.agents.adjudication.jury.agent import jury_agent
+from judge.tools.debate_history import estimate_tokens, render_history, update_history, update_history_view
+
+
+def _msg(i):
+    return {
+        "speaker": ("advocate", "skeptic", "devil")[i % 3],
+        "claim": f"主張 {i % 4}",
+        "content": f"主張 {i % 4}\n- 重點 {i}\n" + "細節" * 50,
+        "data": {"evidence": [{"source": f"https://e.com/{i % 5}", "claim": f"證據 {i % 5}"}]},
+    }
+
+
+def test_history_is_updated_in_place_and_only_written_on_build():
+    value = {"debate_messages": [_msg(i) for i in range(3)]}
+    delta = {}
+    state = State(value, delta)
+    history = update_history(state)
+    assert "debate_history" in delta
+    delta.clear()
+
+    value["debate_messages"].extend(_msg(i) for i in range(3, 8))
+    assert update_history(state) is history
+    assert delta == {}
+    assert history["turns"] == 8 and len(history["lines"]) == 8
+    assert len(history["claims"]) == 4 and len(history["evidence"]) == 5
+
+    # 訊息被重設時重建並寫回
+    value["debate_messages"] = [_msg(0)]
+    rebuilt = update_history(state)
+    assert rebuilt is not history and delta["debate_history"]["turns"] == 1
+
+
+def test_view_uses_temp_key_and_skips_unchanged_writes():
+    value = {"debate_messages": [_msg(i) for i in range(12)]}
+    delta = {}
+    state = State(value, delta)
+    view = update_history_view(state, "moderator")
+    assert delta["temp:debate_view_moderator"] == view
+    delta.clear()
+    update_history_view(state, "moderator")
+    assert "temp:debate_view_moderator" not in delta
+    assert "{temp:debate_view_jury?}" in jury_agent.instruction
+
+
+def test_render_respects_budget():
+    state = {"debate_messages": [_msg(i) for i in range(30)]}
+    view = render_history(state, budget=400, recent=2)
+    assert estimate_tokens(view) <= 400
+    assert "RECENT TURNS" in view
+
+
+def test_tiny_budgets_clip_by_tokens():
+    state = {"debate_messages": [_msg(i) for i in range(3)]}
+    assert render_history(state, budget=0, recent=2) == ""
+    for budget in (50, 120, 300):
+        view = render_history(state, budget=budget, recent=1)
+        assert estimate_tokens(view) <= budget
@@ -0,0 +1,134 @@
+"""user-002：事件只攜帶新增訊息，讀取端依序號重建；序號不連續時由完整紀錄補齊。"""
+
+import asyncio
+import json
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.session import Session
+
+from judge.tools.debate_log import (
+    MESSAGES_DELTA_KEY,
+    append_event_update,
+    clear_turn_cache,
+    debate_messages_delta,
+    export_debate_log,
+    initialize_debate_state,
+)
+from judge.tools import append_event, export_latest_session
+from judge.tools.evicting_session_service import EvictingSessionService
+from judge.tools.session_service import MemorySessionService
+from judge.tools.sqlite_session_service import SqliteSessionService
+
+
+def _message(i: int) -> dict:
+    speaker = ("advocate", "skeptic", "devil")[i % 3]
+    return {
+        "speaker": speaker,
+        "content": f"turn {i}",
+        "claim": f"claim {i}",
+        "data": {"confidence": 0.5, "evidence": [{"source": f"https://e.com/{i}", "claim": f"c{i}", "warrant": "w"}]},
+    }
+
+
+def _event(messages: list, seq: int) -> Event:
+    speaker = messages[0]["speaker"]
+    return Event(
+        author=speaker,
+        actions=EventActions(state_delta={"payload": messages[0]["data"], **debate_messages_delta(messages, seq)}),
+    )
+
+
+def test_delta_events_rebuild_messages_and_turns():
+    state: dict = {}
+    initialize_debate_state(state)
+    for i in range(4):
+        append_event_update(state, _event([_message(i)], i))
+    assert [m["claim"] for m in state["debate_messages"]] == [f"claim {i}" for i in range(4)]
+    assert [t.claim for t in state["debate_log"]] == [f"claim {i}" for i in range(4)]
+
+
+def test_replayed_event_is_idempotent():
+    state: dict = {}
+    initialize_debate_state(state)
+    event = _event([_message(0)], 0)
+    append_event_update(state, event)
+    append_event_update(state, event)
+    assert len(state["debate_messages"]) == 1
+    assert len(state["debate_log"]) == 1
+
+
+def test_gap_resyncs_from_debate_messages():
+    state: dict = {}
+    initialize_debate_state(state)
+    append_event_update(state, _event([_message(0)], 0))
+    # 第 1 則訊息的事件漏收，但完整紀錄已有該訊息
+    state["debate_messages"].append(_message(1))
+    append_event_update(state, _event([_message(2)], 2))
+    turns = state["debate_log"]
+    assert [t.claim for t in turns] == ["claim 0", "claim 1", "claim 2"]
+    # 補齊的回合使用訊息自帶的 data，而非本事件的 payload
+    assert turns[1].evidence[0].source == "https://e.com/1"
+
+
+def test_gap_without_history_is_not_guessed():
+    state: dict = {}
+    initialize_debate_state(state)
+    append_event_update(state, _event([_message(0)], 0))
+    append_event_update(state, _event([_message(3)], 3))
+    assert [t.claim for t in state["debate_log"]] == ["claim 0"]
+    assert len(state["debate_messages"]) == 1
+
+
+def test_missing_seq_uses_full_record():
+    state: dict = {}
+    initialize_debate_state(state)
+    state["debate_messages"] = [_message(0), _message(1)]
+    event = Event(author="skeptic", actions=EventActions(state_delta={MESSAGES_DELTA_KEY: [_message(1)]}))
+    append_event_update(state, event)
+    assert [t.claim for t in state["debate_log"]] == ["claim 0", "claim 1"]
+
+
+def test_session_reader_supports_legacy_full_list_events():
+    clear_turn_cache()
+    legacy = Event(
+        author="advocate",
+        actions=EventActions(state_delta={"advocacy": {}, "debate_messages": [_message(0), _message(1)]}),
+    )
+    session = Session(
+        id="legacy",
+        app_name="app",
+        user_id="u",
+        state={"debate_messages": [_message(0), _message(1), _message(2)]},
+        events=[legacy, _event([_message(2)], 2)],
+    )
+    assert export_debate_log(session).count('"speaker"') == 3
+
+
+def _stored_sessions(tmp_path):
+    return [
+        MemorySessionService(),
+        EvictingSessionService(max_sessions=8),
+        SqliteSessionService(str(tmp_path / "sessions.db")),
+    ]
+
+
+def test_stored_and_exported_sessions_keep_debate_messages(tmp_path):
+    for i, service in enumerate(_stored_sessions(tmp_path)):
+        async def run():
+            session = await service.create_session(app_name="app", user_id="u", state={"debate_messages": []})
+            for seq in range(3):
+                # 與 log_tool_output 相同：先就地加入訊息，事件只攜帶增量
+                message = _message(seq)
+                session.state["debate_messages"].append(message)
+                await append_event(session, _event([message], seq), service=service)
+            stored = await service.get_session(app_name="app", user_id="u", session_id=session.id)
+            exported = await export_latest_session(session, path=str(tmp_path / f"log{i}.json"), service=service)
+            return stored, exported
+
+        stored, exported = asyncio.run(run())
+        assert [m["claim"] for m in stored.state["debate_messages"]] == ["claim 0", "claim 1", "claim 2"]
+        assert MESSAGES_DELTA_KEY not in stored.state
+        shared = json.loads(json.dumps(exported, default=str))["state"]["shared"]
+        assert len(shared["debate_messages"]) == 3
+        assert not any(key.startswith("temp:") for key in shared)
@@ -0,0 +1,98 @@
+"""user-001：debate_log 的增量指標需與完整重算結果一致。"""
+
+import copy
+import json
+
+from judge.tools.debate_log import (
+    DebateLog,
+    Turn,
+    append_turn,
+    initialize_debate_state,
+    recalculate_metrics,
+)
+from judge.tools.evidence_store import evidence_key
+from judge.tools.file_io import to_jsonable
+
+
+def _turn(i: int) -> Turn:
+    return Turn(
+        speaker=("advocate", "skeptic", "devil")[i % 3],
+        content=f"turn {i}",
+        claim=f"claim {i % 4}",
+        confidence=0.1 * (i % 10),
+        evidence=[
+            {"source": f"https://example.com/{(i + k) % 5}", "claim": f"ev {(i + k) % 5}", "warrant": "w"}
+            for k in range(2)
+        ],
+    )
+
+
+def _keys(evidence) -> list:
+    return [evidence_key(ev) for ev in evidence]
+
+
+def _assert_matches_full_recompute(state: dict) -> None:
+    expected = recalculate_metrics(list(state["debate_log"]))
+    assert state["dispute_points"] == expected["dispute_points"]
+    assert abs(state["credibility"] - expected["credibility"]) < 1e-9
+    assert _keys(state["evidence"]) == _keys(expected["evidence"])
+
+
+def test_append_turn_matches_recalculate_metrics():
+    state: dict = {}
+    initialize_debate_state(state)
+    for i in range(30):
+        append_turn(state, _turn(i))
+        _assert_matches_full_recompute(state)
+
+
+def test_accumulator_is_not_a_state_key_and_state_serializes():
+    state: dict = {}
+    initialize_debate_state(state)
+    for i in range(5):
+        append_turn(state, _turn(i))
+    assert isinstance(state["debate_log"], DebateLog)
+    assert not any(k.startswith("_") for k in state)
+    data = json.loads(json.dumps(state, default=to_jsonable))
+    assert len(data["debate_log"]) == 5
+    assert data["evidence"][0]["source"] == "https://example.com/0"
+
+
+def test_external_mutation_of_evidence_does_not_corrupt_accumulator():
+    state: dict = {}
+    initialize_debate_state(state)
+    append_turn(state, _turn(0))
+    state["evidence"].append({"source": "https://bogus.example", "claim": "x", "warrant": "y"})
+    append_turn(state, _turn(1))
+    _assert_matches_full_recompute(state)
+
+    state["evidence"] = []
+    append_turn(state, _turn(2))
+    _assert_matches_full_recompute(state)
+
+
+def test_reset_or_plain_list_log_is_rebuilt():
+    state: dict = {}
+    initialize_debate_state(state)
+    append_turn(state, _turn(0))
+    state["debate_log"] = [_turn(1), _turn(2)]
+    append_turn(state, _turn(3))
+    assert isinstance(state["debate_log"], DebateLog)
+    assert len(state["debate_log"]) == 3
+    _assert_matches_full_recompute(state)
+
+    state["debate_log"].append(_turn(4))
+    append_turn(state, _turn(5))
+    _assert_matches_full_recompute(state)
+
+
+def test_deepcopy_keeps_accumulator_in_sync():
+    state: dict = {}
+    initialize_debate_state(state)
+    for i in range(3):
+        append_turn(state, _turn(i))
+    clone = copy.deepcopy(state)
+    append_turn(clone, _turn(3))
+    assert len(state["debate_log"]) == 3
+    _assert_matches_full_recompute(state)
+    _assert_matches_full_recompute(clone)
@@ -0,0 +1,85 @@
+"""user-009：合併式事件寫入器的重試、關閉與註冊表清理。"""
+
+import asyncio
+
+import pytest
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+
+from judge.tools.event_batcher import close_batcher, get_batcher, open_batcher
+
+
+def _event(author, **delta):
+    return Event(author=author, invocation_id="inv", actions=EventActions(state_delta=delta))
+
+
+def _session():
+    return InMemorySessionService().create_session_sync(app_name="app", user_id="u", state={})
+
+
+def test_merges_same_author_deltas_and_updates_state_immediately():
+    session = _session()
+    written = []
+
+    async def append(event):
+        written.append(event)
+        return event
+
+    async def run():
+        batcher = open_batcher(session, append, window=10)
+        await batcher.submit(_event("a", x=1))
+        await batcher.submit(_event("a", y=2))
+        await batcher.submit(_event("b", z=3))
+        assert (session.state["x"], session.state["y"], session.state["z"]) == (1, 2, 3)
+        assert written == []
+        await close_batcher(session)
+
+    asyncio.run(run())
+    assert [e.actions.state_delta for e in written] == [{"x": 1, "y": 2}, {"z": 3}]
+    assert get_batcher(session.id) is None
+
+
+def test_failed_write_requeues_batch_and_timer_failure_is_logged(caplog):
+    session = _session()
+    written, fail = [], [True]
+
+    async def append(event):
+        if fail[0]:
+            raise RuntimeError("boom")
+        written.append(event)
+        return event
+
+    async def run():
+        batcher = open_batcher(session, append, window=0.0)
+        await batcher.submit(_event("a", x=1))
+        await batcher.submit(_event("b", y=2))
+        await asyncio.sleep(0.01)
+        assert batcher.failures == 1 and written == []
+        with pytest.raises(RuntimeError):
+            await batcher.flush()
+        fail[0] = False
+        await batcher.close()
+        return batcher
+
+    batcher = asyncio.run(run())
+    assert [e.author for e in written] == ["a", "b"]
+    assert batcher.written == 2
+    assert "待重試" in caplog.text
+
+
+def test_submit_after_close_writes_directly():
+    session = _session()
+    written = []
+
+    async def append(event):
+        written.append(event)
+        return event
+
+    async def run():
+        batcher = open_batcher(session, append, window=10)
+        await batcher.close()
+        await batcher.submit(_event("a", x=1))
+
+    asyncio.run(run())
+    assert len(written) == 1
@@ -0,0 +1,106 @@
+"""user-007：只淘汰已完成的 Session（root_agent 呼叫結束即標記），歸檔在背景執行緒進行。"""
+
+import asyncio
+import threading
+from typing import AsyncGenerator
+
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.runners import Runner
+from google.genai import types
+
+from judge.tools.evicting_session_service import EvictingSessionService, finish_session_callback
+
+
+def _event(i):
+    return Event(author="a", actions=EventActions(state_delta={"x": i}))
+
+
+def test_active_sessions_are_never_evicted_by_lru():
+    service = EvictingSessionService(max_sessions=1)
+
+    async def run():
+        first = await service.create_session(app_name="app", user_id="u")
+        second = await service.create_session(app_name="app", user_id="u")
+        # 兩者皆未完成：超過上限也不淘汰，事件照常寫入
+        await service.append_event(first, _event(1))
+        stored = await service.get_session(app_name="app", user_id="u", session_id=first.id)
+        assert stored.state["x"] == 1
+        service.mark_finished(app_name="app", user_id="u", session_id=first.id)
+        await service.append_event(second, _event(2))
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert service.get_session_sync(app_name="app", user_id="u", session_id=first.id) is None
+    assert service.get_session_sync(app_name="app", user_id="u", session_id=second.id) is not None
+    assert service.stats()["evictions"] == 1
+
+
+def test_new_event_reactivates_finished_session():
+    service = EvictingSessionService(max_sessions=1)
+
+    async def run():
+        first = await service.create_session(app_name="app", user_id="u")
+        service.mark_finished(app_name="app", user_id="u", session_id=first.id)
+        await service.append_event(first, _event(1))
+        await service.create_session(app_name="app", user_id="u")
+        return first
+
+    first = asyncio.run(run())
+    assert service.get_session_sync(app_name="app", user_id="u", session_id=first.id) is not None
+    assert service.stats()["active_sessions"] == 2
+
+
+def test_ttl_applies_to_finished_and_abandoned_sessions():
+    service = EvictingSessionService(idle_ttl=0.0, abandon_ttl=3600.0)
+    finished = service.create_session_sync(app_name="app", user_id="u")
+    service.mark_finished(app_name="app", user_id="u", session_id=finished.id)
+    active = service.create_session_sync(app_name="app", user_id="u")
+    assert service.get_session_sync(app_name="app", user_id="u", session_id=finished.id) is None
+    assert service.get_session_sync(app_name="app", user_id="u", session_id=active.id) is not None
+
+    service.abandon_ttl = 0.0
+    service.get_session_sync(app_name="app", user_id="u", session_id=active.id)
+    assert service.get_session_sync(app_name="app", user_id="u", session_id=active.id) is None
+    assert service.stats()["abandoned"] == 1
+
+
+def test_archive_runs_off_the_event_loop():
+    threads = []
+    service = EvictingSessionService(
+        max_sessions=1, archive=lambda session: threads.append(threading.current_thread())
+    )
+
+    async def run():
+        first = await service.create_session(app_name="app", user_id="u")
+        service.mark_finished(app_name="app", user_id="u", session_id=first.id)
+        second = await service.create_session(app_name="app", user_id="u")
+        await service.append_event(second, _event(1))
+
+    asyncio.run(run())
+    assert service.stats()["archived"] == 1
+    assert threads and threads[0] is not threading.main_thread()
+
+
+class _Reply(BaseAgent):
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        yield Event(invocation_id=ctx.invocation_id, author=self.name, actions=EventActions(state_delta={"done": True}))
+
+
+def test_root_invocation_marks_session_finished():
+    service = EvictingSessionService(max_sessions=1)
+    runner = Runner(app_name="app", agent=_Reply(name="root", after_agent_callback=finish_session_callback), session_service=service)
+    message = types.Content(role="user", parts=[types.Part(text="新聞")])
+
+    async def run(session_id):
+        await service.create_session(app_name="app", user_id="u", session_id=session_id)
+        async for _ in runner.run_async(user_id="u", session_id=session_id, new_message=message):
+            pass
+
+    asyncio.run(run("first"))
+    assert service.stats()["active_sessions"] == 0
+    asyncio.run(run("second"))
+    assert service.get_session_sync(app_name="app", user_id="u", session_id="first") is None
+    assert service.stats()["evictions"] == 1
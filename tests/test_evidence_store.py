@@ -0,0 +1,55 @@
+"""user-008：證據去重只移除追蹤參數、只作用於彙總證據，且 Jury/Synthesizer 提示可讀到去重後的證據。"""
+
+import json
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.session import Session
+
+from judge.agents.adjudication.jury.agent import jury_agent
+from judge.agents.adjudication.synthesizer.agent import synthesizer_agent
+from judge.tools.debate_log import append_event_update, clear_turn_cache, debate_messages_delta, export_debate_log
+from judge.tools.evidence_store import EvidenceStore, canonicalize_url
+
+
+def test_canonicalize_strips_only_tracking_params():
+    assert canonicalize_url("https://www.Example.com/a/?utm_source=x&b=2&a=1&fbclid=y#top") == (
+        "https://example.com/a?a=1&b=2"
+    )
+    assert canonicalize_url("http://example.com/a") != canonicalize_url("https://example.com/a")
+    assert canonicalize_url("https://example.com/a?ref=1") != canonicalize_url("https://example.com/a?ref=2")
+    assert canonicalize_url("  某 期刊   2024 ") == "某 期刊 2024"
+
+
+def test_store_merges_tracking_variants_only():
+    store = EvidenceStore()
+    first = store.add({"source": "https://e.com/a?utm_medium=m", "claim": "C", "warrant": "w"})
+    assert store.add({"source": "https://e.com/a/", "claim": " c ", "warrant": "other"}) is first
+    store.add({"source": "http://e.com/a", "claim": "C", "warrant": "w"})
+    assert len(store) == 2
+
+
+def test_prompts_read_evidence_digest():
+    for agent in (jury_agent, synthesizer_agent):
+        assert "{evidence_digest?}" in agent.instruction
+
+
+def test_dedup_keeps_each_turns_own_warrant():
+    clear_turn_cache()
+    messages = [
+        {"speaker": speaker, "content": speaker, "data": {"evidence": [{"source": "https://e.com/a", "claim": "C", "warrant": warrant}]}}
+        for speaker, warrant in (("advocate", "supports"), ("skeptic", "actually refutes"))
+    ]
+    events = [
+        Event(author=m["speaker"], actions=EventActions(state_delta=debate_messages_delta([m], i)))
+        for i, m in enumerate(messages)
+    ]
+    state: dict = {}
+    for event in events:
+        append_event_update(state, event)
+    assert [t.evidence[0].warrant for t in state["debate_log"]] == ["supports", "actually refutes"]
+    assert len(state["evidence"]) == 1
+
+    session = Session(id="s", app_name="app", user_id="u", state={"debate_messages": messages}, events=events)
+    exported = json.loads(export_debate_log(session))
+    assert [t["evidence"][0]["warrant"] for t in exported] == ["supports", "actually refutes"]
@@ -0,0 +1,75 @@
+"""user-004：事件日誌於寫入當下快照事件、寫入失敗不會默默遺失，匯出契約不變。"""
+
+import asyncio
+import json
+
+import pytest
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+
+from judge.tools import append_event, export_latest_journal, export_latest_session, open_journal
+from judge.tools.journal import EventJournal, load_journal
+
+
+def _session(service):
+    return service.create_session_sync(app_name="app", user_id="u", state={"debate_messages": []})
+
+
+def test_write_snapshots_the_event(tmp_path):
+    service = InMemorySessionService()
+    session = _session(service)
+    journal = EventJournal(str(tmp_path / "s.ndjson"), session)
+    delta = {"social_log": {"count": 1}}
+    journal.write(Event(author="social", actions=EventActions(state_delta=delta)))
+    delta["social_log"]["count"] = 2
+    path = journal.finalize()
+    loaded = load_journal(path)
+    assert loaded.events[0].actions.state_delta == {"social_log": {"count": 1}}
+
+
+def test_writer_failure_is_raised_instead_of_queueing(tmp_path):
+    service = InMemorySessionService()
+    session = _session(service)
+    journal = EventJournal(str(tmp_path / "s.ndjson"), session, fsync_interval=0.01)
+
+    class _Broken:
+        def write(self, _):
+            raise OSError("disk full")
+
+        def close(self):
+            pass
+
+    journal._file = _Broken()
+    journal.write(Event(author="a"))
+    journal._thread.join(timeout=2)
+    with pytest.raises(RuntimeError):
+        journal.write(Event(author="b"))
+    with pytest.raises(RuntimeError):
+        journal.close()
+
+
+def test_export_latest_session_keeps_json_contract(tmp_path):
+    service = InMemorySessionService()
+    session = _session(service)
+    open_journal(session, str(tmp_path / "journals"))
+
+    async def run():
+        await append_event(session, Event(author="social", actions=EventActions(state_delta={"social_log": "x"})), service=service)
+        data = await export_latest_session(session, str(tmp_path / "debate_log.json"), service=service)
+        journal_path = await export_latest_journal(session)
+        return data, journal_path
+
+    data, journal_path = asyncio.run(run())
+    assert set(data) == {"session", "state", "events"}
+    assert data["state"]["shared"]["social_log"] == "x"
+    with open(tmp_path / "debate_log.json", encoding="utf-8") as f:
+        assert json.load(f)["state"]["shared"]["social_log"] == "x"
+    assert journal_path.endswith(".ndjson")
+    assert [e.author for e in load_journal(journal_path).events] == ["social"]
+
+
+def test_export_latest_journal_without_journal_returns_none():
+    service = InMemorySessionService()
+    session = _session(service)
+    assert asyncio.run(export_latest_journal(session)) is None
@@ -0,0 +1,58 @@
+"""user-013：知識庫的沿用/相關查詢、過期清除與預設停用。"""
+
+import importlib
+import sqlite3
+
+from judge.tools.knowledge_base import KnowledgeBase
+
+# judge.tools 以同名單例遮蔽了模組屬性
+kb_module = importlib.import_module("judge.tools.knowledge_base")
+
+NEWS = "「台積電」宣布在高雄新建先進製程晶圓廠，預計明年量產"
+
+
+def test_reuse_and_related_lookup(tmp_path):
+    kb = KnowledgeBase(path=str(tmp_path / "kb.sqlite"))
+    kb.put("curation", NEWS, {"query": "q", "results": []})
+    reuse, _ = kb.lookup("curation", NEWS)
+    assert reuse == {"query": "q", "results": []}
+
+    reuse, related = kb.lookup("curation", "「台積電」股價今日大漲")
+    assert reuse is None and related == [{"query": "q", "results": []}]
+    assert kb.lookup("history", NEWS) == (None, [])
+    kb.close()
+
+
+def test_lookup_runs_a_single_query(tmp_path):
+    kb = KnowledgeBase(path=str(tmp_path / "kb.sqlite"))
+    kb.put("curation", NEWS, {"x": 1})
+    statements = []
+    kb._db().set_trace_callback(statements.append)
+    kb.lookup("curation", NEWS)
+    assert len(statements) == 1
+    kb.close()
+
+
+def test_expired_cards_are_purged_on_write(tmp_path):
+    path = str(tmp_path / "kb.sqlite")
+    kb = KnowledgeBase(path=path, ttl=3600)
+    kb.put("curation", NEWS, {"x": 1})
+    kb._db().execute("UPDATE kb_cards SET updated = 0")
+    kb._db().commit()
+    assert kb.lookup("curation", NEWS) == (None, [])
+    kb.put("history", "另一則完全無關的新聞內容", {"y": 2})
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM kb_cards").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM kb_terms t JOIN kb_cards c ON c.id = t.card_id").fetchone()[0] == (
+        conn.execute("SELECT COUNT(*) FROM kb_terms").fetchone()[0]
+    )
+    conn.close()
+    kb.close()
+
+
+def test_knowledge_base_is_opt_in(monkeypatch, tmp_path):
+    monkeypatch.delenv("JUDGE_KB", raising=False)
+    assert kb_module._create_knowledge_base() is None
+    monkeypatch.setenv("JUDGE_KB", "1")
+    monkeypatch.setenv("JUDGE_KB_PATH", str(tmp_path / "kb.sqlite"))
+    assert isinstance(kb_module._create_knowledge_base(), KnowledgeBase)
@@ -0,0 +1,64 @@
+"""user-016：錄製模型回應後可離線依內容位址或呼叫順序回放。"""
+
+import asyncio
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.agents import LlmAgent, SequentialAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from judge.tools.llm_backend import Cassette, RecordingLlm, ReplayLlm, install_llm_backend
+
+
+class _EchoLlm(BaseLlm):
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        text = llm_request.contents[-1].parts[0].text
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=f"回覆：{text}")]))
+
+
+def _request(text, agent="jury"):
+    return LlmRequest(
+        model="gemini-2.5-flash",
+        contents=[types.Content(role="user", parts=[types.Part(text=text)])],
+        config=types.GenerateContentConfig(labels={"adk_agent_name": agent}),
+    )
+
+
+def _texts(llm, request):
+    async def run():
+        return [r.content.parts[0].text async for r in llm.generate_content_async(request)]
+
+    return asyncio.run(run())
+
+
+def test_record_then_replay_by_key_and_order(tmp_path):
+    path = str(tmp_path / "cassette.ndjson")
+    recorder = RecordingLlm(model="gemini-2.5-flash", inner=_EchoLlm(model="gemini-2.5-flash"), cassette=Cassette(path))
+    assert _texts(recorder, _request("甲")) == ["回覆：甲"]
+    assert _texts(recorder, _request("乙")) == ["回覆：乙"]
+
+    replay = ReplayLlm(model="gemini-2.5-flash", cassette=Cassette(path))
+    assert _texts(replay, _request("乙")) == ["回覆：乙"]
+    # 內容位址不符時改取該代理下一個未使用的錄製
+    assert _texts(replay, _request("丙")) == ["回覆：甲"]
+    with pytest.raises(LookupError):
+        _texts(replay, _request("丁"))
+
+
+def test_install_replaces_models_once(tmp_path):
+    agent = LlmAgent(name="jury", model="gemini-2.5-flash")
+    root = SequentialAgent(name="root", sub_agents=[agent])
+    path = str(tmp_path / "cassette.ndjson")
+    assert install_llm_backend(root, mode="replay", cassette_path=path) == "replay"
+    replay = agent.model
+    assert isinstance(replay, ReplayLlm) and replay.model == "gemini-2.5-flash"
+    install_llm_backend(root, mode="replay", cassette_path=path)
+    assert agent.model is replay
+    assert install_llm_backend(root, mode="live") == "live"
+    with pytest.raises(ValueError):
+        install_llm_backend(root, mode="bogus")
@@ -0,0 +1,73 @@
+"""user-015：以請求內容定址的 LLM 回應快取（需明確啟用），依總大小 LRU 淘汰。"""
+
+from types import SimpleNamespace
+
+from google.adk.agents import LlmAgent, SequentialAgent
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from judge.tools.llm_cache import LLM_CACHE_METADATA_KEY, LlmResponseCache, _create_llm_cache, request_key
+
+
+def _request(text, temperature=0.0):
+    return LlmRequest(
+        model="gemini-2.5-flash",
+        contents=[types.Content(role="user", parts=[types.Part(text=text)])],
+        config=types.GenerateContentConfig(temperature=temperature),
+    )
+
+
+def _response(text):
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def _context(agent="jury"):
+    return SimpleNamespace(agent_name=agent, invocation_id="inv")
+
+
+def test_key_depends_on_contents_and_config():
+    assert request_key(_request("a")) == request_key(_request("a"))
+    assert request_key(_request("a")) != request_key(_request("b"))
+    assert request_key(_request("a")) != request_key(_request("a", temperature=0.5))
+
+
+def test_miss_store_then_hit(tmp_path):
+    cache = LlmResponseCache(path=str(tmp_path / "llm.sqlite"))
+    assert cache.before_model(callback_context=_context(), llm_request=_request("q")) is None
+    cache.after_model(callback_context=_context(), llm_response=_response("答案"))
+    hit = cache.before_model(callback_context=_context(), llm_request=_request("q"))
+    assert hit.content.parts[0].text == "答案"
+    assert hit.custom_metadata[LLM_CACHE_METADATA_KEY] == "hit"
+    assert cache.stats()["agents"]["jury"] == {"hits": 1, "misses": 1, "stores": 1}
+    cache.close()
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = LlmResponseCache(path=str(tmp_path / "llm.sqlite"), max_bytes=20)
+    cache.put("a", "jury", "x" * 10)
+    cache.put("b", "jury", "y" * 10)
+    cache.get("a")
+    cache.put("c", "jury", "z" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+
+def test_install_selects_deterministic_agents_once(tmp_path):
+    cold = LlmAgent(name="cold", generate_content_config=types.GenerateContentConfig(temperature=0))
+    warm = LlmAgent(name="warm", generate_content_config=types.GenerateContentConfig(temperature=0.7))
+    root = SequentialAgent(name="root", sub_agents=[cold, warm])
+    cache = LlmResponseCache(path=str(tmp_path / "llm.sqlite"))
+    assert cache.install(root) == ["cold"]
+    cache.install(root)
+    assert cold.before_model_callback == [cache.before_model]
+    assert not warm.before_model_callback
+
+
+def test_cache_is_opt_in(monkeypatch):
+    monkeypatch.delenv("JUDGE_LLM_CACHE", raising=False)
+    assert _create_llm_cache() is None
+    monkeypatch.setenv("JUDGE_LLM_CACHE", "1")
+    assert isinstance(_create_llm_cache(), LlmResponseCache)
@@ -0,0 +1,74 @@
+"""user-021：模型呼叫經令牌桶與 AIMD 並行上限排程，配額錯誤時退避重試。"""
+
+import asyncio
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import errors, types
+
+from judge.tools.llm_scheduler import AdaptiveLimiter, LlmScheduler, ScheduledLlm, TokenBucket
+
+
+class _FlakyLlm(BaseLlm):
+    failures: list = []
+    calls: int = 0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="ok")]))
+
+
+def _call(llm):
+    async def run():
+        request = LlmRequest(model="gemini-2.5-flash", contents=[])
+        return [r.content.parts[0].text async for r in llm.generate_content_async(request)]
+
+    return asyncio.run(run())
+
+
+def _scheduled(failures, **kwargs):
+    scheduler = LlmScheduler(rpm=0, backoff=0.0, **kwargs)
+    inner = _FlakyLlm(model="gemini-2.5-flash", failures=failures)
+    return ScheduledLlm(model="gemini-2.5-flash", inner=inner, scheduler=scheduler), inner, scheduler
+
+
+def test_retries_quota_errors_then_succeeds():
+    llm, inner, scheduler = _scheduled([errors.APIError(429, {}), errors.APIError(503, {})], max_concurrency=4)
+    assert _call(llm) == ["ok"]
+    stats = scheduler.stats()["gemini-2.5-flash"]
+    assert inner.calls == 3
+    assert (stats["retries"], stats["throttled"], stats["failures"], stats["inflight"]) == (2, 2, 0, 0)
+    assert stats["concurrency_limit"] < 4
+
+
+def test_non_retryable_and_exhausted_errors_raise():
+    llm, inner, scheduler = _scheduled([errors.APIError(400, {})])
+    with pytest.raises(errors.APIError):
+        _call(llm)
+    assert inner.calls == 1
+
+    llm, inner, scheduler = _scheduled([errors.APIError(429, {})] * 3, max_retries=1)
+    with pytest.raises(errors.APIError):
+        _call(llm)
+    assert inner.calls == 2 and scheduler.stats()["gemini-2.5-flash"]["failures"] == 1
+
+
+def test_limiter_and_bucket():
+    limiter = AdaptiveLimiter(max_limit=4, target_latency=1.0)
+    assert all(limiter.try_enter() for _ in range(4)) and not limiter.try_enter()
+    limiter.leave(None, throttled=True)
+    assert limiter.limit == 2
+    limiter.leave(5.0, throttled=False)
+    assert limiter.limit == 1
+
+    bucket = TokenBucket(rpm=60, burst=1)
+    assert bucket.try_take() == 0
+    assert 0 < bucket.try_take() <= 1.0
+    assert TokenBucket(rpm=0, burst=1).try_take() == 0
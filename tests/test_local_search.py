@@ -0,0 +1,52 @@
+"""user-012：離線 BM25 索引的增量重建、缺少語料目錄與提示中的工具名稱。"""
+
+import json
+
+import pytest
+
+from judge.tools.local_search import LocalSearchIndex, build_index
+from judge.tools.search_cache import search_tool_name
+
+
+def _write_corpus(corpus):
+    corpus.mkdir()
+    (corpus / "a.md").write_text("# 颱風警報\n中央氣象署今天發布海上颱風警報。", encoding="utf-8")
+    (corpus / "b.jsonl").write_text(
+        json.dumps({"title": "疫苗", "url": "https://example.gov.tw/v", "text": "疫苗接種資訊"}, ensure_ascii=False)
+        + "\n",
+        encoding="utf-8",
+    )
+
+
+def test_rebuild_reuses_unchanged_files(tmp_path):
+    corpus, index_dir = tmp_path / "corpus", tmp_path / "index"
+    _write_corpus(corpus)
+    first = build_index(str(corpus), str(index_dir))
+    assert first["updated"] == 2 and first["docs"] == 2
+
+    (corpus / "c.txt").write_text("地震\n花蓮發生規模六地震", encoding="utf-8")
+    second = build_index(str(corpus), str(index_dir))
+    assert (second["reused"], second["updated"], second["docs"]) == (2, 1, 3)
+
+    # files.jsonl 只存檔案資訊與文件範圍，不含全文或詞頻
+    entries = [json.loads(line) for line in (index_dir / "files.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert all(set(e) == {"file", "mtime", "size", "docs"} for e in entries)
+
+    index = LocalSearchIndex(str(index_dir))
+    assert index.search("颱風")[0]["title"] == "颱風警報"
+    assert index.search("疫苗 site:gov.tw")[0]["url"] == "https://example.gov.tw/v"
+    assert index.search("地震")[0]["title"] == "地震"
+    index.close()
+
+
+def test_missing_corpus_dir_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        build_index(str(tmp_path / "missing"), str(tmp_path / "index"))
+    assert not (tmp_path / "index").exists()
+
+
+def test_prompt_tool_name_follows_backend(monkeypatch):
+    monkeypatch.setenv("JUDGE_SEARCH_BACKEND", "local")
+    assert search_tool_name() == "local_search"
+    monkeypatch.setenv("JUDGE_SEARCH_BACKEND", "google")
+    assert search_tool_name() == "GoogleSearchTool"
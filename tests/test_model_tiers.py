@@ -0,0 +1,67 @@
+"""user-022：模型分級路由只涵蓋純驗證代理，TieredLlm 欄位不遮蔽 BaseLlm 屬性。"""
+
+import asyncio
+import subprocess
+import sys
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import BaseModel
+
+from judge.tools.model_tiers import DEFAULT_ROUTES, ModelRouter, TieredLlm
+
+
+class Out(BaseModel):
+    answer: str
+
+
+class FakeLlm(BaseLlm):
+    text: str
+
+    async def generate_content_async(self, llm_request, stream=False):
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=self.text)]))
+
+
+def _router():
+    return ModelRouter(DEFAULT_ROUTES, {"lite": "gemini-2.5-flash-lite"})
+
+
+def test_module_imports_without_shadowing_warning():
+    # 另開行程匯入，避免重新載入模組影響其他測試的類別判斷
+    result = subprocess.run(
+        [sys.executable, "-W", "always", "-c", "import judge.tools.model_tiers"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert "shadows an attribute" not in result.stderr
+
+
+def test_default_route_covers_validators_only():
+    router = _router()
+    validator = LlmAgent(name="curator_schema_validator", model="gemini-2.5-flash", output_schema=Out)
+    historian = LlmAgent(name="historian_schema_agent", model="gemini-2.5-flash", output_schema=Out)
+    assert router.route(validator) == "gemini-2.5-flash-lite"
+    assert router.route(historian) is None
+
+
+def test_tiered_llm_escalates_on_invalid_output():
+    router = _router()
+    llm = TieredLlm(
+        model="lite",
+        primary=FakeLlm(model="lite", text="not json"),
+        fallback=FakeLlm(model="std", text='{"answer": "ok"}'),
+        output_schema=Out,
+        router=router,
+    )
+    request = LlmRequest(config=types.GenerateContentConfig(labels={"adk_agent_name": "a"}))
+
+    async def run():
+        return [r async for r in llm.generate_content_async(request)]
+
+    responses = asyncio.run(run())
+    assert responses[-1].content.parts[0].text == '{"answer": "ok"}'
+    assert router.stats()["a"] == {"calls": 1, "escalations": 1, "escalation_rate": 1.0}
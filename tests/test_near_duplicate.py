@@ -0,0 +1,58 @@
+"""user-014：MinHash/LSH 找出近似重複的新聞並依新鮮度沿用歸檔判定（需明確啟用，不歸檔初篩精簡報告）。"""
+
+from types import SimpleNamespace
+
+from judge.tools.near_duplicate import (
+    VerdictArchive,
+    _create_verdict_archive,
+    estimate_similarity,
+    minhash_signature,
+)
+
+NEWS = "衛福部宣布即日起全國國中小停課兩週，家長須自行安排照顧，並將另行公布補課方式與時程。"
+VERDICT = {"final_report_json": {"topic": "停課"}, "weight_calculation_json": {"final_score": 0.1}}
+
+
+def test_reformatted_repost_has_high_similarity():
+    repost = "【轉傳】衛福部宣布：即日起 全國國中小停課兩週！家長須自行安排照顧，並將另行公布補課方式與時程"
+    other = "中央氣象署發布海上颱風警報，預計明日清晨暴風圈接觸東部陸地，請民眾提早做好防颱準備。"
+    assert estimate_similarity(minhash_signature(NEWS), minhash_signature(repost)) >= 0.7
+    assert estimate_similarity(minhash_signature(NEWS), minhash_signature(other)) < 0.3
+
+
+def test_match_returns_archived_verdict(tmp_path):
+    archive = VerdictArchive(path=str(tmp_path / "verdicts.sqlite"))
+    verdict_id = archive.archive(NEWS, VERDICT, "2024-06-01")
+    found = archive.match(NEWS, "2024-06-03")
+    assert found["id"] == verdict_id and found["similarity"] == 1.0
+    assert found["verdict"] == VERDICT
+    archive.close()
+
+
+def test_stale_verdicts_are_not_matched(tmp_path):
+    archive = VerdictArchive(path=str(tmp_path / "verdicts.sqlite"), date_window=7)
+    archive.archive(NEWS, VERDICT, "2024-06-01")
+    assert archive.match(NEWS, "2024-07-01") is None
+    assert archive.match(NEWS) is not None
+    archive.ttl = -1
+    assert archive.match(NEWS) is None
+    archive.close()
+
+
+def test_archive_is_opt_in(monkeypatch):
+    monkeypatch.delenv("JUDGE_DEDUP", raising=False)
+    assert _create_verdict_archive() is None
+    monkeypatch.setenv("JUDGE_DEDUP", "1")
+    monkeypatch.setenv("JUDGE_DEDUP_PATH", "")
+    assert isinstance(_create_verdict_archive(), VerdictArchive)
+
+
+def test_prescreen_shortcut_reports_are_not_archived(tmp_path):
+    archive = VerdictArchive(path=str(tmp_path / "verdicts.sqlite"))
+    context = SimpleNamespace(state={**VERDICT, "news_text": NEWS, "prescreen": {"shortcut": True}})
+    archive.after_pipeline(callback_context=context)
+    assert archive.stats()["archived"] == 0
+    context.state["prescreen"] = {"shortcut": False}
+    archive.after_pipeline(callback_context=context)
+    assert archive.stats()["archived"] == 1
+    archive.close()
@@ -0,0 +1,93 @@
+"""user-024：依 state 相依關係並行執行階段，事件（含回呼的側通道寫入）依宣告順序輸出。"""
+
+import asyncio
+from typing import AsyncGenerator
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+
+from judge.tools import append_event
+from judge.tools.pipeline_dag import DagAgent, defer_in_stage, instruction_reads
+
+
+_log = []
+# 模擬 bind_session 注入的側通道寫入函式
+_side_write = []
+
+
+class _Stage(BaseAgent):
+    output_key: str
+    reads: list[str] = []
+    delay: float = 0.0
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        _log.append(("start", self.name))
+        await asyncio.sleep(self.delay)
+        seen = {key: ctx.session.state.get(key) for key in self.reads}
+        _log.append(("end", self.name))
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            actions=EventActions(state_delta={self.output_key: {"seen": seen}}),
+        )
+        if _side_write:
+            await _side_write[0](Event(author=f"{self.name}_record"))
+
+
+def test_instruction_reads_handles_prefixes_and_state_refs():
+    text = "根據 {fact_check_result_json} 與 {temp:debate_view_jury?}，參考 state['classification_json']；{不是 鍵}"
+    assert instruction_reads(text) == {"fact_check_result_json", "debate_view_jury", "classification_json"}
+
+
+def test_plan_infers_dependencies_from_placeholders():
+    a = LlmAgent(name="a", instruction="新聞", output_key="x")
+    b = LlmAgent(name="b", instruction="新聞 {news?}", output_key="y")
+    c = LlmAgent(name="c", instruction="合併 {x} {y}", output_key="z")
+    dag = DagAgent(name="dag", sub_agents=[a, b, c])
+    assert dag.plan() == [("a", []), ("b", ["a"]), ("c", ["a", "b"])]
+    dag = DagAgent(name="dag", sub_agents=[b.model_copy(update={"parent_agent": None}), c.model_copy(update={"parent_agent": None})])
+    assert dag.plan() == [("b", []), ("c", ["b"])]
+
+
+def test_independent_stages_overlap_and_events_keep_order():
+    _log.clear()
+    _side_write.clear()
+    slow = _Stage(name="slow", output_key="x", reads=["news"], delay=0.05)
+    fast = _Stage(name="fast", output_key="y", reads=["news"])
+    merge = _Stage(name="merge", output_key="z", reads=["x", "y"])
+    dag = DagAgent(name="dag", sub_agents=[slow, fast, merge], extra_reads={s.name: s.reads for s in (slow, fast, merge)})
+    service = InMemorySessionService()
+    session = service.create_session_sync(app_name="app", user_id="u", state={"news": "n"})
+    ctx = InvocationContext(session_service=service, invocation_id="inv", agent=dag, session=session)
+
+    async def run():
+        return [event async for event in dag.run_async(ctx)]
+
+    events = asyncio.run(run())
+    assert [e.author for e in events] == ["slow", "fast", "merge"]
+    assert _log.index(("start", "fast")) < _log.index(("end", "slow")) < _log.index(("start", "merge"))
+    assert events[-1].actions.state_delta["z"]["seen"] == {"x": {"seen": {"news": "n"}}, "y": {"seen": {"news": "n"}}}
+
+
+def test_side_channel_writes_follow_declaration_order():
+    slow = _Stage(name="slow", output_key="x", reads=["news"], delay=0.05)
+    fast = _Stage(name="fast", output_key="y", reads=["news"])
+    dag = DagAgent(name="dag", sub_agents=[slow, fast], extra_reads={s.name: s.reads for s in (slow, fast)})
+    service = InMemorySessionService()
+    session = service.create_session_sync(app_name="app", user_id="u", state={"news": "n"})
+    ctx = InvocationContext(session_service=service, invocation_id="inv", agent=dag, session=session)
+    _side_write[:] = [defer_in_stage(lambda event: append_event(session, event, service=service))]
+
+    async def run():
+        async for event in dag.run_async(ctx):
+            await service.append_event(session, event)
+
+    try:
+        asyncio.run(run())
+    finally:
+        _side_write.clear()
+    assert [e.author for e in session.events] == ["slow", "slow_record", "fast", "fast_record"]
@@ -0,0 +1,77 @@
+"""user-025：初篩須有兩項可解析的輸入才可略過完整流程，topic 取自使用者內容。"""
+
+import asyncio
+from typing import AsyncGenerator
+
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+from google.genai import types
+
+from judge.agents.prescreen import PrescreenAgent, prescreen_decision, reduced_report, screened_inputs
+from judge.agents.weight.agent import compute_weighted_score
+
+FACT_CHECK = {"analysis": "來源 https://e.com/a 證實", "classification": "完全錯誤"}
+CLASSIFICATION = {"score": 0.05}
+
+
+class _Marker(BaseAgent):
+    ran: bool = False
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        self.ran = True
+        return
+        yield
+
+
+def _run(state, text="颱風假新聞\n內文"):
+    full = _Marker(name="full")
+    agent = PrescreenAgent(name="prescreen", sub_agents=[_Marker(name="screen"), full])
+    service = InMemorySessionService()
+    session = service.create_session_sync(app_name="app", user_id="u", state=state)
+    ctx = InvocationContext(
+        session_service=service,
+        invocation_id="inv",
+        agent=agent,
+        session=session,
+        user_content=types.Content(role="user", parts=[types.Part(text=text)]),
+    )
+
+    async def run():
+        async for event in agent.run_async(ctx):
+            await service.append_event(session, event)
+
+    asyncio.run(run())
+    return session.state, full.ran
+
+
+def test_missing_inputs_never_shortcut():
+    assert prescreen_decision(compute_weighted_score(None, None)) is None
+    state, ran_full = _run({"weight_calculation_json": compute_weighted_score(None, None)})
+    assert ran_full and state["prescreen"] == {"shortcut": False}
+
+
+def test_unparseable_or_unknown_classification_is_not_ready():
+    assert screened_inputs({"fact_check_result_json": "{", "classification_json": CLASSIFICATION}) is None
+    unknown = {**FACT_CHECK, "classification": "無法判斷"}
+    assert screened_inputs({"fact_check_result_json": unknown, "classification_json": CLASSIFICATION}) is None
+    assert screened_inputs({"fact_check_result_json": FACT_CHECK, "classification_json": None}) is None
+
+
+def test_clear_result_shortcuts_with_user_topic():
+    state = {
+        "fact_check_result_json": FACT_CHECK,
+        "classification_json": CLASSIFICATION,
+        "weight_calculation_json": compute_weighted_score(FACT_CHECK, CLASSIFICATION),
+    }
+    state, ran_full = _run(state)
+    assert not ran_full
+    assert state["prescreen"] == {"shortcut": True, "decision": "false"}
+    assert state["final_report_json"]["topic"] == "颱風假新聞"
+    assert state["final_report_json"]["appendix_links"] == ["https://e.com/a"]
+
+
+def test_topic_falls_back_to_classification():
+    state = {"fact_check_result_json": FACT_CHECK, "weight_calculation_json": {}}
+    assert reduced_report(state, "false")["topic"] == "完全錯誤"
@@ -0,0 +1,51 @@
+"""user-010：記錄回呼每次只寫入一個事件，pretty JSON 於匯出時延遲產生並快取。"""
+
+import asyncio
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.session import Session
+
+from judge.tools import export_session, make_record_callback, pretty_message, pretty_metadata
+from judge.tools import pretty
+
+
+class _Context:
+    def __init__(self, state):
+        self.state = state
+
+
+def test_record_callback_writes_one_marked_event():
+    events = []
+
+    async def append_event(event):
+        events.append(event)
+
+    callback = make_record_callback("jury", "jury_result", show_pretty_message=True)
+    asyncio.run(callback(agent_context=_Context({"jury_result": {"verdict": "假"}}), append_event=append_event))
+    assert len(events) == 1
+    assert events[0].custom_metadata == pretty_metadata("jury_result")
+    assert events[0].content is None
+    assert pretty_message(events[0]) == '{\n  "verdict": "假"\n}'
+
+
+def test_pretty_message_is_cached_per_event():
+    event = Event(author="synth", actions=EventActions(state_delta={"final_report_json": {"topic": "t"}}))
+    first = pretty_message(event)
+    assert first is not None and pretty._pretty_cache[event.id] == first
+    assert pretty_message(event) is first
+
+
+def test_unstructured_events_have_no_pretty_view():
+    assert pretty_message(Event(author="a", actions=EventActions(state_delta={"other": 1}))) is None
+    marked = Event(author="a", actions=EventActions(state_delta={}), custom_metadata=pretty_metadata("jury_result"))
+    assert pretty_message(marked) is None
+
+
+def test_export_session_attaches_pretty_view():
+    marked = Event(author="jury", actions=EventActions(state_delta={"jury_result": {"verdict": "假"}}), custom_metadata=pretty_metadata("jury_result"))
+    plain = Event(author="curator", actions=EventActions(state_delta={"curation": {}}))
+    session = Session(id="s", app_name="app", user_id="u", events=[marked, plain])
+    events = export_session(session)["events"]
+    assert events[0]["pretty"] == pretty_message(marked)
+    assert "pretty" not in events[1]
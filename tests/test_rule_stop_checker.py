@@ -0,0 +1,67 @@
+"""user-019：規則式停止檢查讀取增量累加器，且接受 JSON 字串形式的 next_decision。"""
+
+import asyncio
+
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+
+from judge.agents.moderator.agent import RuleStopChecker
+from judge.agents.moderator.tools import lexical_novelty
+from judge.tools.debate_log import sync_debate_log
+
+
+def _msg(i, claim, text):
+    return {
+        "speaker": ("advocate", "skeptic")[i % 2],
+        "claim": claim,
+        "content": text,
+        "data": {"confidence": 0.5 + i / 20, "evidence": [{"source": f"https://e.com/{i}", "claim": claim, "warrant": "w"}]},
+    }
+
+
+def _run(state, checker=None):
+    checker = checker or RuleStopChecker(name="rule_stop_checker", max_turns=10)
+    service = InMemorySessionService()
+    session = service.create_session_sync(app_name="app", user_id="u", state=state)
+    ctx = InvocationContext(session_service=service, invocation_id="inv", agent=checker, session=session)
+
+    async def run():
+        return [event async for event in checker.run_async(ctx)]
+
+    events = asyncio.run(run())
+    return session, events[-1]
+
+
+def test_novelty_matches_full_rescan_incrementally():
+    messages = [_msg(i, f"主張{i}", text) for i, text in enumerate(["颱風 來襲 停班", "颱風 停課 消息", "地震 海嘯 警報"])]
+    state = {"debate_messages": messages[:2]}
+    turns = sync_debate_log(state)
+    state["debate_messages"].append(messages[2])
+    assert sync_debate_log(state) is turns and len(turns) == 3
+    assert turns.metrics.novelty(turns, 2) == lexical_novelty(messages[2:], messages[:2])
+    assert turns.metrics.novelty(turns, 1) == lexical_novelty(messages[1:], messages[:1])
+
+
+def test_sync_rebuilds_after_reset():
+    state = {"debate_messages": [_msg(0, "a", "x"), _msg(1, "b", "y")]}
+    sync_debate_log(state)
+    state["debate_messages"] = [_msg(0, "c", "z")]
+    turns = sync_debate_log(state)
+    assert [t.claim for t in turns] == ["c"]
+    assert state["dispute_points"] == 1
+
+
+def test_checker_reads_accumulator_and_continues_on_progress():
+    messages = [_msg(0, "主張一", "颱風 來襲"), _msg(1, "主張二", "停班 停課")]
+    session, event = _run({"debate_messages": messages, "next_decision": {"next_speaker": "skeptic"}})
+    delta = event.actions.state_delta
+    assert delta["stop_signal"] == "continue"
+    assert delta["dispute_points"] == 2 and delta["new_evidence_gain"] == 2
+    assert delta["stop_checked_turns"] == 2
+    assert len(session.state["debate_log"]) == 2
+
+
+def test_string_end_decision_stops_the_loop():
+    session, event = _run({"debate_messages": [_msg(0, "a", "x")], "next_decision": '{"next_speaker": "end"}'})
+    assert event.actions.state_delta["stop_signal"] == "stop:end"
+    assert event.actions.escalate
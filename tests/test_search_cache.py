@@ -0,0 +1,81 @@
+"""user-011：搜尋結果快取以模型、設定與查詢為鍵，跨代理共用 grounding 結果。"""
+
+from types import SimpleNamespace
+
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from judge.tools.search_cache import SearchCache, _create_search_cache
+
+
+def _request(instruction, query="某新聞 是否屬實？", model="gemini-2.5-flash", temperature=0.0):
+    return LlmRequest(
+        model=model,
+        contents=[types.Content(role="user", parts=[types.Part(text=query)])],
+        config=types.GenerateContentConfig(
+            system_instruction=instruction,
+            temperature=temperature,
+            tools=[types.Tool(google_search=types.GoogleSearch())],
+        ),
+    )
+
+
+def _grounded_response():
+    return LlmResponse(
+        content=types.Content(role="model", parts=[types.Part(text="answer")]),
+        grounding_metadata=types.GroundingMetadata(
+            web_search_queries=["某新聞"],
+            grounding_chunks=[types.GroundingChunk(web=types.GroundingChunkWeb(uri="https://e.com/a", title="E"))],
+            grounding_supports=[types.GroundingSupport(segment=types.Segment(text="片段"))],
+        ),
+    )
+
+
+def _ctx(agent):
+    return SimpleNamespace(invocation_id="inv", agent_name=agent)
+
+
+def test_agents_share_search_results_but_not_across_models():
+    cache = SearchCache()
+    first = _request("advocate")
+    assert cache.before_model(_ctx("advocate"), first) is None
+    cache.after_model(_ctx("advocate"), _grounded_response())
+
+    other_agent = _request("skeptic")
+    assert cache.before_model(_ctx("skeptic"), other_agent) is None
+    assert cache.hits == 1
+    assert "https://e.com/a" in other_agent.config.system_instruction
+    assert other_agent.config.system_instruction.startswith("skeptic")
+    assert other_agent.config.tools is None
+
+    cache.before_model(_ctx("skeptic"), _request("skeptic", model="gemini-2.5-pro"))
+    cache.before_model(_ctx("skeptic"), _request("skeptic", temperature=0.7))
+    assert cache.hits == 1
+
+
+def test_responses_without_search_are_not_stored():
+    cache = SearchCache()
+    cache.before_model(_ctx("a"), _request("a"))
+    cache.after_model(_ctx("a"), LlmResponse(content=types.Content(role="model", parts=[types.Part(text="x")])))
+    assert cache.stats()["stores"] == 0
+
+
+def test_disk_cache_round_trip(tmp_path):
+    path = str(tmp_path / "search.sqlite")
+    cache = SearchCache(path=path)
+    cache.before_model(_ctx("a"), _request("a"))
+    cache.after_model(_ctx("a"), _grounded_response())
+    reopened = SearchCache(path=path)
+    reopened.before_model(_ctx("b"), _request("b"))
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_cache_is_opt_in(monkeypatch):
+    monkeypatch.delenv("JUDGE_SEARCH_CACHE", raising=False)
+    monkeypatch.delenv("JUDGE_SEARCH_BACKEND", raising=False)
+    monkeypatch.delenv("JUDGE_LLM_MODE", raising=False)
+    assert _create_search_cache() is None
+    monkeypatch.setenv("JUDGE_SEARCH_CACHE", "1")
+    monkeypatch.setenv("JUDGE_SEARCH_CACHE_PATH", "")
+    assert isinstance(_create_search_cache(), SearchCache)
@@ -0,0 +1,134 @@
+"""user-023：過期的預測決策只計一次並清除；預測決策者使用自己的歷史檢視；多輪迴圈中下一輪採用預測決策。"""
+
+import asyncio
+from typing import AsyncGenerator
+
+from google.adk.agents import LoopAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+
+from judge.agents.moderator.agent import (
+    ROTATION,
+    SPECULATION_KEY,
+    SPECULATIVE_DECISION_KEY,
+    SPECULATIVE_VIEW_KEY,
+    SpeculativeOrchestrator,
+    _speculation_enabled,
+    decision_agent,
+    speculation_stats,
+    speculative_decider,
+)
+from judge.tools.debate_history import VIEW_KEY_PREFIX
+
+
+class _Noop(BaseAgent):
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        return
+        yield
+
+
+# pydantic 會複製欄位中的 list，改用模組層級紀錄
+_decider_calls: list = []
+
+
+class _Decider(BaseAgent):
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        _decider_calls.append(ctx.invocation_id)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            actions=EventActions(state_delta={"next_decision": {"next_speaker": "advocate"}}),
+        )
+
+
+class _Turn(BaseAgent):
+    """模擬執行者與預測決策者：目前的發言者發言，同時預測輪替後的下一位"""
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        speaker = state["next_decision"]["next_speaker"]
+        messages = state["debate_messages"]
+        spec = {"after_speaker": speaker, "predicted": ROTATION[speaker], "turns": len(messages), "status": "running"}
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            actions=EventActions(
+                state_delta={
+                    "debate_messages": messages + [{"speaker": speaker}],
+                    SPECULATION_KEY: spec,
+                    SPECULATIVE_DECISION_KEY: {"next_speaker": ROTATION[speaker]},
+                }
+            ),
+        )
+
+
+def _run_round(service, session, orchestrator):
+    ctx = InvocationContext(session_service=service, invocation_id="inv", agent=orchestrator, session=session)
+
+    async def run():
+        async for event in orchestrator.run_async(ctx):
+            await service.append_event(session, event)
+
+    asyncio.run(run())
+
+
+def test_stale_speculation_is_discarded_once_and_cleared():
+    orchestrator = SpeculativeOrchestrator(
+        name="moderator_orchestrator", sub_agents=[_Noop(name="decider"), _Noop(name="turn")]
+    )
+    service = InMemorySessionService()
+    stale = {"status": "ready", "landed": 1, "decision": {"next_speaker": "skeptic"}}
+    session = service.create_session_sync(
+        app_name="app", user_id="u", state={"debate_messages": [{}, {}], SPECULATION_KEY: stale}
+    )
+    before = speculation_stats["discarded"]
+    _run_round(service, session, orchestrator)
+    assert session.state[SPECULATION_KEY] is None
+    _run_round(service, session, orchestrator)
+    assert speculation_stats["discarded"] - before == 1
+
+
+def test_speculative_decider_renders_its_own_view():
+    moderator_key = f"{VIEW_KEY_PREFIX}moderator"
+    assert f"{{{moderator_key}?}}" in decision_agent.instruction
+    assert f"{{{moderator_key}?}}" not in speculative_decider.instruction
+    assert f"{{{SPECULATIVE_VIEW_KEY}?}}" in speculative_decider.instruction
+
+    service = InMemorySessionService()
+    session = service.create_session_sync(
+        app_name="app",
+        user_id="u",
+        state={"debate_messages": [{"speaker": "advocate", "content": "颱風 停班"}]},
+    )
+    ctx = InvocationContext(session_service=service, invocation_id="inv", agent=speculative_decider, session=session)
+    callback_context = CallbackContext(ctx)
+    speculative_decider.before_agent_callback[1](callback_context=callback_context)
+    assert SPECULATIVE_VIEW_KEY in callback_context.state
+    assert moderator_key not in callback_context.state
+
+
+def test_second_round_commits_speculation_and_skips_decider():
+    orchestrator = SpeculativeOrchestrator(
+        name="moderator_orchestrator", sub_agents=[_Decider(name="decider"), _Turn(name="turn")]
+    )
+    loop = LoopAgent(name="referee", sub_agents=[orchestrator], max_iterations=2)
+    service = InMemorySessionService()
+    session = service.create_session_sync(app_name="app", user_id="u", state={"debate_messages": []})
+    _decider_calls.clear()
+    before = speculation_stats["committed"]
+    _run_round(service, session, loop)
+    assert speculation_stats["committed"] - before == 1
+    assert len(_decider_calls) == 1
+    assert [m["speaker"] for m in session.state["debate_messages"]] == ["advocate", "skeptic"]
+
+
+def test_speculation_requires_more_than_one_iteration(monkeypatch):
+    monkeypatch.setenv("JUDGE_SPECULATIVE_DECISION", "1")
+    assert not _speculation_enabled(1)
+    assert _speculation_enabled(3)
+    monkeypatch.delenv("JUDGE_SPECULATIVE_DECISION")
+    assert not _speculation_enabled(3)
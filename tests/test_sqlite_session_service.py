@@ -0,0 +1,79 @@
+"""user-006：SQLite SessionService 的持久化、重複 id 與背景執行緒 I/O。"""
+
+import asyncio
+import gc
+import threading
+
+import pytest
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+
+from judge.tools import sqlite_session_service
+from judge.tools.sqlite_session_service import AlreadyExistsError, SqliteSessionService
+
+
+def test_events_and_state_survive_reopen(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    service = SqliteSessionService(path, batch_size=4)
+
+    async def run():
+        session = await service.create_session(app_name="app", user_id="u", state={"x": 1, "app:shared": 2})
+        for i in range(5):
+            await service.append_event(session, Event(author="a", actions=EventActions(state_delta={"x": i})))
+        return session.id
+
+    session_id = asyncio.run(run())
+    service.close()
+
+    reopened = SqliteSessionService(path)
+    session = reopened.get_session_sync(app_name="app", user_id="u", session_id=session_id)
+    assert session.state["x"] == 4
+    assert session.state["app:shared"] == 2
+    assert len(session.events) == 5
+    reopened.close()
+
+
+def test_duplicate_session_id_raises_already_exists(tmp_path):
+    service = SqliteSessionService(str(tmp_path / "s.db"))
+    service.create_session_sync(app_name="app", user_id="u", session_id="dup")
+    with pytest.raises(AlreadyExistsError):
+        service.create_session_sync(app_name="app", user_id="u", session_id="dup")
+    with pytest.raises(AlreadyExistsError):
+        asyncio.run(service.create_session(app_name="app", user_id="u", session_id="dup"))
+    service.close()
+
+
+def test_async_io_runs_off_the_event_loop(tmp_path, monkeypatch):
+    service = SqliteSessionService(str(tmp_path / "s.db"), batch_size=1)
+    threads = []
+    original = service._flush
+    monkeypatch.setattr(service, "_flush", lambda: threads.append(threading.current_thread()) or original())
+
+    async def run():
+        session = await service.create_session(app_name="app", user_id="u")
+        await service.append_event(session, Event(author="a", actions=EventActions(state_delta={"k": 1})))
+        await service.get_session(app_name="app", user_id="u", session_id=session.id)
+
+    asyncio.run(run())
+    assert threads and all(t is not threading.main_thread() for t in threads)
+    service.close()
+
+
+def test_services_are_not_kept_alive_for_atexit(tmp_path):
+    service = SqliteSessionService(str(tmp_path / "s.db"))
+    assert service in sqlite_session_service._open_services
+    del service
+    gc.collect()
+    assert not any(s.path.endswith("s.db") and str(tmp_path) in s.path for s in sqlite_session_service._open_services)
+
+
+def test_collected_service_flushes_pending_events(tmp_path):
+    path = str(tmp_path / "s.db")
+    service = SqliteSessionService(path, batch_size=100)
+    session = service.create_session_sync(app_name="app", user_id="u")
+    asyncio.run(service.append_event(session, Event(author="a", actions=EventActions(state_delta={"k": 1}))))
+    del service
+    gc.collect()
+    reopened = SqliteSessionService(path)
+    assert reopened.get_session_sync(app_name="app", user_id="u", session_id=session.id).state["k"] == 1
+    reopened.close()
@@ -0,0 +1,40 @@
+"""user-017：單次結構化輸出的本地 JSON 擷取、確定性解析與階段切換。"""
+
+from google.adk.agents import LlmAgent, SequentialAgent
+
+from judge.agents.llm.agent import FactCheckOutput, parse_fact_check_raw
+from judge.tools.structured_output import SinglePassAgent, extract_json, parse_structured, structured_stage
+
+
+def test_extract_json_repairs_common_model_output():
+    assert extract_json('說明如下：\n```json\n{"a": [1, 2,],}\n```') == {"a": [1, 2]}
+    assert extract_json("結果 {'a': True, 'b': None} 完") == {"a": True, "b": None}
+    assert extract_json('{"text": "含 } 括號"}') == {"text": "含 } 括號"}
+    assert extract_json("沒有 JSON") is None
+
+
+def test_parse_structured_falls_back_to_parser():
+    raw = "分析結果：多家媒體證實此事為誤傳。\n真假分類：「完全錯誤」"
+    data, source = parse_structured(raw, FactCheckOutput, parser=parse_fact_check_raw)
+    assert source == "parser"
+    assert data == {"analysis": "多家媒體證實此事為誤傳。", "classification": "完全錯誤"}
+
+    data, source = parse_structured('{"analysis": "x", "classification": "部分正確"}', FactCheckOutput)
+    assert source == "direct" and data["classification"] == "部分正確"
+    assert parse_structured("無法解析", FactCheckOutput, parser=parse_fact_check_raw) == (None, "")
+
+
+def test_structured_stage_follows_env(monkeypatch):
+    runner = LlmAgent(name="runner", instruction="查詢", output_key="raw")
+    validator = LlmAgent(name="validator", instruction="轉為 JSON", output_schema=FactCheckOutput, output_key="out")
+
+    monkeypatch.delenv("JUDGE_SINGLE_PASS", raising=False)
+    assert isinstance(structured_stage("fact_check_agent", runner, validator), SequentialAgent)
+
+    monkeypatch.setenv("JUDGE_SINGLE_PASS", "curator,fact_check_agent")
+    runner = runner.model_copy(update={"parent_agent": None})
+    validator = validator.model_copy(update={"parent_agent": None})
+    stage = structured_stage("fact_check_agent", runner, validator)
+    assert isinstance(stage, SinglePassAgent)
+    assert (stage.raw_key, stage.output_key) == ("raw", "out")
+    assert "FactCheckOutput" in stage.sub_agents[0].instruction
@@ -0,0 +1,83 @@
+"""user-003：回合快取只解析新事件，且以 (app_name, user_id, session_id) 區分 Session。"""
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.session import Session
+
+from judge.tools import debate_log
+from judge.tools.debate_log import (
+    clear_turn_cache,
+    debate_messages_delta,
+    export_debate_log,
+    recalculate_metrics,
+    update_state_from_session,
+)
+
+
+def _event(i: int, speaker: str = "advocate") -> Event:
+    message = {
+        "speaker": speaker,
+        "content": f"turn {i}",
+        "claim": f"claim {i}",
+        "data": {"confidence": 0.4, "evidence": [{"source": f"https://e.com/{i % 2}", "claim": "c", "warrant": "w"}]},
+    }
+    return Event(author=speaker, actions=EventActions(state_delta=debate_messages_delta([message], i)))
+
+
+def _session(session_id: str = "s", user_id: str = "u", n: int = 0) -> Session:
+    return Session(id=session_id, app_name="app", user_id=user_id, events=[_event(i) for i in range(n)])
+
+
+def test_only_new_events_are_parsed(monkeypatch):
+    clear_turn_cache()
+    session = _session(n=3)
+    export_debate_log(session)
+
+    parsed = []
+    original = debate_log._turn_from_message
+    monkeypatch.setattr(
+        debate_log, "_turn_from_message", lambda *a: parsed.append(a) or original(*a)
+    )
+    session.events.append(_event(3))
+    exported = export_debate_log(session)
+    assert len(parsed) == 1
+    assert exported.count('"speaker"') == 4
+
+
+def test_update_state_from_session_appends_only_the_delta():
+    clear_turn_cache()
+    session = _session(n=2)
+    state: dict = {}
+    update_state_from_session(state, session)
+    log = state["debate_log"]
+    evidence = state["evidence"]
+
+    session.events.append(_event(2))
+    update_state_from_session(state, session)
+    # 同一份列表只追加新回合，不重新複製
+    assert state["debate_log"] is log
+    assert state["evidence"] is evidence
+    assert len(log) == 3
+    expected = recalculate_metrics([t.to_model() for t in log])
+    assert state["dispute_points"] == expected["dispute_points"]
+    assert len(state["evidence"]) == len(expected["evidence"])
+
+
+def test_update_state_from_session_rebuilds_foreign_log():
+    clear_turn_cache()
+    state: dict = {"debate_log": ["stale"]}
+    update_state_from_session(state, _session(n=2))
+    assert [t.claim for t in state["debate_log"]] == ["claim 0", "claim 1"]
+
+
+def test_cache_key_includes_user_id():
+    clear_turn_cache()
+    first = _session(user_id="alice", n=1)
+    second = _session(user_id="bob", n=2)
+    assert export_debate_log(first).count('"speaker"') == 1
+    assert export_debate_log(second).count('"speaker"') == 2
+    assert export_debate_log(first).count('"speaker"') == 1
+
+    clear_turn_cache("app", "alice", "s")
+    assert ("app", "bob", "s") in debate_log._turn_cache
+    assert ("app", "alice", "s") not in debate_log._turn_cache
@@ -0,0 +1,53 @@
+"""user-018：權重計算為純函式；缺少或無法解析的輸入回傳錯誤結果。"""
+
+import asyncio
+import json
+
+import pytest
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+
+from judge.agents.weight.agent import WeightAgent, calculate_weighted_score, compute_weighted_score
+
+
+def test_weighted_score():
+    result = compute_weighted_score({"classification": "基本正確"}, json.dumps({"score": 0.5}))
+    assert result["llm_score"] == 0.75
+    assert result["final_score"] == pytest.approx(0.65)
+    assert "error" not in result
+
+
+@pytest.mark.parametrize(
+    "llm, slm",
+    [
+        (None, None),
+        ({"classification": "完全正確"}, None),
+        (None, {"score": 0.9}),
+        ("not json", {"score": 0.9}),
+        ({"classification": "完全正確"}, "[1, 2]"),
+        ({"classification": "完全正確"}, {"score": "high"}),
+    ],
+)
+def test_missing_or_bad_inputs_return_error(llm, slm):
+    result = compute_weighted_score(llm, slm)
+    assert result["error"]
+    assert result["llm_label"] == "錯誤"
+    assert result["final_score"] == 0.0
+
+
+def test_tool_entry_point_reports_missing_state():
+    assert calculate_weighted_score("")["error"]
+    assert calculate_weighted_score("{bad")["error"]
+
+
+def test_agent_keeps_error_field():
+    service = InMemorySessionService()
+    session = service.create_session_sync(app_name="app", user_id="u", state={})
+    agent = WeightAgent(name="weight")
+    ctx = InvocationContext(session_service=service, invocation_id="inv", agent=agent, session=session)
+
+    async def run():
+        return [event async for event in agent.run_async(ctx)]
+
+    events = asyncio.run(run())
+    assert events[-1].actions.state_delta["weight_calculation_json"]["error"]